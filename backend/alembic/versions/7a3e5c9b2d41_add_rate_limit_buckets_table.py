@@ -0,0 +1,35 @@
+"""add_rate_limit_buckets_table
+
+Revision ID: 7a3e5c9b2d41
+Revises: 05f127f750e6
+Create Date: 2026-10-17 19:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3e5c9b2d41'
+down_revision = '05f127f750e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create rate_limit_buckets table (shared rate limit state)
+    op.create_table(
+        'rate_limit_buckets',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.Column('expires_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_rate_limit_buckets_expires_at'), 'rate_limit_buckets', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Drop rate_limit_buckets table
+    op.drop_index(op.f('ix_rate_limit_buckets_expires_at'), table_name='rate_limit_buckets')
+    op.drop_table('rate_limit_buckets')
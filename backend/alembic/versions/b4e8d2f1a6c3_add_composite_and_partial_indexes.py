@@ -0,0 +1,52 @@
+"""add_composite_and_partial_indexes
+
+Revision ID: b4e8d2f1a6c3
+Revises: 7a3e5c9b2d41
+Create Date: 2026-10-17 22:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e8d2f1a6c3'
+down_revision = '7a3e5c9b2d41'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    # Eligibility checks and completion rates: student + approval (+ completion) status
+    ('ix_enrollments_student_approval_completion', 'enrollments', ['student_id', 'approval_status', 'completion_status'], None),
+    # Course reports and seat checks: course + approval status
+    ('ix_enrollments_course_approval', 'enrollments', ['course_id', 'approval_status'], None),
+    # Duplicate/prerequisite matching by name for deleted courses
+    ('ix_enrollments_course_name', 'enrollments', ['course_name'], None),
+    # Participant and completion counts only look at approved enrollments
+    ('ix_enrollments_approved_course_completion', 'enrollments', ['course_id', 'completion_status'],
+     "approval_status = 'APPROVED'"),
+    # Approval queue: eligible enrollments still waiting for a decision
+    ('ix_enrollments_pending_eligible_course', 'enrollments', ['course_id'],
+     "approval_status = 'PENDING' AND eligibility_status = 'ELIGIBLE'"),
+    # Student lists filter on is_active and sort by employee_id
+    ('ix_students_active_employee_id', 'students', ['is_active', 'employee_id'], None),
+]
+
+
+def upgrade() -> None:
+    # Build the indexes without blocking writes to the (large) tables
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
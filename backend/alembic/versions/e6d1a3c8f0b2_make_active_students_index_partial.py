@@ -0,0 +1,42 @@
+"""make_active_students_index_partial
+
+Revision ID: e6d1a3c8f0b2
+Revises: b4e8d2f1a6c3
+Create Date: 2026-10-17 23:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6d1a3c8f0b2'
+down_revision = 'b4e8d2f1a6c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The student list filters on is_active and sorts by employee_id. A
+    # (is_active, employee_id) index was never chosen over ix_students_employee_id;
+    # an employee_id index over active students only is smaller and is.
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_students_active_employee_id', table_name='students',
+                      postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            'ix_students_active_employee_id', 'students', ['employee_id'], unique=False,
+            postgresql_where=sa.text('is_active'),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_students_active_employee_id', table_name='students',
+                      postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            'ix_students_active_employee_id', 'students', ['is_active', 'employee_id'], unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
@@ -1,18 +1,47 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Dict, Iterable
 import pandas as pd
+import itertools
 import os
-import aiofiles
 from datetime import datetime
 from app.db.base import get_db
 from app.core.config import settings
 from app.models.enrollment import Enrollment, CompletionStatus
 from app.schemas.enrollment import CompletionUpload, CompletionBulkUpload
-from app.core.file_utils import sanitize_filename, validate_file_extension, validate_file_size, get_safe_file_path
+from app.core.file_utils import sanitize_filename, validate_file_extension, get_safe_file_path, save_upload_file
+from app.services.import_service import ImportService
 
 router = APIRouter()
 
+def _iter_chunks(first_chunk: pd.DataFrame, remaining_chunks):
+    """Yield the rows of each chunk of a chunked file read as a list of (index, row) pairs."""
+    for chunk in itertools.chain([first_chunk], remaining_chunks):
+        yield list(chunk.iterrows())
+
+def _cell(row, column):
+    """Get a stripped string cell value, or None if the cell is empty."""
+    return str(row.get(column, '')).strip() if pd.notna(row.get(column)) else None
+
+def _load_students(db: Session, column, values: Iterable[str]) -> Dict:
+    """Map values of a Student column to students with a single IN query.
+    When several students share a value (e.g. name), the lowest id wins."""
+    from app.models.student import Student
+    values = {value for value in values if value}
+    if not values:
+        return {}
+    students = {}
+    for student in db.query(Student).filter(column.in_(values)).order_by(Student.id.desc()):
+        students[getattr(student, column.key)] = student
+    return students
+
+def _load_course_enrollments(db: Session, course_id: int) -> Dict[int, Enrollment]:
+    """Load the course's enrollments once, keyed by student id (lowest id wins)."""
+    enrollments = db.query(Enrollment).filter(
+        Enrollment.course_id == course_id
+    ).order_by(Enrollment.id.desc()).all()
+    return {enrollment.student_id: enrollment for enrollment in enrollments}
+
 @router.post("/upload", response_model=dict)
 async def upload_completions(
     file: UploadFile = File(...),
@@ -27,31 +56,16 @@ async def upload_completions(
     validate_file_extension(file.filename)
     safe_filename = sanitize_filename(file.filename)
     
-    # Read file content to check size
-    content = await file.read()
-    validate_file_size(len(content))
-    
-    # Reset file pointer
-    await file.seek(0)
-    
-    # Save uploaded file temporarily with safe path
+    # Stream uploaded file to a safe temporary path, checking size as it is copied
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     timestamped_filename = f"{timestamp}_{safe_filename}"
     file_path = get_safe_file_path(timestamped_filename)
-    
-    async with aiofiles.open(file_path, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
+    await save_upload_file(file, file_path)
     
     try:
-        # Parse file
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
-        
-        # Normalize column names
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+        # Parse file in chunks; the first chunk provides the (normalized) columns
+        chunks = ImportService.read_chunks(file_path)
+        df = next(chunks)
         
         # Get course
         from app.models.course import Course
@@ -66,88 +80,89 @@ async def upload_completions(
             "errors": []
         }
         
-        # Process each row
-        for idx, row in df.iterrows():
-            try:
-                # Extract data - match by employee_id or email
-                employee_id = str(row.get('employee_id', '')).strip() if pd.notna(row.get('employee_id')) else None
-                email = str(row.get('email', '')).strip() if pd.notna(row.get('email')) else None
-                
-                if not employee_id and not email:
-                    results["errors"].append({
-                        "row": idx + 2,
-                        "error": "Missing employee_id or email"
-                    })
-                    continue
-                
-                # Find student
-                student = None
-                if employee_id:
-                    student = db.query(Student).filter(Student.employee_id == employee_id).first()
-                if not student and email:
-                    student = db.query(Student).filter(Student.email == email).first()
-                
-                if not student:
-                    results["not_found"] += 1
-                    results["errors"].append({
-                        "row": idx + 2,
-                        "error": f"Student not found (employee_id: {employee_id}, email: {email})"
-                    })
-                    continue
-                
-                # Find enrollment for this student and course
-                enrollment = db.query(Enrollment).filter(
-                    Enrollment.student_id == student.id,
-                    Enrollment.course_id == course_id
-                ).first()
-                
-                if not enrollment:
+        enrollments_by_student = _load_course_enrollments(db, course_id)
+        
+        for rows in _iter_chunks(df, chunks):
+            # Resolve every student in the chunk with one query per identifier
+            identifiers = [(_cell(row, 'employee_id'), _cell(row, 'email')) for _, row in rows]
+            by_employee_id = _load_students(db, Student.employee_id, (employee_id for employee_id, _ in identifiers))
+            by_email = _load_students(db, Student.email, (email for _, email in identifiers))
+            
+            for (idx, row), (employee_id, email) in zip(rows, identifiers):
+                try:
+                    # Match by employee_id or email
+                    if not employee_id and not email:
+                        results["errors"].append({
+                            "row": idx + 2,
+                            "error": "Missing employee_id or email"
+                        })
+                        continue
+                    
+                    # Find student
+                    student = None
+                    if employee_id:
+                        student = by_employee_id.get(employee_id)
+                    if not student and email:
+                        student = by_email.get(email)
+                    
+                    if not student:
+                        results["not_found"] += 1
+                        results["errors"].append({
+                            "row": idx + 2,
+                            "error": f"Student not found (employee_id: {employee_id}, email: {email})"
+                        })
+                        continue
+                    
+                    # Find enrollment for this student and course
+                    enrollment = enrollments_by_student.get(student.id)
+                    
+                    if not enrollment:
+                        results["errors"].append({
+                            "row": idx + 2,
+                            "error": f"Enrollment not found for {student.name} in {course.name}"
+                        })
+                        continue
+                    
+                    # Extract score and assessment data
+                    score = None
+                    if pd.notna(row.get('score')):
+                        try:
+                            score = float(row.get('score'))
+                        except:
+                            pass
+                    
+                    attendance = None
+                    if pd.notna(row.get('attendance_percentage')):
+                        try:
+                            attendance = float(row.get('attendance_percentage'))
+                        except:
+                            pass
+                    
+                    status_str = str(row.get('completion_status', 'Completed')).strip() if pd.notna(row.get('completion_status')) else 'Completed'
+                    
+                    # Map status string to enum
+                    status_map = {
+                        'completed': CompletionStatus.COMPLETED,
+                        'failed': CompletionStatus.FAILED,
+                        'in_progress': CompletionStatus.IN_PROGRESS,
+                        'not_started': CompletionStatus.NOT_STARTED
+                    }
+                    completion_status = status_map.get(status_str.lower(), CompletionStatus.COMPLETED)
+                    
+                    # Update enrollment
+                    enrollment.score = score
+                    enrollment.attendance_percentage = attendance
+                    enrollment.completion_status = completion_status
+                    if completion_status == CompletionStatus.COMPLETED and not enrollment.completion_date:
+                        enrollment.completion_date = datetime.utcnow()
+                    
+                    results["processed"] += 1
+                    
+                except Exception as e:
                     results["errors"].append({
                         "row": idx + 2,
-                        "error": f"Enrollment not found for {student.name} in {course.name}"
+                        "error": "Error processing row"
                     })
-                    continue
-                
-                # Extract score and assessment data
-                score = None
-                if pd.notna(row.get('score')):
-                    try:
-                        score = float(row.get('score'))
-                    except:
-                        pass
-                
-                attendance = None
-                if pd.notna(row.get('attendance_percentage')):
-                    try:
-                        attendance = float(row.get('attendance_percentage'))
-                    except:
-                        pass
-                
-                status_str = str(row.get('completion_status', 'Completed')).strip() if pd.notna(row.get('completion_status')) else 'Completed'
-                
-                # Map status string to enum
-                status_map = {
-                    'completed': CompletionStatus.COMPLETED,
-                    'failed': CompletionStatus.FAILED,
-                    'in_progress': CompletionStatus.IN_PROGRESS,
-                    'not_started': CompletionStatus.NOT_STARTED
-                }
-                completion_status = status_map.get(status_str.lower(), CompletionStatus.COMPLETED)
-                
-                # Update enrollment
-                enrollment.score = score
-                enrollment.attendance_percentage = attendance
-                enrollment.completion_status = completion_status
-                if completion_status == CompletionStatus.COMPLETED and not enrollment.completion_date:
-                    enrollment.completion_date = datetime.utcnow()
-                
-                results["processed"] += 1
-                
-            except Exception as e:
-                results["errors"].append({
-                    "row": idx + 2,
-                    "error": "Error processing row"
-                })
         
         db.commit()
         
@@ -245,31 +260,16 @@ async def upload_attendance(
     validate_file_extension(file.filename)
     safe_filename = sanitize_filename(file.filename)
     
-    # Read file content to check size
-    content = await file.read()
-    validate_file_size(len(content))
-    
-    # Reset file pointer
-    await file.seek(0)
-    
-    # Save uploaded file temporarily with safe path
+    # Stream uploaded file to a safe temporary path, checking size as it is copied
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     timestamped_filename = f"{timestamp}_{safe_filename}"
     file_path = get_safe_file_path(timestamped_filename)
-    
-    async with aiofiles.open(file_path, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
+    await save_upload_file(file, file_path)
     
     try:
-        # Parse file
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
-        
-        # Normalize column names
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+        # Parse file in chunks; the first chunk provides the (normalized) columns
+        chunks = ImportService.read_chunks(file_path)
+        df = next(chunks)
         
         # Get course
         from app.models.course import Course
@@ -325,128 +325,135 @@ async def upload_attendance(
             "errors": []
         }
         
-        for idx, row in df.iterrows():
-            try:
-                # Find student by bsid/employee_id, email, or name (in that order of preference)
-                bsid = None
-                if 'bsid' in df.columns and pd.notna(row.get('bsid')):
-                    bsid = str(row.get('bsid', '')).strip()
-                elif 'employee_id' in df.columns and pd.notna(row.get('employee_id')):
-                    bsid = str(row.get('employee_id', '')).strip()
-                
-                email = str(row.get('email', '')).strip() if pd.notna(row.get('email')) else None
-                name = str(row.get('name', '')).strip() if pd.notna(row.get('name')) else None
-                
-                if not bsid and not email and not name:
-                    results["errors"].append({
-                        "row": idx + 2,  # +2 for header and 0-index
-                        "error": "Name, email, or bsid/employee_id is required"
-                    })
-                    continue
-                
-                # Find student (prefer bsid/employee_id, then email, then name)
-                student = None
-                if bsid:
-                    student = db.query(Student).filter(Student.employee_id == bsid).first()
-                if not student and email:
-                    student = db.query(Student).filter(Student.email == email).first()
-                if not student and name:
-                    student = db.query(Student).filter(Student.name == name).first()
-                
-                if not student:
-                    results["not_found"] += 1
-                    results["errors"].append({
-                        "row": idx + 2,
-                        "error": f"Student not found: {bsid or email or name}"
-                    })
-                    continue
-                
-                # Find enrollment for this student and course
-                enrollment = db.query(Enrollment).filter(
-                    Enrollment.student_id == student.id,
-                    Enrollment.course_id == course_id
-                ).first()
-                
-                if not enrollment:
-                    results["not_found"] += 1
-                    results["errors"].append({
-                        "row": idx + 2,
-                        "error": f"Enrollment not found for {student.name} in {course.name}"
-                    })
-                    continue
-                
-                # Get classes attended
-                classes_attended = None
-                if pd.notna(row.get(classes_attended_col)):
-                    try:
-                        classes_attended = int(float(row.get(classes_attended_col)))
-                    except (ValueError, TypeError):
+        enrollments_by_student = _load_course_enrollments(db, course_id)
+        
+        for rows in _iter_chunks(df, chunks):
+            # Identifiers per row: bsid (falling back to employee_id), email, name
+            identifiers = []
+            for _, row in rows:
+                bsid = _cell(row, 'bsid') if 'bsid' in df.columns else None
+                if bsid is None and 'employee_id' in df.columns:
+                    bsid = _cell(row, 'employee_id')
+                identifiers.append((bsid, _cell(row, 'email'), _cell(row, 'name')))
+            
+            # Resolve every student in the chunk with one query per identifier;
+            # names are only looked up for rows the other identifiers didn't match
+            by_employee_id = _load_students(db, Student.employee_id, (bsid for bsid, _, _ in identifiers))
+            by_email = _load_students(db, Student.email, (email for _, email, _ in identifiers))
+            by_name = _load_students(db, Student.name, (
+                name for bsid, email, name in identifiers
+                if not (bsid and bsid in by_employee_id) and not (email and email in by_email)
+            ))
+            
+            for (idx, row), (bsid, email, name) in zip(rows, identifiers):
+                try:
+                    if not bsid and not email and not name:
+                        results["errors"].append({
+                            "row": idx + 2,  # +2 for header and 0-index
+                            "error": "Name, email, or bsid/employee_id is required"
+                        })
+                        continue
+                    
+                    # Find student (prefer bsid/employee_id, then email, then name)
+                    student = None
+                    if bsid:
+                        student = by_employee_id.get(bsid)
+                    if not student and email:
+                        student = by_email.get(email)
+                    if not student and name:
+                        student = by_name.get(name)
+                    
+                    if not student:
+                        results["not_found"] += 1
                         results["errors"].append({
                             "row": idx + 2,
-                            "error": f"Invalid classes attended value for {student.name}"
+                            "error": f"Student not found: {bsid or email or name}"
                         })
                         continue
-                
-                if classes_attended is None:
-                    results["errors"].append({
-                        "row": idx + 2,
-                        "error": f"Missing classes attended value for {student.name}"
-                    })
-                    continue
-                
-                # Get score
-                score = None
-                if pd.notna(row.get('score')):
-                    try:
-                        score = float(row.get('score'))
-                    except (ValueError, TypeError):
+                    
+                    # Find enrollment for this student and course
+                    enrollment = enrollments_by_student.get(student.id)
+                    
+                    if not enrollment:
+                        results["not_found"] += 1
                         results["errors"].append({
                             "row": idx + 2,
-                            "error": f"Invalid score value for {student.name}"
+                            "error": f"Enrollment not found for {student.name} in {course.name}"
                         })
                         continue
-                
-                if score is None:
+                    
+                    # Get classes attended
+                    classes_attended = None
+                    if pd.notna(row.get(classes_attended_col)):
+                        try:
+                            classes_attended = int(float(row.get(classes_attended_col)))
+                        except (ValueError, TypeError):
+                            results["errors"].append({
+                                "row": idx + 2,
+                                "error": f"Invalid classes attended value for {student.name}"
+                            })
+                            continue
+                    
+                    if classes_attended is None:
+                        results["errors"].append({
+                            "row": idx + 2,
+                            "error": f"Missing classes attended value for {student.name}"
+                        })
+                        continue
+                    
+                    # Get score
+                    score = None
+                    if pd.notna(row.get('score')):
+                        try:
+                            score = float(row.get('score'))
+                        except (ValueError, TypeError):
+                            results["errors"].append({
+                                "row": idx + 2,
+                                "error": f"Invalid score value for {student.name}"
+                            })
+                            continue
+                    
+                    if score is None:
+                        results["errors"].append({
+                            "row": idx + 2,
+                            "error": f"Missing score value for {student.name}"
+                        })
+                        continue
+                    
+                    # Update attendance data using course.total_classes_offered
+                    enrollment.total_attendance = course.total_classes_offered
+                    enrollment.present = classes_attended
+                    enrollment.score = score
+                    
+                    # Calculate attendance percentage using course.total_classes_offered
+                    if course.total_classes_offered > 0:
+                        enrollment.attendance_percentage = (classes_attended / course.total_classes_offered) * 100
+                    
+                        # Determine completion status based on 80% attendance threshold
+                        # Always update completion status based on new attendance percentage
+                        # Pass if attendance >= 80%, Fail otherwise
+                        if enrollment.attendance_percentage >= 80.0:
+                            enrollment.attendance_status = "Pass"
+                            # Always update to COMPLETED if attendance >= 80%
+                            enrollment.completion_status = CompletionStatus.COMPLETED
+                            if not enrollment.completion_date:
+                                enrollment.completion_date = datetime.utcnow()
+                        else:
+                            enrollment.attendance_status = "Fail"
+                            # Always update to FAILED if attendance < 80%
+                            enrollment.completion_status = CompletionStatus.FAILED
+                    else:
+                        enrollment.attendance_percentage = None
+                        enrollment.attendance_status = None
+                    
+                    results["processed"] += 1
+                    results["updated"] += 1
+                    
+                except Exception as e:
                     results["errors"].append({
                         "row": idx + 2,
-                        "error": f"Missing score value for {student.name}"
+                        "error": "Error processing row"
                     })
-                    continue
-                
-                # Update attendance data using course.total_classes_offered
-                enrollment.total_attendance = course.total_classes_offered
-                enrollment.present = classes_attended
-                enrollment.score = score
-                
-                # Calculate attendance percentage using course.total_classes_offered
-                if course.total_classes_offered > 0:
-                    enrollment.attendance_percentage = (classes_attended / course.total_classes_offered) * 100
-                    
-                    # Determine completion status based on 80% attendance threshold
-                    # Always update completion status based on new attendance percentage
-                    # Pass if attendance >= 80%, Fail otherwise
-                    if enrollment.attendance_percentage >= 80.0:
-                        enrollment.attendance_status = "Pass"
-                        # Always update to COMPLETED if attendance >= 80%
-                        enrollment.completion_status = CompletionStatus.COMPLETED
-                        if not enrollment.completion_date:
-                            enrollment.completion_date = datetime.utcnow()
-                    else:
-                        enrollment.attendance_status = "Fail"
-                        # Always update to FAILED if attendance < 80%
-                        enrollment.completion_status = CompletionStatus.FAILED
-                else:
-                    enrollment.attendance_percentage = None
-                    enrollment.attendance_status = None
-                
-                results["processed"] += 1
-                results["updated"] += 1
-                
-            except Exception as e:
-                results["errors"].append({
-                    "row": idx + 2,
-                    "error": "Error processing row"
-                })
         
         db.commit()
         
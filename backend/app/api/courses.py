@@ -1,15 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, selectinload, joinedload
-from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-import pandas as pd
-import io
-from app.db.base import get_db
+import os
+from app.db.base import get_db, get_async_db
+from app.core.pagination import SortKey, paginate_async
+from app.core.metrics import REPORT_BUILD_DURATION
 from app.models.course import Course, CourseStatus
-from app.models.enrollment import Enrollment
 from app.models.course_mentor import CourseMentor
 from app.models.mentor import Mentor
 from app.models.course_comment import CourseComment
@@ -18,9 +19,13 @@ from app.schemas.course import CourseCreate, CourseResponse, CourseUpdate, Cours
 from app.schemas.course_mentor import CourseMentorCreate, CourseMentorResponse
 from app.schemas.course_comment import CourseCommentCreate, CourseCommentResponse
 from app.schemas.course_draft import CourseDraftCreate, CourseDraftUpdate, CourseDraftResponse
+from app.services.report_service import ReportService, COURSE_REPORT_COLUMNS
 
 router = APIRouter()
 
+# Courses are listed newest start date first
+COURSE_SORT = [SortKey(Course.start_date, descending=True), SortKey(Course.id, descending=True)]
+
 @router.post("/", response_model=CourseResponse, status_code=201)
 def create_course(course: CourseCreate, db: Session = Depends(get_db)):
     """Create a new course batch."""
@@ -70,83 +75,34 @@ def create_course(course: CourseCreate, db: Session = Depends(get_db)):
     return CourseResponse.from_orm(db_course)
 
 @router.get("/", response_model=List[CourseResponse])
-def get_courses(
+async def get_courses(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page (replaces skip)"),
+    include_total: bool = Query(False, description="Return the number of courses in X-Total-Count"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all courses. Automatically updates course status from ongoing to completed if end_date has passed."""
+    """
+    Get all courses.
+    
+    Read-only: ongoing courses are moved to completed once their end_date is
+    reached by a daily background job (CourseStatusService), not here.
+    """
     try:
-        # Auto-update course status: if end_date is reached (today or past) and status is ongoing, change to completed
-        today = date.today()
-        courses_to_update = db.query(Course).filter(
-            Course.status == CourseStatus.ONGOING,
-            Course.end_date.isnot(None),
-            Course.end_date <= today
-        ).all()
-        
-        for course in courses_to_update:
-            course.status = CourseStatus.COMPLETED
-            course.updated_at = datetime.utcnow()
-        
-        if courses_to_update:
-            db.commit()
-            print(f"Auto-updated {len(courses_to_update)} course(s) from ongoing to completed based on end_date")
-        
-        # Try to load courses with mentors relationship
-        # If that fails, fall back to loading mentors separately
-        from sqlalchemy.orm import selectinload, joinedload
-        
-        try:
-            query = db.query(Course).options(
-                selectinload(Course.mentors).joinedload(CourseMentor.mentor)
-            )
-            courses = query.order_by(Course.start_date.desc()).offset(skip).limit(limit).all()
-        except Exception as load_error:
-            # Fallback: load courses without eager loading
-            print(f"Warning: Failed to eager load mentors: {load_error}")
-            courses = db.query(Course).order_by(Course.start_date.desc()).offset(skip).limit(limit).all()
-        
-        # Load mentors, comments, and drafts separately if not already loaded
-        course_ids = [c.id for c in courses]
-        course_mentors_map = {}
-        course_comments_map = {}
-        course_drafts_map = {}
-        
-        if course_ids:
-            # Load mentors
-            course_mentors = db.query(CourseMentor).filter(
-                CourseMentor.course_id.in_(course_ids)
-            ).options(joinedload(CourseMentor.mentor)).all()
-            for cm in course_mentors:
-                if cm.course_id not in course_mentors_map:
-                    course_mentors_map[cm.course_id] = []
-                course_mentors_map[cm.course_id].append(cm)
-            
-            # Load comments
-            comments = db.query(CourseComment).filter(
-                CourseComment.course_id.in_(course_ids)
-            ).order_by(CourseComment.created_at.desc()).all()
-            for comment in comments:
-                if comment.course_id not in course_comments_map:
-                    course_comments_map[comment.course_id] = []
-                course_comments_map[comment.course_id].append(comment)
-            
-            # Load drafts
-            drafts = db.query(CourseDraft).filter(
-                CourseDraft.course_id.in_(course_ids)
-            ).all()
-            for draft in drafts:
-                course_drafts_map[draft.course_id] = draft
+        # Mentors, comments and drafts of the whole page are loaded with one query each
+        statement = select(Course).options(
+            selectinload(Course.mentors).joinedload(CourseMentor.mentor).joinedload(Mentor.student),
+            selectinload(Course.comments),
+            selectinload(Course.draft)
+        )
+        courses = await paginate_async(db, statement, COURSE_SORT, response, limit, skip=skip, cursor=cursor, include_total=include_total)
         
         # Build response with mentors properly loaded
         result = []
         for course in courses:
             try:
-                # Get mentors for this course
-                course_mentors_list = course_mentors_map.get(course.id, [])
-                if not course_mentors_list and hasattr(course, 'mentors') and course.mentors:
-                    course_mentors_list = course.mentors
+                course_mentors_list = course.mentors
                 
                 # Calculate total training cost for this course
                 total_mentor_cost = sum(float(cm.amount_paid) for cm in course_mentors_list) if course_mentors_list else 0.0
@@ -169,15 +125,6 @@ def get_courses(
                 food_cost_decimal = Decimal(str(course.food_cost)) if course.food_cost is not None else Decimal('0')
                 other_cost_decimal = Decimal(str(course.other_cost)) if course.other_cost is not None else Decimal('0')
                 
-                # Get comments and draft for this course
-                comments_list = course_comments_map.get(course.id, [])
-                if not comments_list and hasattr(course, 'comments') and course.comments:
-                    comments_list = course.comments
-                
-                draft_obj = course_drafts_map.get(course.id)
-                if not draft_obj and hasattr(course, 'draft') and course.draft:
-                    draft_obj = course.draft
-                
                 course_dict = {
                     'id': course.id,
                     'name': course.name,
@@ -196,8 +143,8 @@ def get_courses(
                     'class_schedule': course.class_schedule if hasattr(course, 'class_schedule') else None,
                     'total_training_cost': Decimal(str(total_training_cost)),
                     'mentors': mentors_list if mentors_list else None,
-                    'comments': [CourseCommentResponse.from_orm(c) for c in comments_list] if comments_list else None,
-                    'draft': CourseDraftResponse.from_orm(draft_obj) if draft_obj else None,
+                    'comments': [CourseCommentResponse.from_orm(c) for c in course.comments] if course.comments else None,
+                    'draft': CourseDraftResponse.from_orm(course.draft) if course.draft else None,
                     'created_at': course.created_at,
                     'updated_at': course.updated_at,
                 }
@@ -210,29 +157,27 @@ def get_courses(
                 continue
         
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error fetching courses: {str(e)}")
 
 @router.get("/{course_id}", response_model=CourseResponse)
-def get_course(course_id: int, db: Session = Depends(get_db)):
+async def get_course(course_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific course by ID with mentors, comments, draft, and total training cost."""
-    course = db.query(Course).options(
-        selectinload(Course.mentors).joinedload(CourseMentor.mentor),
+    course = await db.scalar(select(Course).options(
+        selectinload(Course.mentors).joinedload(CourseMentor.mentor).joinedload(Mentor.student),
         selectinload(Course.comments),
         selectinload(Course.draft)
-    ).filter(Course.id == course_id).first()
+    ).where(Course.id == course_id))
     
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    # Get mentor assignments (use loaded relationship or query)
-    course_mentors = course.mentors if course.mentors else []
-    if not course_mentors:
-        course_mentors = db.query(CourseMentor).filter(
-            CourseMentor.course_id == course_id
-        ).options(joinedload(CourseMentor.mentor)).all()
+    # Mentor assignments (loaded with the course)
+    course_mentors = course.mentors
     
     # Calculate total mentor costs
     total_mentor_cost = sum(float(cm.amount_paid) for cm in course_mentors) if course_mentors else 0.0
@@ -415,112 +360,18 @@ def remove_course_mentor(
 @router.get("/{course_id}/report")
 def generate_course_report(course_id: int, db: Session = Depends(get_db)):
     """Generate an Excel report for a course with enrolled students data (Approved and Withdrawn only, excluding Rejected)."""
-    from app.models.student import Student
-    from app.models.enrollment import CompletionStatus, ApprovalStatus
-    
     # Get course
     course = db.query(Course).filter(Course.id == course_id).first()
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    # Get only approved and withdrawn enrollments (exclude rejected and pending)
-    enrollments = db.query(Enrollment).filter(
-        Enrollment.course_id == course_id,
-        Enrollment.approval_status.in_([ApprovalStatus.APPROVED, ApprovalStatus.WITHDRAWN])
-    ).all()
-    
-    # Prepare data for Excel
-    report_data = []
-    for enrollment in enrollments:
-        student = db.query(Student).filter(Student.id == enrollment.student_id).first()
-        if not student:
-            continue
-        
-        # Calculate attendance percentage
-        attendance_percentage = None
-        attendance_display = '-'
-        if enrollment.total_attendance and enrollment.total_attendance > 0:
-            if enrollment.present is not None:
-                attendance_percentage = (enrollment.present / enrollment.total_attendance * 100)
-                attendance_display = f"{attendance_percentage:.1f}%"
-        elif enrollment.attendance_percentage is not None:
-            # Use stored attendance_percentage if available
-            attendance_percentage = enrollment.attendance_percentage
-            attendance_display = f"{attendance_percentage:.1f}%"
-        elif enrollment.attendance_status:
-            attendance_display = enrollment.attendance_status
-        
-        # Calculate overall completion rate for this student
-        all_student_enrollments = db.query(Enrollment).filter(
-            Enrollment.student_id == enrollment.student_id,
-            Enrollment.approval_status.in_([ApprovalStatus.APPROVED, ApprovalStatus.WITHDRAWN])
-        ).all()
+    with REPORT_BUILD_DURATION.labels(report="course").time():
+        # Approved and withdrawn enrollments with student data and completion counts (one query)
+        rows = ReportService.course_report_rows(db, course_id)
         
-        # Count relevant enrollments (completed, failed, or withdrawn)
-        relevant_enrollments = [
-            e for e in all_student_enrollments
-            if (
-                (e.approval_status == ApprovalStatus.WITHDRAWN) or
-                (e.approval_status == ApprovalStatus.APPROVED and 
-                 e.completion_status in [CompletionStatus.COMPLETED, CompletionStatus.FAILED])
-            )
-        ]
-        
-        total_courses = len(relevant_enrollments)
-        completed_courses = sum(1 for e in relevant_enrollments if e.completion_status == CompletionStatus.COMPLETED)
-        overall_completion_rate = (completed_courses / total_courses * 100) if total_courses > 0 else 0.0
-        
-        report_data.append({
-            'Employee ID': student.employee_id,
-            'Name': student.name,
-            'Email': student.email,
-            'SBU': student.sbu.value if student.sbu else '',
-            'Designation': student.designation or '',
-            'Approval Status': enrollment.approval_status.value if enrollment.approval_status else '',
-            'Completion Status': enrollment.completion_status.value if enrollment.completion_status else '',
-            'Total Classes': enrollment.total_attendance or 0,
-            'Classes Attended': enrollment.present or 0,
-            'Attendance': attendance_display,
-            'Score': enrollment.score if enrollment.score is not None else '-',
-            'Total Courses Assigned': total_courses,
-            'Completed Courses': completed_courses,
-            'Overall Completion Rate': f"{overall_completion_rate:.1f}%",
-            'Enrollment Date': enrollment.created_at.strftime('%Y-%m-%d %H:%M:%S') if enrollment.created_at else '',
-            'Approval Date': enrollment.approved_at.strftime('%Y-%m-%d %H:%M:%S') if enrollment.approved_at and enrollment.approval_status == ApprovalStatus.APPROVED else '',
-            'Withdrawal Date': enrollment.updated_at.strftime('%Y-%m-%d %H:%M:%S') if enrollment.approval_status == ApprovalStatus.WITHDRAWN and enrollment.updated_at else '',
-            'Withdrawal Reason': enrollment.rejection_reason if enrollment.approval_status == ApprovalStatus.WITHDRAWN else '',
-        })
-    
-    # Create DataFrame
-    df = pd.DataFrame(report_data)
-    
-    # If no enrollments, create empty DataFrame with columns
-    if df.empty:
-        df = pd.DataFrame(columns=[
-            'Employee ID', 'Name', 'Email', 'SBU', 'Designation',
-            'Approval Status', 'Completion Status', 'Total Classes', 'Classes Attended',
-            'Attendance', 'Score', 'Total Courses Assigned', 'Completed Courses',
-            'Overall Completion Rate', 'Enrollment Date', 'Approval Date',
-            'Withdrawal Date', 'Withdrawal Reason'
-        ])
-    
-    # Create Excel file in memory
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Enrollments', index=False)
-        
-        # Auto-adjust column widths
-        worksheet = writer.sheets['Enrollments']
-        from openpyxl.utils import get_column_letter
-        for idx, col in enumerate(df.columns):
-            max_length = max(
-                df[col].astype(str).map(len).max() if not df.empty else 0,
-                len(str(col))
-            )
-            column_letter = get_column_letter(idx + 1)
-            worksheet.column_dimensions[column_letter].width = min(max_length + 2, 50)
-    
-    output.seek(0)
+        # Rows for one course fit in memory, so columns can be sized before the write-only sheet is filled
+        widths = ReportService.column_widths(COURSE_REPORT_COLUMNS, rows)
+        path = ReportService.write_xlsx(rows, COURSE_REPORT_COLUMNS, 'Enrollments', widths)
     
     # Generate filename
     safe_course_name = "".join(c for c in course.name if c.isalnum() or c in (' ', '-', '_')).strip()
@@ -528,9 +379,12 @@ def generate_course_report(course_id: int, db: Session = Depends(get_db)):
     filename = f"{safe_course_name}_{safe_batch_code}_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
     
     return StreamingResponse(
-        io.BytesIO(output.read()),
+        ReportService.iter_file_chunks(path),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(os.path.getsize(path))
+        }
     )
 
 # ========== COMMENT ENDPOINTS ==========
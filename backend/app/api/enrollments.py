@@ -1,19 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-from app.db.base import get_db
-from app.models.enrollment import Enrollment, ApprovalStatus, CompletionStatus, EligibilityStatus
+from app.db.base import get_db, get_async_db
+from app.core.pagination import SortKey, paginate_async
+from app.models.enrollment import Enrollment, ApprovalStatus, EligibilityStatus
 from app.models.course import Course
-from app.models.student import Student
 from app.schemas.enrollment import EnrollmentResponse, EnrollmentApproval, EnrollmentBulkApproval, EnrollmentCreate
 from app.services.eligibility_service import EligibilityService
+from app.services.completion_rate_service import CompletionRateService
+from app.services.dashboard_service import DashboardService
+from app.services.enrollment_approval_service import EnrollmentApprovalService
 
 router = APIRouter()
 
+# Enrollments are listed in creation (id) order
+ENROLLMENT_SORT = [SortKey(Enrollment.id)]
+
 @router.get("/", response_model=List[EnrollmentResponse])
-def get_enrollments(
+async def get_enrollments(
+    response: Response,
     course_id: Optional[int] = Query(None),
     student_id: Optional[int] = Query(None),
     eligibility_status: Optional[str] = Query(None),
@@ -21,27 +29,29 @@ def get_enrollments(
     sbu: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page (replaces skip)"),
+    include_total: bool = Query(False, description="Return the number of matching enrollments in X-Total-Count"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get enrollments with optional filters."""
-    query = db.query(Enrollment)
+    """Get enrollments with optional filters, paginated by skip/limit or by cursor."""
+    statement = select(Enrollment)
     
     if course_id:
-        query = query.filter(Enrollment.course_id == course_id)
+        statement = statement.where(Enrollment.course_id == course_id)
     if student_id:
-        query = query.filter(Enrollment.student_id == student_id)
+        statement = statement.where(Enrollment.student_id == student_id)
     if eligibility_status:
         # Validate eligibility_status against enum values
         try:
             EligibilityStatus(eligibility_status)
-            query = query.filter(Enrollment.eligibility_status == eligibility_status)
+            statement = statement.where(Enrollment.eligibility_status == eligibility_status)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid eligibility_status value")
     if approval_status:
         # Validate approval_status against enum values
         try:
             ApprovalStatus(approval_status)
-            query = query.filter(Enrollment.approval_status == approval_status)
+            statement = statement.where(Enrollment.approval_status == approval_status)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid approval_status value")
     if sbu:
@@ -49,14 +59,21 @@ def get_enrollments(
         from app.core.validation import validate_sbu
         try:
             validated_sbu = validate_sbu(sbu)
-            query = query.join(Student).filter(Student.sbu == validated_sbu)
+            statement = statement.join(Student).where(Student.sbu == validated_sbu)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
     
-    enrollments = query.offset(skip).limit(limit).all()
+    enrollments = await paginate_async(
+        db, statement.options(joinedload(Enrollment.student), joinedload(Enrollment.course)),
+        ENROLLMENT_SORT, response, limit, skip=skip, cursor=cursor, include_total=include_total
+    )
     
-    # Enrich with related data and calculate overall completion rate
-    from app.models.enrollment import CompletionStatus
+    # Overall completion rate for every student on the page (one GROUP BY query)
+    completion_stats = await db.run_sync(
+        CompletionRateService.get_stats_for_students, {e.student_id for e in enrollments}
+    )
+    
+    # Enrich with related data and overall completion rate
     result = []
     for enrollment in enrollments:
         enrollment_dict = EnrollmentResponse.from_orm(enrollment).dict()
@@ -69,45 +86,7 @@ def get_enrollments(
         enrollment_dict['course_name'] = enrollment.course_name or (enrollment.course.name if enrollment.course else None)
         enrollment_dict['batch_code'] = enrollment.batch_code or (enrollment.course.batch_code if enrollment.course else None)
         enrollment_dict['course_description'] = enrollment.course.description if enrollment.course else None
-        
-        # Calculate overall completion rate for this student across all courses
-        # Only count courses that have a final outcome (completed, failed, or withdrawn)
-        # Exclude: pending approvals, not started, in progress, and rejected (admin's decision)
-        all_student_enrollments = db.query(Enrollment).filter(
-            Enrollment.student_id == enrollment.student_id
-        ).all()
-        
-        # Filter enrollments to only include those that count toward completion rate:
-        # - COMPLETED or FAILED courses (completion_status) that are APPROVED
-        # - WITHDRAWN courses (approval_status) - these should be included as they have a reason
-        # Exclude: PENDING approvals, NOT_STARTED, IN_PROGRESS, REJECTED
-        relevant_enrollments = [
-            e for e in all_student_enrollments
-            if (
-                # Include withdrawn courses (they have a reason attached, count as not completed)
-                (e.approval_status == ApprovalStatus.WITHDRAWN)
-                # OR include completed/failed courses that are approved (not pending/rejected)
-                or (
-                    e.approval_status == ApprovalStatus.APPROVED
-                    and e.completion_status in [CompletionStatus.COMPLETED, CompletionStatus.FAILED]
-                )
-            )
-            # Exclude rejected enrollments (admin's decision, not student's fault)
-            and e.approval_status != ApprovalStatus.REJECTED
-        ]
-        
-        total_courses = len(relevant_enrollments)
-        # Only COMPLETED courses count as completed (withdrawn and failed count as not completed)
-        completed_courses = sum(1 for e in relevant_enrollments if e.completion_status == CompletionStatus.COMPLETED)
-        
-        if total_courses > 0:
-            overall_completion_rate = (completed_courses / total_courses) * 100
-        else:
-            overall_completion_rate = 0.0
-        
-        enrollment_dict['overall_completion_rate'] = round(overall_completion_rate, 1)
-        enrollment_dict['total_courses_assigned'] = total_courses
-        enrollment_dict['completed_courses'] = completed_courses
+        enrollment_dict.update(completion_stats[enrollment.student_id])
         
         # Create response with all fields
         result.append(EnrollmentResponse(**enrollment_dict))
@@ -121,7 +100,10 @@ def get_eligible_enrollments(
     db: Session = Depends(get_db)
 ):
     """Get eligible enrollments pending approval."""
-    query = db.query(Enrollment).filter(
+    query = db.query(Enrollment).options(
+        joinedload(Enrollment.student),
+        joinedload(Enrollment.course)
+    ).filter(
         Enrollment.eligibility_status == "Eligible",
         Enrollment.approval_status == ApprovalStatus.PENDING
     )
@@ -157,24 +139,28 @@ def approve_enrollment(
     db: Session = Depends(get_db)
 ):
     """Approve or reject a single enrollment."""
-    enrollment = db.query(Enrollment).filter(Enrollment.id == approval.enrollment_id).first()
+    # Lock the enrollment so concurrent approvals see each other's status change
+    # (enrollment before course, the same order as bulk approval)
+    enrollment = db.query(Enrollment).filter(
+        Enrollment.id == approval.enrollment_id
+    ).with_for_update().populate_existing().first()
     if not enrollment:
         raise HTTPException(status_code=404, detail="Enrollment not found")
     
     if approval.approved:
         # Allow approving even if ineligible (admin can override eligibility checks)
-        # Check seat availability
-        course = db.query(Course).filter(Course.id == enrollment.course_id).first()
-        if course.current_enrolled >= course.seat_limit:
-            raise HTTPException(status_code=400, detail="No available seats")
+        if enrollment.approval_status != ApprovalStatus.APPROVED:
+            # Check seat availability and take the seat under the course row lock
+            if not EnrollmentApprovalService.reserve_seat(db, enrollment.course_id):
+                raise HTTPException(status_code=400, detail="No available seats")
         
         enrollment.approval_status = ApprovalStatus.APPROVED
         enrollment.approved_by = approved_by
         enrollment.approved_at = datetime.utcnow()
-        
-        # Update seat count
-        course.current_enrolled += 1
     else:
+        # Rejecting an approved enrollment gives its seat back
+        if enrollment.approval_status == ApprovalStatus.APPROVED:
+            EnrollmentApprovalService.release_seat(db, enrollment.course_id)
         enrollment.approval_status = ApprovalStatus.REJECTED
         enrollment.rejection_reason = approval.rejection_reason
     
@@ -200,48 +186,16 @@ def bulk_approve_enrollments(
     approved_by: str = Query(..., description="Admin name"),
     db: Session = Depends(get_db)
 ):
-    """Bulk approve multiple enrollments."""
-    enrollments = db.query(Enrollment).filter(
-        Enrollment.id.in_(bulk_approval.enrollment_ids)
-    ).all()
-    
-    if len(enrollments) != len(bulk_approval.enrollment_ids):
-        raise HTTPException(status_code=404, detail="Some enrollments not found")
-    
-    results = {"approved": 0, "rejected": 0, "errors": []}
-    
-    for enrollment in enrollments:
-        try:
-            if enrollment.eligibility_status != "Eligible":
-                results["errors"].append({
-                    "enrollment_id": enrollment.id,
-                    "error": f"Not eligible: {enrollment.eligibility_status}"
-                })
-                continue
-            
-            if bulk_approval.approved:
-                course = db.query(Course).filter(Course.id == enrollment.course_id).first()
-                if course.current_enrolled >= course.seat_limit:
-                    results["errors"].append({
-                        "enrollment_id": enrollment.id,
-                        "error": "No available seats"
-                    })
-                    continue
-                
-                enrollment.approval_status = ApprovalStatus.APPROVED
-                enrollment.approved_by = approved_by
-                enrollment.approved_at = datetime.utcnow()
-                course.current_enrolled += 1
-                results["approved"] += 1
-            else:
-                enrollment.approval_status = ApprovalStatus.REJECTED
-                results["rejected"] += 1
-        except Exception as e:
-            results["errors"].append({
-                "enrollment_id": enrollment.id,
-                "error": str(e)
-            })
-    
+    """
+    Bulk approve or reject multiple enrollments.
+    
+    Seats are granted in the order the enrollments are listed, while each
+    course has seats left. The response includes the outcome of every
+    enrollment under "results".
+    """
+    results = EnrollmentApprovalService.bulk_approve(
+        db, bulk_approval.enrollment_ids, bulk_approval.approved, approved_by
+    )
     db.commit()
     return results
 
@@ -253,7 +207,10 @@ def withdraw_enrollment(
     db: Session = Depends(get_db)
 ):
     """Withdraw a student from a course (e.g., for misbehavior)."""
-    enrollment = db.query(Enrollment).filter(Enrollment.id == enrollment_id).first()
+    # Lock the enrollment so a concurrent withdrawal cannot free its seat twice
+    enrollment = db.query(Enrollment).filter(
+        Enrollment.id == enrollment_id
+    ).with_for_update().populate_existing().first()
     if not enrollment:
         raise HTTPException(status_code=404, detail="Enrollment not found")
     
@@ -275,9 +232,7 @@ def withdraw_enrollment(
     enrollment.approved_at = datetime.utcnow()
     
     # Free up the seat
-    course = db.query(Course).filter(Course.id == enrollment.course_id).first()
-    if course.current_enrolled > 0:
-        course.current_enrolled -= 1
+    EnrollmentApprovalService.release_seat(db, enrollment.course_id)
     
     db.commit()
     db.refresh(enrollment)
@@ -302,7 +257,10 @@ def reapprove_enrollment(
     db: Session = Depends(get_db)
 ):
     """Reapprove a previously withdrawn enrollment."""
-    enrollment = db.query(Enrollment).filter(Enrollment.id == enrollment_id).first()
+    # Lock the enrollment so a concurrent reapproval cannot take a second seat
+    enrollment = db.query(Enrollment).filter(
+        Enrollment.id == enrollment_id
+    ).with_for_update().populate_existing().first()
     if not enrollment:
         raise HTTPException(status_code=404, detail="Enrollment not found")
     
@@ -316,9 +274,8 @@ def reapprove_enrollment(
     # Allow reapproving even if ineligible (admin can override eligibility checks)
     # The eligibility_reason will still show why they're ineligible
     
-    # Check seat availability
-    course = db.query(Course).filter(Course.id == enrollment.course_id).first()
-    if course.current_enrolled >= course.seat_limit:
+    # Check seat availability and take the seat under the course row lock
+    if not EnrollmentApprovalService.reserve_seat(db, enrollment.course_id):
         raise HTTPException(status_code=400, detail="No available seats")
     
     # Reapprove enrollment
@@ -327,9 +284,6 @@ def reapprove_enrollment(
     enrollment.approved_at = datetime.utcnow()
     enrollment.rejection_reason = None  # Clear withdrawal reason
     
-    # Update seat count
-    course.current_enrolled += 1
-    
     db.commit()
     db.refresh(enrollment)
     
@@ -381,8 +335,8 @@ def create_enrollment(
     # For manual enrollment, auto-approve if eligible and seats available
     # If ineligible, set to PENDING so admin can still manually approve if needed
     if eligibility_status == EligibilityStatus.ELIGIBLE:
-        # Check seat availability before auto-approving
-        if course.current_enrolled >= course.seat_limit:
+        # Check seat availability before auto-approving (takes the seat if there is one)
+        if not EnrollmentApprovalService.reserve_seat(db, course.id):
             # No seats available, set to PENDING
             approval_status = ApprovalStatus.PENDING
             approved_by = None
@@ -392,9 +346,6 @@ def create_enrollment(
             approval_status = ApprovalStatus.APPROVED
             approved_by = "Admin (Manual Enrollment)"
             approved_at = datetime.utcnow()
-            
-            # Update seat count
-            course.current_enrolled += 1
     else:
         # Not eligible, set to PENDING so admin can manually approve if needed
         # The eligibility_reason will show why they're ineligible
@@ -434,61 +385,9 @@ def create_enrollment(
     return EnrollmentResponse(**enrollment_dict)
 
 @router.get("/dashboard/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
+async def get_dashboard_stats(db: AsyncSession = Depends(get_async_db)):
     """Get dashboard statistics including counts for employees, courses, and enrollments."""
-    # Count active and previous employees
-    active_employees_count = db.query(Student).filter(Student.is_active == True).count()
-    previous_employees_count = db.query(Student).filter(Student.is_active == False).count()
-    
-    # Count active and archived courses
-    active_courses_count = db.query(Course).filter(Course.is_archived == False).count()
-    archived_courses_count = db.query(Course).filter(Course.is_archived == True).count()
-    
-    # Count total enrollments
-    total_enrollments_count = db.query(Enrollment).count()
-    
-    # Count enrollments by approval status
-    approved_enrollments_count = db.query(Enrollment).filter(
-        Enrollment.approval_status == ApprovalStatus.APPROVED
-    ).count()
-    
-    pending_enrollments_count = db.query(Enrollment).filter(
-        Enrollment.approval_status == ApprovalStatus.PENDING
-    ).count()
-    
-    withdrawn_enrollments_count = db.query(Enrollment).filter(
-        Enrollment.approval_status == ApprovalStatus.WITHDRAWN
-    ).count()
-    
-    # Count completed enrollments (approved and completed)
-    completed_enrollments_count = db.query(Enrollment).filter(
-        Enrollment.approval_status == ApprovalStatus.APPROVED,
-        Enrollment.completion_status == CompletionStatus.COMPLETED
-    ).count()
-    
-    # Count not eligible enrollments (ineligible and not approved/withdrawn)
-    not_eligible_enrollments_count = db.query(Enrollment).filter(
-        Enrollment.eligibility_status.in_([
-            EligibilityStatus.INELIGIBLE_PREREQUISITE,
-            EligibilityStatus.INELIGIBLE_DUPLICATE,
-            EligibilityStatus.INELIGIBLE_ANNUAL_LIMIT
-        ]),
-        Enrollment.approval_status != ApprovalStatus.APPROVED,
-        Enrollment.approval_status != ApprovalStatus.WITHDRAWN
-    ).count()
-    
-    return {
-        "active_employees": active_employees_count,
-        "previous_employees": previous_employees_count,
-        "active_courses": active_courses_count,
-        "archived_courses": archived_courses_count,
-        "total_enrollments": total_enrollments_count,
-        "approved_enrollments": approved_enrollments_count,
-        "pending_enrollments": pending_enrollments_count,
-        "withdrawn_enrollments": withdrawn_enrollments_count,
-        "completed_enrollments": completed_enrollments_count,
-        "not_eligible_enrollments": not_eligible_enrollments_count,
-    }
+    return await db.run_sync(DashboardService.get_stats)
 
 @router.get("/{enrollment_id}", response_model=EnrollmentResponse)
 def get_enrollment(enrollment_id: int, db: Session = Depends(get_db)):
@@ -1,111 +1,79 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from sqlalchemy.orm import Session
 from typing import Optional
-import os
-import aiofiles
 from datetime import datetime
 from app.db.base import get_db
 from app.core.config import settings
-from app.services.import_service import ImportService
-from app.core.file_utils import sanitize_filename, validate_file_extension, validate_file_size, get_safe_file_path
+from app.services.import_job_service import ImportJobService, ENROLLMENT_IMPORT
+from app.core.file_utils import sanitize_filename, validate_file_extension, get_safe_file_path, save_upload_file
 
 router = APIRouter()
 
-@router.post("/excel")
+def _require_course(db: Session, course_id: int):
+    """Reject the upload before saving it if the course does not exist."""
+    from app.models.course import Course
+    if not db.query(Course.id).filter(Course.id == course_id).first():
+        raise HTTPException(status_code=404, detail=f"Course with ID {course_id} not found")
+
+@router.post("/excel", status_code=202)
 async def upload_excel(
     file: UploadFile = File(...),
     course_id: int = Query(..., description="ID of the course to enroll students in"),
     db: Session = Depends(get_db)
 ):
-    """Upload and process Excel file with enrollment data."""
+    """Upload an Excel file with enrollment data; it is processed by a background import job."""
     # Validate and sanitize filename
     if not file.filename:
         raise HTTPException(status_code=400, detail="Filename is required")
     
+    _require_course(db, course_id)
+    
     validate_file_extension(file.filename)
     safe_filename = sanitize_filename(file.filename)
     
-    # Read file content to check size
-    content = await file.read()
-    validate_file_size(len(content))
-    
-    # Reset file pointer
-    await file.seek(0)
-    
-    # Save uploaded file temporarily with safe path
+    # Stream uploaded file to a safe temporary path, checking size as it is copied
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     timestamped_filename = f"{timestamp}_{safe_filename}"
     file_path = get_safe_file_path(timestamped_filename)
+    await save_upload_file(file, file_path)
     
-    async with aiofiles.open(file_path, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
+    job = ImportJobService.submit(ENROLLMENT_IMPORT, file_path, safe_filename, course_id=course_id)
     
-    try:
-        # Parse and process
-        records = ImportService.parse_excel(file_path)
-        results = ImportService.process_incoming_enrollments(db, records, course_id)
-        
-        return {
-            "message": "File processed successfully",
-            "results": results
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        # Don't expose internal error details
-        raise HTTPException(status_code=400, detail="Error processing file. Please check the file format and try again.")
-    finally:
-        # Clean up local file
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    return {
+        "message": "File accepted for processing",
+        "job_id": job["job_id"],
+        "status": job["status"]
+    }
 
-@router.post("/csv")
+@router.post("/csv", status_code=202)
 async def upload_csv(
     file: UploadFile = File(...),
     course_id: int = Query(..., description="ID of the course to enroll students in"),
     db: Session = Depends(get_db)
 ):
-    """Upload and process CSV file with enrollment data."""
+    """Upload a CSV file with enrollment data; it is processed by a background import job."""
     # Validate and sanitize filename
     if not file.filename:
         raise HTTPException(status_code=400, detail="Filename is required")
     
+    _require_course(db, course_id)
+    
     validate_file_extension(file.filename)
     safe_filename = sanitize_filename(file.filename)
     
-    # Read file content to check size
-    content = await file.read()
-    validate_file_size(len(content))
-    
-    # Reset file pointer
-    await file.seek(0)
-    
-    # Save uploaded file temporarily with safe path
+    # Stream uploaded file to a safe temporary path, checking size as it is copied
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     timestamped_filename = f"{timestamp}_{safe_filename}"
     file_path = get_safe_file_path(timestamped_filename)
+    await save_upload_file(file, file_path)
     
-    async with aiofiles.open(file_path, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
+    job = ImportJobService.submit(ENROLLMENT_IMPORT, file_path, safe_filename, course_id=course_id)
     
-    try:
-        records = ImportService.parse_csv(file_path)
-        results = ImportService.process_incoming_enrollments(db, records, course_id)
-        
-        return {
-            "message": "File processed successfully",
-            "results": results
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        # Don't expose internal error details
-        raise HTTPException(status_code=400, detail="Error processing file. Please check the file format and try again.")
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    return {
+        "message": "File accepted for processing",
+        "job_id": job["job_id"],
+        "status": job["status"]
+    }
 
 @router.get("/sync-status")
 async def get_sync_status(db: Session = Depends(get_db)):
@@ -120,6 +88,15 @@ async def get_sync_status(db: Session = Depends(get_db)):
     
     return {
         "last_synced": last_sync.isoformat() if last_sync else None,
-        "pending_processing": total_pending
+        "pending_processing": total_pending,
+        "active_jobs": ImportJobService.list_active_jobs()
     }
 
+@router.get("/jobs/{job_id}")
+async def get_import_job(job_id: str):
+    """Get progress and, once finished, the results of a background import job."""
+    job = ImportJobService.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
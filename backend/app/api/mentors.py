@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from decimal import Decimal
-from app.db.base import get_db
+from app.db.base import get_db, get_async_db
 from app.models.mentor import Mentor
 from app.models.course_mentor import CourseMentor
 from app.models.student import Student
@@ -15,28 +16,32 @@ from app.schemas.course_mentor import CourseMentorCreate
 router = APIRouter()
 
 @router.get("/", response_model=List[MentorResponse])
-def get_mentors(
+async def get_mentors(
     type: Optional[str] = Query("all", description="Filter by type: all, internal, external"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all mentors with optional type filter."""
-    query = db.query(Mentor).options(joinedload(Mentor.student))
+    # Course counts for all mentors in one grouped query
+    course_counts = select(
+        CourseMentor.mentor_id.label('mentor_id'),
+        func.count(CourseMentor.id).label('course_count')
+    ).group_by(CourseMentor.mentor_id).subquery()
+    
+    statement = select(Mentor, func.coalesce(course_counts.c.course_count, 0)).outerjoin(
+        course_counts, course_counts.c.mentor_id == Mentor.id
+    ).options(joinedload(Mentor.student))
     
     if type == "internal":
-        query = query.filter(Mentor.is_internal == True)
+        statement = statement.where(Mentor.is_internal == True)
     elif type == "external":
-        query = query.filter(Mentor.is_internal == False)
+        statement = statement.where(Mentor.is_internal == False)
     # else "all" - no filter
     
-    mentors = query.order_by(Mentor.name.asc()).all()
+    mentors = (await db.execute(statement.order_by(Mentor.name.asc()))).all()
     
     # Build response with course count
     result = []
-    for mentor in mentors:
-        course_count = db.query(func.count(CourseMentor.id)).filter(
-            CourseMentor.mentor_id == mentor.id
-        ).scalar() or 0
-        
+    for mentor, course_count in mentors:
         # Create response object and add course_count
         mentor_dict = MentorResponse.model_validate(mentor).model_dump()
         mentor_dict['course_count'] = course_count
@@ -137,39 +142,34 @@ def get_mentor_stats(mentor_id: int, db: Session = Depends(get_db)):
     if not mentor:
         raise HTTPException(status_code=404, detail="Mentor not found")
     
-    # Get all course assignments for this mentor
-    course_assignments = db.query(CourseMentor).filter(
+    # All course assignments for this mentor with their course and enrollment
+    # counts in one grouped query: participants are approved enrollments,
+    # completed counts the approved ones that are also completed
+    participants_count = func.count(Enrollment.id)
+    completed_count = func.count(case((Enrollment.completion_status == CompletionStatus.COMPLETED, Enrollment.id)))
+    course_assignments = db.query(
+        CourseMentor, Course, participants_count, completed_count
+    ).outerjoin(
+        Course, Course.id == CourseMentor.course_id
+    ).outerjoin(
+        Enrollment, and_(
+            Enrollment.course_id == CourseMentor.course_id,
+            Enrollment.approval_status == ApprovalStatus.APPROVED
+        )
+    ).filter(
         CourseMentor.mentor_id == mentor_id
-    ).all()
+    ).group_by(CourseMentor.id, Course.id).order_by(CourseMentor.id).all()
     
     total_courses = len(course_assignments)
-    total_hours = sum(float(cm.hours_taught) for cm in course_assignments)
-    total_amount = sum(float(cm.amount_paid) for cm in course_assignments)
+    total_hours = sum(float(cm.hours_taught) for cm, _, _, _ in course_assignments)
+    total_amount = sum(float(cm.amount_paid) for cm, _, _, _ in course_assignments)
     
     # Per-course statistics
     course_stats = []
-    for cm in course_assignments:
-        course = db.query(Course).filter(Course.id == cm.course_id).first()
+    for cm, course, participants, completed in course_assignments:
         if not course:
             continue
         
-        # Count participants (approved enrollments)
-        participants = db.query(Enrollment).filter(
-            and_(
-                Enrollment.course_id == cm.course_id,
-                Enrollment.approval_status == ApprovalStatus.APPROVED
-            )
-        ).count()
-        
-        # Count completed enrollments
-        completed = db.query(Enrollment).filter(
-            and_(
-                Enrollment.course_id == cm.course_id,
-                Enrollment.approval_status == ApprovalStatus.APPROVED,
-                Enrollment.completion_status == CompletionStatus.COMPLETED
-            )
-        ).count()
-        
         completion_ratio = completed / participants if participants > 0 else 0.0
         
         course_stats.append({
@@ -2,10 +2,16 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from app.core.cache import ExpiringLRUCache
 from app.core.config import settings
 
 security = HTTPBearer()
 
+# Payloads of tokens whose signature was already verified, keyed by token
+# digest and kept until the token's own expiry
+_verified_tokens = ExpiringLRUCache(max_entries=settings.TOKEN_CACHE_SIZE)
+
 def verify_admin_credentials(email: str, password: str) -> bool:
     """Verify admin credentials from environment variables.
     Uses constant-time comparison to prevent timing attacks."""
@@ -31,11 +37,30 @@ def create_access_token(email: str) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def decode_token(token: str) -> dict:
+    """
+    Decode and verify a JWT, reusing the result for tokens seen before.
+    Raises JWTError for invalid or expired tokens.
+    """
+    key = sha256(token.encode('utf-8')).digest()
+    payload = _verified_tokens.get(key)
+    if payload is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        # Tokens without an expiry are not cached
+        if isinstance(payload.get("exp"), (int, float)):
+            _verified_tokens.set(key, payload, payload["exp"])
+    # Callers get their own copy of the shared cached payload
+    return dict(payload)
+
+def clear_token_cache():
+    """Forget all verified tokens (e.g. after rotating SECRET_KEY)."""
+    _verified_tokens.clear()
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Verify JWT token and return payload."""
     token = credentials.credentials
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         role: str = payload.get("role")
         
@@ -62,7 +87,12 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    """Dependency to get current admin from token."""
+async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """
+    Dependency to get current admin from token.
+
+    Declared async (verification is CPU-only and usually a cache hit) so
+    async endpoints never need a threadpool worker just for authentication.
+    """
     return verify_token(credentials)
 
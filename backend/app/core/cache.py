@@ -0,0 +1,101 @@
+"""Small in-process caching utilities."""
+import threading
+from collections import OrderedDict
+from time import monotonic, time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache whose entries expire after a fixed time.
+
+    Each API process keeps its own copy, so entries can be up to ttl_seconds
+    stale across processes; call invalidate() after local writes.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        """
+        Args:
+            ttl_seconds: How long an entry stays valid (0 disables caching)
+        """
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        # Bumped on invalidation so values computed before it are not stored
+        self._generation = 0
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, computing and storing it if missing or expired.
+
+        Args:
+            key: Cache key
+            compute: Called (outside the lock) to produce a fresh value
+        """
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+            generation = self._generation
+
+        value = compute()
+        if self.ttl_seconds > 0:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (monotonic() + self.ttl_seconds, value)
+        return value
+
+    def invalidate(self, key: Hashable = None):
+        """Drop one entry, or every entry when no key is given."""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+class ExpiringLRUCache:
+    """
+    Thread-safe in-memory cache holding at most max_entries values, each with
+    its own absolute expiry time (Unix seconds). The least recently used
+    entry is evicted when the cache is full.
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        Args:
+            max_entries: Largest number of entries kept (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value for key, or None if it is missing or has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, expires_at: float):
+        """Store value until the Unix time expires_at."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
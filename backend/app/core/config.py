@@ -19,6 +19,7 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_SIZE: int = 1024  # Verified tokens kept in memory (0 disables the cache)
     
     # CORS - can be a list or comma-separated string
     CORS_ORIGINS: Union[str, List[str]] = ["http://localhost:3000", "http://localhost:5173"]
@@ -39,6 +40,13 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     UPLOAD_DIR: str = "uploads"
     
+    # Background import jobs
+    IMPORT_JOB_WORKERS: int = 2
+    IMPORT_JOB_RETENTION_SECONDS: int = 3600  # Keep finished job results for 1 hour
+    
+    # Dashboard statistics cache (0 disables caching)
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    
     # Azure Blob Storage (Optional - files stored locally if not set)
     AZURE_STORAGE_CONNECTION_STRING: str = ""
     AZURE_STORAGE_CONTAINER: str = "enrollment-uploads"
@@ -47,6 +55,10 @@ class Settings(BaseSettings):
     ADMIN_EMAIL: str = ""
     ADMIN_PASSWORD: str = ""
     
+    # Rate limiting: "memory" (per process) or "database" (shared by all workers)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 10000  # Clients tracked by the in-memory backend before LRU eviction
+    
     # Email Configuration (for reminders)
     SMTP_ENABLED: bool = False
     SMTP_HOST: str = "smtp.gmail.com"
@@ -55,7 +67,15 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""
     SMTP_FROM_EMAIL: str = ""
     SMTP_USE_TLS: bool = True
+    SMTP_TIMEOUT_SECONDS: int = 30  # Socket timeout for SMTP connections
+    SMTP_DELIVERY_WORKERS: int = 1  # Worker threads, each keeping one SMTP session open
+    SMTP_BATCH_SIZE: int = 50  # Messages sent back to back over one session
+    SMTP_IDLE_TIMEOUT_SECONDS: int = 60  # Close a session after this long without mail
+    SMTP_MAX_RETRIES: int = 3  # Retries for transient delivery failures
+    SMTP_RETRY_BACKOFF_SECONDS: float = 2.0  # First retry delay, doubled on each retry
+    SMTP_DELIVERY_TIMEOUT_SECONDS: int = 300  # How long senders wait for queued mail to go out
     REMINDER_MINUTES_BEFORE: int = 30  # Send reminder 30 minutes before class
+    REMINDER_LEASE_RETRY_SECONDS: int = 30  # How often standby workers try to take over reminder scheduling
     
     class Config:
         env_file = ".env"
@@ -1,12 +1,14 @@
 """File upload security utilities."""
 import os
 import re
+import aiofiles
 from pathlib import Path
 from fastapi import HTTPException, UploadFile
 from app.core.config import settings
 
 ALLOWED_EXTENSIONS = {'.xlsx', '.xls', '.csv'}
 MAX_FILENAME_LENGTH = 255
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 
 def sanitize_filename(filename: str) -> str:
     """
@@ -110,3 +112,33 @@ def get_safe_file_path(filename: str, upload_dir: str = None) -> str:
     
     return file_path
 
+async def save_upload_file(file: UploadFile, file_path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+    """
+    Stream an uploaded file to disk in chunks, enforcing the size limit while copying.
+    
+    Args:
+        file: Uploaded file
+        file_path: Destination path (from get_safe_file_path)
+        chunk_size: Bytes to read per chunk
+        
+    Returns:
+        Number of bytes written
+        
+    Raises:
+        HTTPException if the file is too large (the partial file is removed)
+    """
+    total_size = 0
+    try:
+        async with aiofiles.open(file_path, 'wb') as out_file:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                total_size += len(chunk)
+                validate_file_size(total_size)
+                await out_file.write(chunk)
+    except Exception:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return total_size
@@ -0,0 +1,135 @@
+"""Prometheus metrics for requests, the database pool and background work."""
+from time import perf_counter
+from typing import Dict
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Label for requests that matched no route (keeps label cardinality bounded)
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to send the response head, by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+REQUESTS = Counter("http_requests_total", "Requests handled, by route template and status code", ["method", "route", "status"])
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests currently being handled", ["method"])
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a connection from the pool (including opening new connections)",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+
+IMPORT_DURATION = Histogram(
+    "import_duration_seconds",
+    "Time to parse and process an uploaded import file",
+    ["kind"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+)
+REPORT_BUILD_DURATION = Histogram(
+    "report_build_duration_seconds",
+    "Time to query and write a report file",
+    ["report"],
+    buckets=(0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300)
+)
+REMINDER_JOB_DURATION = Histogram(
+    "reminder_job_duration_seconds",
+    "Time taken by a class reminder job",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+)
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waits for a connection."""
+
+    # Value of the pool label
+    pool_name = "sync"
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.pool_name).observe(perf_counter() - started)
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Instrumented pool for the async (asyncpg) engine."""
+
+    pool_name = "async"
+
+class PoolCollector(Collector):
+    """Connection pool gauges, read from each engine's current pool at scrape time."""
+
+    GAUGES = (
+        ("db_pool_size", "Connections the pool keeps open", QueuePool.size),
+        ("db_pool_checked_out", "Connections currently in use", QueuePool.checkedout),
+        ("db_pool_checked_in", "Idle connections in the pool", QueuePool.checkedin),
+        ("db_pool_overflow", "Connections open beyond pool_size (negative while below it)", QueuePool.overflow),
+    )
+
+    def __init__(self):
+        self.engines: Dict[str, Engine] = {}
+
+    def collect(self):
+        pools = [(name, engine.pool) for name, engine in self.engines.items() if isinstance(engine.pool, QueuePool)]
+        for metric, documentation, read in self.GAUGES:
+            family = GaugeMetricFamily(metric, documentation, labels=["pool"])
+            for name, pool in pools:
+                family.add_metric([name], read(pool))
+            yield family
+
+_pool_collector = PoolCollector()
+REGISTRY.register(_pool_collector)
+
+def register_pool_metrics(name: str, engine: Engine):
+    """Export pool gauges for engine, labelled pool=name (an AsyncEngine's sync_engine for async pools)."""
+    _pool_collector.engines[name] = engine
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and in-flight gauges per request.
+
+    Requests are labelled with the route template (e.g.
+    /api/v1/courses/{course_id}) rather than the raw path. Latency is measured
+    until the response head is sent, so streamed report downloads are not
+    timed by how fast the client reads them.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = perf_counter()
+        status_code = 500
+        elapsed = None
+
+        async def send_with_metrics(message: Message):
+            nonlocal status_code, elapsed
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = perf_counter() - started
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            in_progress.dec()
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            route = getattr(route, "path", None) or UNMATCHED_ROUTE
+            REQUEST_LATENCY.labels(method, route).observe(elapsed if elapsed is not None else perf_counter() - started)
+            REQUESTS.labels(method, route, str(status_code)).inc()
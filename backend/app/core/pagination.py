@@ -0,0 +1,110 @@
+"""Keyset (cursor) pagination helpers for list endpoints."""
+import json
+import base64
+from datetime import date, datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, and_, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+# Response headers
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+class SortKey(NamedTuple):
+    """One column of a list endpoint's sort order. The last key must be unique."""
+    column: Any
+    descending: bool = False
+
+def encode_cursor(values: Sequence) -> str:
+    """Encode the sort key values of the last row on a page as an opaque cursor."""
+    serializable = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(serializable).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str, sort_keys: Sequence[SortKey]) -> List:
+    """Decode a cursor back into sort key values, converted to the columns' Python types."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(sort_keys):
+            raise ValueError("cursor does not match the sort order")
+        decoded = []
+        for value, key in zip(values, sort_keys):
+            python_type = key.column.type.python_type
+            if value is not None and python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(sort_keys: Sequence[SortKey], values: Sequence):
+    """Condition selecting the rows that come after values in the given sort order."""
+    if all(key.descending == sort_keys[0].descending for key in sort_keys):
+        # Same direction for every key: a row comparison the index can serve directly
+        row = tuple_(*[key.column for key in sort_keys])
+        return row < tuple_(*values) if sort_keys[0].descending else row > tuple_(*values)
+
+    conditions = []
+    for i, key in enumerate(sort_keys):
+        after = key.column < values[i] if key.descending else key.column > values[i]
+        conditions.append(and_(*[k.column == v for k, v in zip(sort_keys[:i], values[:i])], after))
+    return or_(*conditions)
+
+def paginate(
+    query: Query,
+    sort_keys: Sequence[SortKey],
+    response: Response,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = False
+) -> list:
+    """
+    Fetch one page of query in sort_keys order.
+
+    With a cursor, the page starts right after the row the cursor was taken
+    from (keyset pagination, skip is ignored); otherwise it starts at offset
+    skip. When more rows follow, an opaque cursor for the next page is set in
+    the X-Next-Cursor header. With include_total, the number of rows matching
+    the filters is set in the X-Total-Count header.
+    """
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(query.order_by(None).count())
+    rows = _page(query, sort_keys, limit, skip, cursor).all()
+    return _finish_page(rows, sort_keys, response, limit)
+
+async def paginate_async(
+    db: AsyncSession,
+    statement: Select,
+    sort_keys: Sequence[SortKey],
+    response: Response,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = False
+) -> list:
+    """paginate() for a select() of one entity, run on an AsyncSession."""
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(statement.order_by(None).subquery()))
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+    rows = (await db.scalars(_page(statement, sort_keys, limit, skip, cursor))).all()
+    return _finish_page(list(rows), sort_keys, response, limit)
+
+def _page(query, sort_keys: Sequence[SortKey], limit: int, skip: int, cursor: Optional[str]):
+    """Restrict a Query or select() to one page, plus one row to detect a next page."""
+    if cursor:
+        query = query.filter(keyset_filter(sort_keys, decode_cursor(cursor, sort_keys)))
+    query = query.order_by(*[key.column.desc() if key.descending else key.column.asc() for key in sort_keys])
+    if not cursor and skip:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+def _finish_page(rows: list, sort_keys: Sequence[SortKey], response: Response, limit: int) -> list:
+    """Drop the extra row and set the next page cursor when there was one."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, key.column.key) for key in sort_keys])
+    return rows
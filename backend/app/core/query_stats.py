@@ -0,0 +1,108 @@
+"""Per-request SQL statement counting and timing."""
+import logging
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+QUERIES_HEADER = "X-DB-Queries"
+TIME_HEADER = "X-DB-Time-ms"
+SLOWEST_HEADER = "X-DB-Slowest-ms"
+
+# Key in Connection.info holding start times of statements in flight
+_START_TIMES_KEY = "query_stats_start_times"
+
+class QueryStats:
+    """Statements executed while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+# Stats of the request being handled; sync endpoints and dependencies run in a
+# threadpool with a copy of the request's context, so they update the same object.
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the current request (None outside a request, e.g. in background jobs)."""
+    return _current.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault(_START_TIMES_KEY, []).append(perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    start_times = conn.info.get(_START_TIMES_KEY)
+    if stats is not None and start_times:
+        stats.record(statement, perf_counter() - start_times.pop())
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    start_times = connection.info.get(_START_TIMES_KEY) if connection is not None else None
+    if start_times:
+        start_times.pop()
+
+def instrument_engines():
+    """Time statements on every engine (the app's and any created later, e.g. in tests)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware collecting QueryStats for each HTTP request.
+
+    With expose_headers, responses carry the statement count and total and
+    slowest statement time. Statements run while a streaming body is sent
+    come after the headers and are only logged.
+    """
+
+    def __init__(self, app: ASGIApp, expose_headers: bool = False):
+        self.app = app
+        self.expose_headers = expose_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_stats(message: Message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = list(message.get("headers", []))
+                headers.extend([
+                    (QUERIES_HEADER.lower().encode(), str(stats.count).encode()),
+                    (TIME_HEADER.lower().encode(), f"{stats.total_seconds * 1000:.2f}".encode()),
+                    (SLOWEST_HEADER.lower().encode(), f"{stats.slowest_seconds * 1000:.2f}".encode()),
+                ])
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            if stats.count:
+                logger.debug(
+                    f"{scope['method']} {scope['path']}: {stats.count} queries in "
+                    f"{stats.total_seconds * 1000:.1f}ms, slowest {stats.slowest_seconds * 1000:.1f}ms: "
+                    f"{' '.join(stats.slowest_statement.split())[:200]}"
+                )
@@ -1,17 +1,151 @@
 """Rate limiting utilities to prevent brute force attacks."""
+import math
+import logging
+import threading
+from abc import ABC, abstractmethod
 from functools import wraps
-from time import time
-from collections import defaultdict
+from time import monotonic
+from collections import OrderedDict, deque
+from typing import Callable, Optional
 from fastapi import HTTPException, status, Request
-from typing import Callable
+from sqlalchemy import func, delete
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db.base import engine
+from app.models.rate_limit_bucket import RateLimitBucket
 
-# In-memory store for rate limiting (use Redis in production)
-_rate_limit_store = defaultdict(list)
+logger = logging.getLogger(__name__)
+
+class RateLimitBackend(ABC):
+    """Storage for rate limit accounting."""
+
+    @abstractmethod
+    def hit(self, key: str, max_requests: int, window_seconds: int) -> Optional[float]:
+        """
+        Record a request for key if it is within the limit.
+
+        Returns:
+            None if the request is allowed, otherwise seconds until the next one will be
+        """
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Exact sliding-window limiter kept in process memory.
+
+    Each key keeps a ring buffer of its last max_requests accepted request
+    times, so a check is O(1) and memory per key is bounded. Keys are kept in
+    LRU order and the least recently used ones are evicted beyond max_keys.
+    Limits are per process: with N workers a client can get N times the limit.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, max_requests: int, window_seconds: int) -> Optional[float]:
+        now = monotonic()
+        with self._lock:
+            times = self._buckets.get(key)
+            if times is None or times.maxlen != max_requests:
+                times = deque(maxlen=max_requests)
+                self._buckets[key] = times
+            self._buckets.move_to_end(key)
+
+            # The buffer only holds max_requests entries; if the oldest is still
+            # inside the window, the window is full
+            if len(times) == max_requests and now - times[0] < window_seconds:
+                return times[0] + window_seconds - now
+
+            times.append(now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return None
+
+    def __len__(self):
+        return len(self._buckets)
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """
+    Token-bucket limiter stored in the rate_limit_buckets table, shared by all workers.
+
+    Buckets hold up to max_requests tokens and refill at max_requests per
+    window. Each request is one atomic upsert that refills, checks and takes a
+    token using the database clock, so workers never race or disagree on time.
+    Rows for full (idle) buckets are deleted every cleanup_every requests.
+    """
+
+    def __init__(self, bind=None, cleanup_every: int = 1000):
+        """
+        Args:
+            bind: Engine to use (defaults to the application engine)
+            cleanup_every: Delete expired buckets after this many requests
+        """
+        self.bind = bind if bind is not None else engine
+        self.cleanup_every = cleanup_every
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, max_requests: int, window_seconds: int) -> Optional[float]:
+        rate = max_requests / window_seconds  # Tokens refilled per second
+        now = func.extract('epoch', func.now())
+        refilled = func.least(max_requests, RateLimitBucket.tokens + (now - RateLimitBucket.updated_at) * rate)
+
+        stmt = insert(RateLimitBucket).values(
+            key=key,
+            tokens=max_requests - 1,
+            updated_at=now,
+            expires_at=now + window_seconds
+        )
+        # The update (and RETURNING) only happens when a token is available
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RateLimitBucket.key],
+            set_={
+                'tokens': refilled - 1,
+                'updated_at': now,
+                'expires_at': now + window_seconds
+            },
+            where=refilled >= 1
+        ).returning(RateLimitBucket.tokens)
+
+        with self.bind.begin() as connection:
+            allowed = connection.execute(stmt).first() is not None
+            if self._due_for_cleanup():
+                connection.execute(delete(RateLimitBucket).where(RateLimitBucket.expires_at < now))
+
+        # A token comes back within 1/rate seconds
+        return None if allowed else 1 / rate
+
+    def _due_for_cleanup(self) -> bool:
+        with self._lock:
+            self._requests += 1
+            return self._requests % self.cleanup_every == 0
+
+_backend: Optional[RateLimitBackend] = None
+_backend_lock = threading.Lock()
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Get the configured backend (RATE_LIMIT_BACKEND: "memory" or "database"), created on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if settings.RATE_LIMIT_BACKEND == "database":
+                _backend = DatabaseRateLimitBackend()
+            else:
+                _backend = InMemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+        return _backend
+
+def set_rate_limit_backend(backend: Optional[RateLimitBackend]):
+    """Replace the backend (None goes back to the configured one on next use)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
 
 def rate_limit(max_requests: int = 5, window_seconds: int = 60):
     """
     Rate limiting decorator to prevent brute force attacks.
-    
+
     Args:
         max_requests: Maximum number of requests allowed
         window_seconds: Time window in seconds
@@ -21,32 +155,35 @@ def rate_limit(max_requests: int = 5, window_seconds: int = 60):
         async def wrapper(request: Request, *args, **kwargs):
             # Get client IP - check for proxy headers
             client_ip = request.client.host if request.client else "unknown"
-            
+
             # Check for X-Forwarded-For header (if behind proxy)
             forwarded_for = request.headers.get("X-Forwarded-For")
             if forwarded_for:
                 # Take the first IP (original client)
                 client_ip = forwarded_for.split(",")[0].strip()
-            
-            # Clean old entries
-            current_time = time()
-            _rate_limit_store[client_ip] = [
-                req_time for req_time in _rate_limit_store[client_ip]
-                if current_time - req_time < window_seconds
-            ]
-            
+
+            # Each decorated endpoint has its own limit per client
+            key = f"{func.__name__}:{client_ip}"
+            backend = get_rate_limit_backend()
+            try:
+                if isinstance(backend, InMemoryRateLimitBackend):
+                    retry_after = backend.hit(key, max_requests, window_seconds)
+                else:
+                    # Keep database round trips off the event loop
+                    retry_after = await run_in_threadpool(backend.hit, key, max_requests, window_seconds)
+            except Exception as e:
+                # Fail open: an unavailable store should not lock everyone out
+                logger.error(f"Rate limit check failed for {key}: {str(e)}")
+                retry_after = None
+
             # Check rate limit
-            if len(_rate_limit_store[client_ip]) >= max_requests:
+            if retry_after is not None:
                 raise HTTPException(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                     detail="Too many requests. Please try again later.",
-                    headers={"Retry-After": str(window_seconds)}
+                    headers={"Retry-After": str(max(math.ceil(retry_after), 1))}
                 )
-            
-            # Record this request
-            _rate_limit_store[client_ip].append(current_time)
-            
+
             return await func(request, *args, **kwargs)
         return wrapper
     return decorator
-
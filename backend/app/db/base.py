@@ -1,11 +1,15 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool, register_pool_metrics
 
 # Create engine with connection pooling and security settings
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,  # QueuePool that records checkout wait times
     pool_size=10,  # Connection pool size
     max_overflow=20,  # Maximum overflow connections
     pool_pre_ping=True,  # Verify connections before using
@@ -14,6 +18,33 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def async_database_url(url) -> URL:
+    """The same database as url, reached through the asyncpg driver."""
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+    # asyncpg takes ssl instead of libpq's sslmode
+    if "sslmode" in url.query:
+        url = url.update_query_dict({"ssl": url.query["sslmode"]}).difference_update_query(["sslmode"])
+    return url
+
+# Async engine for read endpoints declared with async def: they wait on the
+# pool instead of occupying a threadpool worker for the whole request.
+# asyncpg connections belong to the event loop that opened them, so the
+# pool must only be used from one loop (as under uvicorn; tests use
+# `with TestClient(app)`)
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    echo=False
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+register_pool_metrics("sync", engine)
+register_pool_metrics("async", async_engine.sync_engine)
+
 Base = declarative_base()
 
 def get_db():
@@ -24,3 +55,7 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependency for getting an async database session (read endpoints)."""
+    async with AsyncSessionLocal() as db:
+        yield db
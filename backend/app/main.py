@@ -1,55 +1,104 @@
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from contextlib import asynccontextmanager
 import traceback
 from app.core.config import settings
 from app.api import api_router
+from app.db.base import engine, async_engine
+from app.core.metrics import MetricsMiddleware
+from app.core.query_stats import (
+    QueryStatsMiddleware, instrument_engines, QUERIES_HEADER, TIME_HEADER, SLOWEST_HEADER
+)
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
+from datetime import datetime
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Global scheduler instance
+# Global scheduler instances
 scheduler = None
+reminder_scheduler = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan - startup and shutdown."""
     # Startup
-    global scheduler
-    if settings.SMTP_ENABLED and settings.ADMIN_EMAIL:
+    global scheduler, reminder_scheduler
+    try:
+        from app.services.course_status_service import CourseStatusService
+        
+        # Create and start scheduler
+        scheduler = BackgroundScheduler()
+        scheduler.start()
+        
+        # Complete courses whose end date has been reached: at startup (to catch
+        # up after downtime) and every day just after midnight. The UPDATE is
+        # idempotent, so it is safe for every worker to run it.
+        scheduler.add_job(
+            CourseStatusService.run_status_transitions,
+            trigger=CronTrigger(hour=0, minute=0, second=5),
+            id='course_status_transitions',
+            name='Complete courses past their end date',
+            next_run_time=datetime.now(),
+            misfire_grace_time=3600,
+            coalesce=True,
+            replace_existing=True
+        )
+        logger.info("Scheduler started - ended courses will be completed daily")
+    except Exception as e:
+        logger.error(f"Failed to start scheduler: {str(e)}")
+    
+    if scheduler and settings.SMTP_ENABLED and settings.ADMIN_EMAIL:
         try:
-            from app.services.reminder_service import ReminderService
-            
-            # Create and start scheduler
-            scheduler = BackgroundScheduler()
-            
-            # Schedule reminder check to run every minute
-            scheduler.add_job(
-                ReminderService.check_and_send_reminders,
-                trigger=IntervalTrigger(minutes=1),
-                id='class_reminder_check',
-                name='Check and send class reminders',
-                replace_existing=True
-            )
-            
-            scheduler.start()
-            logger.info("Scheduler started - class reminders will be checked every minute")
+            if engine.dialect.name == 'postgresql':
+                from app.services.reminder_scheduler import ReminderScheduler
+                
+                # One-shot jobs per upcoming class, scheduled by whichever worker holds the lease
+                reminder_scheduler = ReminderScheduler(scheduler)
+                reminder_scheduler.start()
+                logger.info("Class reminders are scheduled by the worker holding the reminder lease")
+            else:
+                from app.services.reminder_service import ReminderService
+                
+                # No advisory locks or LISTEN/NOTIFY: fall back to checking every minute
+                scheduler.add_job(
+                    ReminderService.check_and_send_reminders,
+                    trigger=IntervalTrigger(minutes=1),
+                    id='class_reminder_check',
+                    name='Check and send class reminders',
+                    replace_existing=True
+                )
+                logger.info("Class reminders will be checked every minute")
         except Exception as e:
-            logger.error(f"Failed to start scheduler: {str(e)}")
+            logger.error(f"Failed to start class reminders: {str(e)}")
     else:
-        logger.info("Scheduler not started - email service not enabled or ADMIN_EMAIL not configured")
+        logger.info("Class reminders not started - email service not enabled or ADMIN_EMAIL not configured")
     
     yield
     
     # Shutdown
+    if reminder_scheduler:
+        reminder_scheduler.stop()
     if scheduler and scheduler.running:
         scheduler.shutdown()
         logger.info("Scheduler stopped")
+    
+    # Deliver queued email and close SMTP sessions
+    from app.services.email_service import EmailService
+    EmailService.shutdown()
+    
+    # Stop background import workers
+    from app.services.import_job_service import ImportJobService
+    ImportJobService.shutdown()
+    
+    # Close pooled async connections while their event loop is still running
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Physical Course Enrollment Management System",
@@ -70,10 +119,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"],
     allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin"],
-    expose_headers=["Content-Type", "Authorization"],
+    expose_headers=[
+        "Content-Type", "Authorization", "X-Next-Cursor", "X-Total-Count",
+        QUERIES_HEADER, TIME_HEADER, SLOWEST_HEADER
+    ],
     max_age=3600,  # Cache preflight requests for 1 hour
 )
 
+# Count and time SQL statements per request; the numbers are only sent back
+# as response headers outside production
+instrument_engines()
+app.add_middleware(QueryStatsMiddleware, expose_headers=settings.ENVIRONMENT != "production")
+
+# Per-route latency and status metrics, plus database pool gauges, served at /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Exception handler to ensure CORS headers on errors
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -102,14 +162,15 @@ async def global_exception_handler(request: Request, exc: Exception):
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     """Handle HTTP exceptions and ensure CORS headers."""
     origin = request.headers.get("origin")
-    headers = {}
+    # Keep headers set on the exception (e.g. Retry-After, WWW-Authenticate)
+    headers = dict(exc.headers or {})
     if origin and origin in cors_origins:
-        headers = {
+        headers.update({
             "Access-Control-Allow-Origin": origin,
             "Access-Control-Allow-Credentials": "true",
             "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, PATCH, OPTIONS, HEAD",
             "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Requested-With, Accept, Origin",
-        }
+        })
     
     return JSONResponse(
         status_code=exc.status_code,
@@ -132,3 +193,8 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics in text exposition format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
@@ -5,6 +5,7 @@ from app.models.mentor import Mentor
 from app.models.course_mentor import CourseMentor
 from app.models.course_comment import CourseComment
 from app.models.course_draft import CourseDraft
+from app.models.rate_limit_bucket import RateLimitBucket
 
-__all__ = ["Student", "Course", "CourseStatus", "IncomingEnrollment", "Enrollment", "Mentor", "CourseMentor", "CourseComment", "CourseDraft"]
+__all__ = ["Student", "Course", "CourseStatus", "IncomingEnrollment", "Enrollment", "Mentor", "CourseMentor", "CourseComment", "CourseDraft", "RateLimitBucket"]
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Float, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Float, Boolean, Text, Index, text
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 import enum
@@ -49,6 +49,15 @@ class IncomingEnrollment(Base):
 class Enrollment(Base):
     """Main enrollment table with eligibility, approval, and completion tracking."""
     __tablename__ = "enrollments"
+    __table_args__ = (
+        Index('ix_enrollments_student_approval_completion', 'student_id', 'approval_status', 'completion_status'),
+        Index('ix_enrollments_course_approval', 'course_id', 'approval_status'),
+        Index('ix_enrollments_course_name', 'course_name'),
+        Index('ix_enrollments_approved_course_completion', 'course_id', 'completion_status',
+              postgresql_where=text("approval_status = 'APPROVED'")),
+        Index('ix_enrollments_pending_eligible_course', 'course_id',
+              postgresql_where=text("approval_status = 'PENDING' AND eligibility_status = 'ELIGIBLE'")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False, index=True)
@@ -0,0 +1,15 @@
+"""Model for shared rate limit state."""
+from sqlalchemy import Column, String, Float
+from app.db.base import Base
+
+class RateLimitBucket(Base):
+    """Token bucket per rate-limited key, shared by all API processes."""
+    __tablename__ = "rate_limit_buckets"
+    
+    key = Column(String, primary_key=True)  # "<scope>:<client ip>"
+    tokens = Column(Float, nullable=False)  # Requests left at updated_at
+    updated_at = Column(Float, nullable=False)  # Database clock, seconds since the epoch
+    expires_at = Column(Float, nullable=False, index=True)  # Bucket is full again (row can be dropped) after this
+    
+    def __repr__(self):
+        return f"<RateLimitBucket(key={self.key}, tokens={self.tokens})>"
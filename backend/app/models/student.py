@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, Boolean, Date
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Boolean, Date, Index, text
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 import enum
@@ -16,6 +16,9 @@ class SBU(str, enum.Enum):
 
 class Student(Base):
     __tablename__ = "students"
+    __table_args__ = (
+        Index('ix_students_active_employee_id', 'employee_id', postgresql_where=text('is_active')),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(String, unique=True, index=True, nullable=False)
@@ -0,0 +1,254 @@
+"""In-memory index of upcoming class occurrences used by the reminder scheduler."""
+import bisect
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import List, NamedTuple, Optional
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.course import Course, CourseStatus
+
+logger = logging.getLogger(__name__)
+
+# Map day name to day of week (Python: 0=Monday, 6=Sunday)
+DAY_MAP = {
+    'Monday': 0,
+    'Tuesday': 1,
+    'Wednesday': 2,
+    'Thursday': 3,
+    'Friday': 4,
+    'Saturday': 5,
+    'Sunday': 6
+}
+
+# Each weekly schedule entry has exactly one "next occurrence" within this window
+LOOKAHEAD = timedelta(days=7)
+
+# Occurrences are expanded this far past the lookahead so the index only
+# has to be rebuilt for the passage of time about once a day
+INDEX_SLACK = timedelta(days=1)
+
+# PostgreSQL NOTIFY channel announcing committed course schedule changes to
+# the process that schedules reminders
+SCHEDULE_CHANGE_CHANNEL = 'class_schedule_changed'
+
+# Course columns that decide when and whether a class reminder fires, or what it says
+INDEXED_COURSE_FIELDS = ('status', 'class_schedule', 'start_date', 'end_date', 'name', 'batch_code')
+
+class ClassOccurrence(NamedTuple):
+    """One scheduled class, keyed by when its reminder should fire."""
+    fire_at: datetime
+    course_id: int
+    start_time: str
+    class_datetime: datetime
+    course_name: str
+    batch_code: str
+    end_time: str
+    day: str
+
+class ClassOccurrenceIndex:
+    """
+    Sorted list of upcoming class occurrences of ongoing courses, ordered by fire_at.
+
+    The index is built from the courses table and kept until a course's
+    schedule, status, dates or name change (see the session listeners below)
+    or until time runs past the expanded horizon. Lookups are binary searches.
+
+    Each API process keeps its own index and only sees writes made through
+    its own sessions; other processes learn about committed changes from a
+    NOTIFY on SCHEDULE_CHANGE_CHANNEL.
+    """
+
+    def __init__(self):
+        self._occurrences: List[ClassOccurrence] = []
+        self._fire_times: List[datetime] = []
+        self._horizon_end: Optional[datetime] = None
+        self._lock = threading.Lock()
+        # Bumped on invalidation so an index built before it is not kept fresh
+        self._generation = 0
+        self._built_generation = 0
+
+    def invalidate(self):
+        """Drop the index so the next lookup rebuilds it."""
+        with self._lock:
+            self._generation += 1
+            self._horizon_end = None
+
+    def is_stale(self, now: datetime) -> bool:
+        """Whether the index is missing or no longer covers the lookahead window from now."""
+        with self._lock:
+            return self._horizon_end is None or now + LOOKAHEAD > self._horizon_end
+
+    def refresh_at(self) -> Optional[datetime]:
+        """When the index stops covering the lookahead window (None if it is stale already)."""
+        with self._lock:
+            return self._horizon_end - LOOKAHEAD if self._horizon_end else None
+
+    def ensure_fresh(self, db: Session, now: datetime):
+        """Rebuild the index if it is stale."""
+        if self.is_stale(now):
+            self.rebuild(db, now)
+
+    def rebuild(self, db: Session, now: datetime):
+        """Load ongoing scheduled courses and expand their classes from now to the horizon."""
+        with self._lock:
+            generation = self._generation
+
+        start = now.replace(second=0, microsecond=0)
+        horizon_end = start + LOOKAHEAD + INDEX_SLACK
+        courses = db.query(
+            Course.id, Course.name, Course.batch_code, Course.start_date, Course.end_date, Course.class_schedule
+        ).filter(
+            Course.status == CourseStatus.ONGOING,
+            Course.class_schedule.isnot(None)
+        ).all()
+
+        occurrences = []
+        for course in courses:
+            occurrences.extend(ClassOccurrenceIndex._expand_course(course, start, horizon_end))
+        occurrences.sort(key=lambda o: (o.fire_at, o.course_id, o.start_time))
+
+        with self._lock:
+            if generation < self._built_generation:
+                # A rebuild that started later already installed newer data
+                return
+            self._occurrences = occurrences
+            self._fire_times = [o.fire_at for o in occurrences]
+            self._built_generation = generation
+            # If a course changed while we were reading, serve what was read
+            # but keep the index stale so the next lookup rebuilds it
+            self._horizon_end = horizon_end if generation == self._generation else None
+        logger.debug(f"Class occurrence index rebuilt with {len(occurrences)} occurrence(s) from {len(courses)} course(s)")
+
+    def due(self, fire_from: datetime, fire_to: datetime) -> List[ClassOccurrence]:
+        """Occurrences whose reminder fires within [fire_from, fire_to]."""
+        with self._lock:
+            lo = bisect.bisect_left(self._fire_times, fire_from)
+            hi = bisect.bisect_right(self._fire_times, fire_to)
+            return self._occurrences[lo:hi]
+
+    def upcoming(self, class_from: datetime, class_to: datetime) -> List[ClassOccurrence]:
+        """Occurrences whose class starts within [class_from, class_to], by start time."""
+        reminder_offset = timedelta(minutes=settings.REMINDER_MINUTES_BEFORE)
+        return [
+            o for o in self.due(class_from - reminder_offset, class_to - reminder_offset)
+            if class_from <= o.class_datetime <= class_to
+        ]
+
+    @staticmethod
+    def _expand_course(course, start: datetime, horizon_end: datetime) -> List[ClassOccurrence]:
+        """Every class of one course strictly after start and up to horizon_end, within the course dates."""
+        if not isinstance(course.class_schedule, list):
+            return []
+
+        reminder_offset = timedelta(minutes=settings.REMINDER_MINUTES_BEFORE)
+        occurrences = []
+        for schedule in course.class_schedule:
+            if not isinstance(schedule, dict) or not schedule.get('day') or not schedule.get('start_time'):
+                continue
+
+            scheduled_day = DAY_MAP.get(schedule['day'])
+            if scheduled_day is None:
+                continue
+
+            try:
+                start_hour, start_min = map(int, schedule['start_time'].split(':'))
+                class_time = datetime.min.time().replace(hour=start_hour, minute=start_min)
+            except (ValueError, IndexError):
+                logger.warning(f"Invalid start_time format for course {course.id}: {schedule.get('start_time')}")
+                continue
+
+            class_date = start.date() + timedelta(days=(scheduled_day - start.weekday()) % 7)
+            while True:
+                class_datetime = datetime.combine(class_date, class_time)
+                if class_datetime > horizon_end:
+                    break
+                if class_datetime > start and ClassOccurrenceIndex._within_course_dates(course, class_date):
+                    occurrences.append(ClassOccurrence(
+                        fire_at=class_datetime - reminder_offset,
+                        course_id=course.id,
+                        start_time=schedule['start_time'],
+                        class_datetime=class_datetime,
+                        course_name=course.name,
+                        batch_code=course.batch_code,
+                        end_time=schedule.get('end_time', ''),
+                        day=schedule['day']
+                    ))
+                class_date += timedelta(days=7)
+        return occurrences
+
+    @staticmethod
+    def _within_course_dates(course, class_date: date) -> bool:
+        return class_date >= course.start_date and (not course.end_date or class_date <= course.end_date)
+
+occurrence_index = ClassOccurrenceIndex()
+
+# Index invalidation: remember whether a session changed any indexed course
+# column (through the unit of work or bulk statements) and drop the index
+# once that transaction commits. The change is also announced with a NOTIFY,
+# which PostgreSQL only delivers if the transaction commits.
+
+def _course_changed(course: Course) -> bool:
+    state = inspect(course)
+    return any(state.attrs[field].history.has_changes() for field in INDEXED_COURSE_FIELDS)
+
+def _updated_fields(orm_execute_state) -> Optional[set]:
+    """Names of the columns a bulk UPDATE sets (None if they cannot be told)."""
+    statement = orm_execute_state.statement
+    if statement._ordered_values:
+        keys = [key for key, _ in statement._ordered_values]
+    elif statement._values:
+        keys = list(statement._values)
+    elif orm_execute_state.parameters:
+        # UPDATE by primary key with a list of parameter dicts
+        parameters = orm_execute_state.parameters
+        keys = set().union(*parameters) if isinstance(parameters, list) else list(parameters)
+    else:
+        return None
+    return {getattr(key, 'key', key) for key in keys}
+
+def _mark_stale(session):
+    if session.info.get('occurrence_index_stale'):
+        return
+    session.info['occurrence_index_stale'] = True
+    connection = session.connection()
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text("SELECT pg_notify(:channel, '')"), {'channel': SCHEDULE_CHANGE_CHANNEL})
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_flushed_course_changes(session, flush_context):
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Course):
+            _mark_stale(session)
+            return
+    for obj in session.dirty:
+        if isinstance(obj, Course) and _course_changed(obj):
+            _mark_stale(session)
+            return
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _track_bulk_course_changes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            changed = issubclass(mapper.class_, Course)
+        else:
+            # Core statement on a Table, e.g. an import's bulk student upsert
+            changed = getattr(orm_execute_state.statement, 'table', None) is Course.__table__
+        if changed and orm_execute_state.is_update:
+            # e.g. seat counter updates leave the schedule alone
+            fields = _updated_fields(orm_execute_state)
+            changed = fields is None or not fields.isdisjoint(INDEXED_COURSE_FIELDS)
+        if changed:
+            _mark_stale(orm_execute_state.session)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop('occurrence_index_stale', False):
+        occurrence_index.invalidate()
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_rolled_back_changes(session):
+    session.info.pop('occurrence_index_stale', None)
@@ -0,0 +1,80 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, and_, select
+from typing import Dict, Iterable
+from app.models.enrollment import Enrollment, ApprovalStatus, CompletionStatus
+
+# Enrollments that count toward a student's completion rate:
+# - WITHDRAWN courses (they have a reason attached, count as not completed)
+# - COMPLETED or FAILED courses that are APPROVED
+# Excluded: PENDING approvals, NOT_STARTED, IN_PROGRESS, REJECTED (admin's decision, not student's fault)
+COUNTS_TOWARD_RATE = or_(
+    Enrollment.approval_status == ApprovalStatus.WITHDRAWN,
+    and_(
+        Enrollment.approval_status == ApprovalStatus.APPROVED,
+        Enrollment.completion_status.in_([CompletionStatus.COMPLETED, CompletionStatus.FAILED])
+    )
+)
+
+class CompletionRateService:
+    """Service for computing students' overall completion rates in SQL."""
+
+    @staticmethod
+    def empty_stats() -> Dict:
+        """Stats for a student with no finished courses."""
+        return {
+            'total_courses_assigned': 0,
+            'completed_courses': 0,
+            'overall_completion_rate': 0.0
+        }
+
+    @staticmethod
+    def completion_rate(completed: int, total: int) -> float:
+        """Completion rate as a percentage rounded to one decimal (0.0 when nothing counts)."""
+        return round((completed / total) * 100, 1) if total > 0 else 0.0
+
+    @staticmethod
+    def counts_subquery(student_ids):
+        """
+        Per-student counts of relevant and completed enrollments as a subquery
+        with columns (student_id, total_courses, completed_courses).
+        Only COMPLETED courses count as completed (withdrawn and failed count as not completed).
+
+        Args:
+            student_ids: Student ids to aggregate, as a list or a SELECT of ids
+        """
+        return select(
+            Enrollment.student_id,
+            func.count(Enrollment.id).label('total_courses'),
+            func.count(Enrollment.id).filter(
+                Enrollment.completion_status == CompletionStatus.COMPLETED
+            ).label('completed_courses')
+        ).where(
+            Enrollment.student_id.in_(student_ids),
+            COUNTS_TOWARD_RATE
+        ).group_by(Enrollment.student_id).subquery()
+
+    @staticmethod
+    def get_stats_for_students(db: Session, student_ids: Iterable[int]) -> Dict[int, Dict]:
+        """
+        Compute completion stats for many students with a single GROUP BY query.
+        Returns {student_id: {'total_courses_assigned', 'completed_courses', 'overall_completion_rate'}};
+        students without any relevant enrollment get empty stats.
+        """
+        student_ids = set(student_ids)
+        stats = {student_id: CompletionRateService.empty_stats() for student_id in student_ids}
+        if not student_ids:
+            return stats
+
+        counts = CompletionRateService.counts_subquery(student_ids)
+        for student_id, total, completed in db.query(counts).all():
+            stats[student_id] = {
+                'total_courses_assigned': total,
+                'completed_courses': completed,
+                'overall_completion_rate': CompletionRateService.completion_rate(completed, total)
+            }
+        return stats
+
+    @staticmethod
+    def get_stats(db: Session, student_id: int) -> Dict:
+        """Compute completion stats for a single student."""
+        return CompletionRateService.get_stats_for_students(db, [student_id])[student_id]
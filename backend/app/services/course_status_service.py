@@ -0,0 +1,52 @@
+"""Service for time-driven course status transitions."""
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.db.base import SessionLocal
+from app.models.course import Course, CourseStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CourseStatusService:
+    """Service for moving courses to completed once their end date is reached."""
+
+    @staticmethod
+    def complete_ended_courses(db: Session, today: Optional[date] = None) -> int:
+        """
+        Mark ongoing courses whose end_date is today or earlier as completed.
+
+        One set-based UPDATE; running it again (or from several workers) is
+        harmless since completed courses no longer match.
+
+        Returns:
+            Number of courses completed
+        """
+        today = today or date.today()
+        result = db.execute(
+            update(Course)
+            .where(
+                Course.status == CourseStatus.ONGOING,
+                Course.end_date.isnot(None),
+                Course.end_date <= today
+            )
+            .values(status=CourseStatus.COMPLETED, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def run_status_transitions():
+        """Scheduled job: complete ended courses in its own session."""
+        db = SessionLocal()
+        try:
+            completed = CourseStatusService.complete_ended_courses(db)
+            if completed:
+                logger.info(f"Auto-updated {completed} course(s) from ongoing to completed based on end_date")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error completing ended courses: {str(e)}")
+        finally:
+            db.close()
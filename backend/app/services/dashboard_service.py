@@ -0,0 +1,107 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import event, func, true
+from typing import Dict
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.student import Student
+from app.models.course import Course
+from app.models.enrollment import Enrollment, ApprovalStatus, CompletionStatus, EligibilityStatus
+
+_stats_cache = TTLCache(ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+# Models whose writes change the dashboard numbers
+_COUNTED_MODELS = (Student, Course, Enrollment)
+_COUNTED_TABLES = tuple(model.__table__ for model in _COUNTED_MODELS)
+
+class DashboardService:
+    """Service for the admin dashboard statistics."""
+
+    @staticmethod
+    def get_stats(db: Session) -> Dict[str, int]:
+        """
+        Get dashboard counts for employees, courses and enrollments.
+        Served from a short-lived in-process cache that is cleared whenever
+        a committed transaction writes students, courses or enrollments.
+        """
+        return _stats_cache.get_or_set('stats', lambda: DashboardService.compute_stats(db))
+
+    @staticmethod
+    def compute_stats(db: Session) -> Dict[str, int]:
+        """Compute all dashboard counts in a single query using conditional aggregation."""
+        employees = db.query(
+            func.count().filter(Student.is_active == True).label('active_employees'),
+            func.count().filter(Student.is_active == False).label('previous_employees')
+        ).subquery()
+
+        courses = db.query(
+            func.count().filter(Course.is_archived == False).label('active_courses'),
+            func.count().filter(Course.is_archived == True).label('archived_courses')
+        ).subquery()
+
+        enrollments = db.query(
+            func.count().label('total_enrollments'),
+            func.count().filter(
+                Enrollment.approval_status == ApprovalStatus.APPROVED
+            ).label('approved_enrollments'),
+            func.count().filter(
+                Enrollment.approval_status == ApprovalStatus.PENDING
+            ).label('pending_enrollments'),
+            func.count().filter(
+                Enrollment.approval_status == ApprovalStatus.WITHDRAWN
+            ).label('withdrawn_enrollments'),
+            # Completed enrollments (approved and completed)
+            func.count().filter(
+                Enrollment.approval_status == ApprovalStatus.APPROVED,
+                Enrollment.completion_status == CompletionStatus.COMPLETED
+            ).label('completed_enrollments'),
+            # Not eligible enrollments (ineligible and not approved/withdrawn)
+            func.count().filter(
+                Enrollment.eligibility_status.in_([
+                    EligibilityStatus.INELIGIBLE_PREREQUISITE,
+                    EligibilityStatus.INELIGIBLE_DUPLICATE,
+                    EligibilityStatus.INELIGIBLE_ANNUAL_LIMIT
+                ]),
+                Enrollment.approval_status != ApprovalStatus.APPROVED,
+                Enrollment.approval_status != ApprovalStatus.WITHDRAWN
+            ).label('not_eligible_enrollments')
+        ).subquery()
+
+        # Each subquery returns exactly one row, so the cross join is a single row too
+        row = db.query(employees, courses, enrollments).select_from(employees).join(
+            courses, true()
+        ).join(enrollments, true()).one()
+        return dict(row._mapping)
+
+    @staticmethod
+    def invalidate_cache():
+        """Drop cached statistics so the next request recomputes them."""
+        _stats_cache.invalidate()
+
+# Cache invalidation: remember whether a session wrote any counted model
+# (through the unit of work or bulk INSERT/UPDATE/DELETE statements) and
+# clear the cache once that transaction commits.
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_flushed_writes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _COUNTED_MODELS):
+            session.info['dashboard_stale'] = True
+            return
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            counted = issubclass(mapper.class_, _COUNTED_MODELS)
+        else:
+            # Core statement on a Table
+            counted = getattr(orm_execute_state.statement, 'table', None) in _COUNTED_TABLES
+        if counted:
+            orm_execute_state.session.info['dashboard_stale'] = True
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop('dashboard_stale', False):
+        DashboardService.invalidate_cache()
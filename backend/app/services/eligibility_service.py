@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from datetime import datetime, date
-from typing import Tuple, Optional
+from typing import Tuple, Optional, List, Dict, Iterable
 from app.models.enrollment import Enrollment, EligibilityStatus
 from app.models.course import Course
 from app.models.student import Student
@@ -157,4 +157,142 @@ class EligibilityService:
         
         # All checks passed
         return EligibilityStatus.ELIGIBLE, None
-
+    
+    @staticmethod
+    def evaluate_many(
+        db: Session,
+        pairs: Iterable[Tuple[int, int]]
+    ) -> Dict[Tuple[int, int], Tuple[EligibilityStatus, Optional[str]]]:
+        """
+        Run all three eligibility checks for many (student_id, course_id) pairs at once.
+        Loads the target courses, their prerequisites and the students' approved enrollments
+        in a fixed number of queries, then decides every pair in memory using the same rules
+        (and the same reasons) as run_all_checks.
+        Returns {(student_id, course_id): (eligibility_status, reason)}
+        """
+        from app.models.enrollment import ApprovalStatus
+        
+        pairs = list(dict.fromkeys(pairs))
+        if not pairs:
+            return {}
+        
+        student_ids = {student_id for student_id, _ in pairs}
+        course_ids = {course_id for _, course_id in pairs}
+        
+        # Target courses, then any prerequisite courses not already loaded
+        courses = {
+            c.id: c for c in db.query(Course).filter(Course.id.in_(course_ids)).all()
+        }
+        prerequisite_ids = {
+            c.prerequisite_course_id for c in courses.values()
+            if c.prerequisite_course_id and c.prerequisite_course_id not in courses
+        }
+        if prerequisite_ids:
+            for c in db.query(Course).filter(Course.id.in_(prerequisite_ids)).all():
+                courses[c.id] = c
+        
+        # Every approved enrollment of these students, with the current name of its course
+        # (outer join so enrollments of deleted courses keep their stored course_name)
+        rows = db.query(
+            Enrollment.student_id,
+            Enrollment.course_id,
+            Enrollment.course_name,
+            Enrollment.completion_status,
+            Enrollment.approved_at,
+            Enrollment.created_at,
+            Course.name.label('joined_course_name')
+        ).outerjoin(Course, Enrollment.course_id == Course.id).filter(
+            Enrollment.student_id.in_(student_ids),
+            Enrollment.approval_status == ApprovalStatus.APPROVED
+        ).order_by(Enrollment.id).all()
+        
+        approved_by_student: Dict[int, List] = {}
+        for row in rows:
+            approved_by_student.setdefault(row.student_id, []).append(row)
+        
+        current_year = date.today().year
+        results = {}
+        for student_id, course_id in pairs:
+            approved = approved_by_student.get(student_id, [])
+            course = courses.get(course_id)
+            
+            eligible, reason = EligibilityService._prerequisite_in_memory(course, courses, approved)
+            if not eligible:
+                results[(student_id, course_id)] = (EligibilityStatus.INELIGIBLE_PREREQUISITE, reason)
+                continue
+            
+            eligible, reason = EligibilityService._duplicate_in_memory(course, course_id, approved)
+            if not eligible:
+                results[(student_id, course_id)] = (EligibilityStatus.INELIGIBLE_DUPLICATE, reason)
+                continue
+            
+            eligible, reason = EligibilityService._annual_limit_in_memory(course_id, approved, current_year)
+            if not eligible:
+                results[(student_id, course_id)] = (EligibilityStatus.INELIGIBLE_ANNUAL_LIMIT, reason)
+                continue
+            
+            results[(student_id, course_id)] = (EligibilityStatus.ELIGIBLE, None)
+        
+        return results
+    
+    @staticmethod
+    def _prerequisite_in_memory(course: Optional[Course], courses: Dict[int, Course], approved: List) -> Tuple[bool, Optional[str]]:
+        """In-memory equivalent of check_prerequisite over preloaded approved enrollments."""
+        from app.models.enrollment import CompletionStatus
+        
+        if not course or not course.prerequisite_course_id:
+            return True, None
+        
+        prerequisite_course = courses.get(course.prerequisite_course_id)
+        prerequisite_name = prerequisite_course.name if prerequisite_course else "Unknown"
+        
+        for e in approved:
+            if e.completion_status != CompletionStatus.COMPLETED:
+                continue
+            if e.course_id == course.prerequisite_course_id or e.course_name == prerequisite_name:
+                return True, None
+        
+        return False, f"Missing prerequisite: {prerequisite_name} (must have passed this course)"
+    
+    @staticmethod
+    def _duplicate_in_memory(course: Optional[Course], course_id: int, approved: List) -> Tuple[bool, Optional[str]]:
+        """In-memory equivalent of check_duplicate over preloaded approved enrollments."""
+        from app.models.enrollment import CompletionStatus
+        
+        if not course:
+            return True, None
+        
+        # course_id != :id is never true for NULL course_id in SQL, so deleted-course rows are skipped
+        existing = [
+            e for e in approved
+            if e.course_id is not None and e.course_id != course_id
+            and (e.joined_course_name == course.name or e.course_name == course.name)
+        ]
+        if not existing:
+            return True, None
+        
+        if any(e.completion_status == CompletionStatus.COMPLETED for e in existing):
+            return False, f"Already completed a batch of {course.name}"
+        elif any(e.completion_status == CompletionStatus.FAILED for e in existing):
+            return False, f"Already taken a batch of {course.name} (failed)"
+        else:
+            return False, f"Already enrolled in a batch of {course.name}"
+    
+    @staticmethod
+    def _annual_limit_in_memory(course_id: int, approved: List, current_year: int) -> Tuple[bool, Optional[str]]:
+        """In-memory equivalent of check_annual_limit over preloaded approved enrollments."""
+        from app.models.enrollment import CompletionStatus
+        
+        for e in approved:
+            if e.course_id is None or e.course_id == course_id:
+                continue
+            if e.completion_status not in (CompletionStatus.COMPLETED, CompletionStatus.FAILED):
+                continue
+            
+            enrollment_date = e.approved_at if e.approved_at else e.created_at
+            if enrollment_date and enrollment_date.year == current_year:
+                course_name = e.course_name or e.joined_course_name or "Unknown"
+                status_text = "completed" if e.completion_status == CompletionStatus.COMPLETED else "taken"
+                return False, f"Already {status_text} another physical course this year: {course_name}"
+        
+        return True, None
@@ -0,0 +1,194 @@
+"""Outbound email queue delivered over reusable SMTP sessions."""
+import time
+import queue
+import smtplib
+import logging
+import threading
+from concurrent.futures import Future
+from email.message import Message
+from typing import List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Queue marker telling a worker to close its session and exit
+_STOP = object()
+
+class _Delivery:
+    """A queued message and the future its sender waits on."""
+
+    def __init__(self, message: Message):
+        self.message = message
+        self.future: Future = Future()
+
+class EmailDeliveryQueue:
+    """
+    Queue of outbound messages drained by a small pool of worker threads.
+
+    Each worker keeps one authenticated SMTP session open and sends everything
+    it finds on the queue (up to SMTP_BATCH_SIZE messages at a time) over it,
+    closing the session after SMTP_IDLE_TIMEOUT_SECONDS without mail.
+    Transient failures (dropped connections, 4xx replies) reconnect and retry
+    with exponential backoff; permanent 5xx rejections fail immediately.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def submit(self, message: Message) -> Future:
+        """
+        Queue a message for delivery.
+
+        Returns:
+            Future resolving to True once the message is accepted by the server,
+            or False if delivery failed for good
+        """
+        self._ensure_workers()
+        delivery = _Delivery(message)
+        self._queue.put(delivery)
+        return delivery.future
+
+    def send(self, messages: List[Message], timeout: Optional[float] = None) -> List[bool]:
+        """
+        Queue messages and wait for all of them to be delivered.
+
+        Args:
+            messages: Messages to send
+            timeout: Seconds to wait for the whole batch (default SMTP_DELIVERY_TIMEOUT_SECONDS)
+
+        Returns:
+            Delivery result per message, in order (False for messages still pending at the timeout)
+        """
+        futures = [self.submit(message) for message in messages]
+        deadline = time.monotonic() + (timeout if timeout is not None else settings.SMTP_DELIVERY_TIMEOUT_SECONDS)
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+            except Exception:
+                logger.error("Timed out waiting for an email to be delivered")
+                results.append(False)
+        return results
+
+    def stop(self, wait: bool = True):
+        """Let the workers finish queued mail, close their sessions and exit."""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put(_STOP)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _ensure_workers(self):
+        """Start the worker threads on first use, replacing any that died."""
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            for index in range(len(self._workers), max(settings.SMTP_DELIVERY_WORKERS, 1)):
+                worker = threading.Thread(target=self._work, name=f"smtp-delivery-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _work(self):
+        """Worker loop: take batches off the queue and send them over one session."""
+        connection = None
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=settings.SMTP_IDLE_TIMEOUT_SECONDS)
+            except queue.Empty:
+                connection = self._close(connection)
+                continue
+            if first is _STOP:
+                break
+
+            batch = [first]
+            while len(batch) < settings.SMTP_BATCH_SIZE:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            for delivery in batch:
+                try:
+                    connection, delivered = self._deliver(connection, delivery.message)
+                except Exception as e:
+                    # Never let one message end the worker and strand the rest of the queue
+                    logger.error(f"Unexpected error delivering email: {str(e)}")
+                    connection, delivered = self._close(connection), False
+                delivery.future.set_result(delivered)
+            logger.debug(f"Delivered a batch of {len(batch)} email(s)")
+
+        self._close(connection)
+
+    def _deliver(self, connection: Optional[smtplib.SMTP], message: Message):
+        """
+        Send one message, reconnecting and retrying transient failures.
+
+        Returns:
+            (connection to reuse or None, whether the message was accepted)
+        """
+        recipient = message.get('To')
+        for attempt in range(settings.SMTP_MAX_RETRIES + 1):
+            try:
+                if connection is None:
+                    connection = self._connect()
+                connection.send_message(message)
+                logger.info(f"Email sent successfully to {recipient}: {message.get('Subject')}")
+                return connection, True
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                code = getattr(e, 'smtp_code', 550)
+                if code >= 500:
+                    logger.error(f"Failed to send email to {recipient}: {str(e)}")
+                    # The session is still usable after a rejected message
+                    if isinstance(e, smtplib.SMTPAuthenticationError):
+                        connection = self._close(connection)
+                    return connection, False
+                error = e
+            except (smtplib.SMTPException, OSError) as e:
+                error = e
+            except Exception as e:
+                # Not a delivery problem (e.g. a malformed message): retrying would not
+                # help, and the session may be left mid-transaction
+                logger.error(f"Failed to send email to {recipient}: {str(e)}")
+                return self._close(connection), False
+
+            connection = self._close(connection)
+            if attempt < settings.SMTP_MAX_RETRIES:
+                delay = settings.SMTP_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+                logger.warning(f"Retrying email to {recipient} in {delay}s after error: {str(error)}")
+                time.sleep(delay)
+
+        logger.error(f"Failed to send email to {recipient} after {settings.SMTP_MAX_RETRIES + 1} attempt(s): {str(error)}")
+        return connection, False
+
+    @staticmethod
+    def _connect() -> smtplib.SMTP:
+        """Open an authenticated SMTP session."""
+        connection = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        try:
+            if settings.SMTP_USE_TLS:
+                connection.starttls()
+            connection.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        except Exception:
+            EmailDeliveryQueue._close(connection)
+            raise
+        return connection
+
+    @staticmethod
+    def _close(connection: Optional[smtplib.SMTP]) -> None:
+        """Close a session, ignoring errors from connections that already dropped."""
+        if connection is not None:
+            try:
+                connection.quit()
+            except Exception:
+                connection.close()
+        return None
+
+delivery_queue = EmailDeliveryQueue()
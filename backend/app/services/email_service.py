@@ -1,10 +1,11 @@
 """Email service for sending class reminders."""
-import smtplib
+from email.message import Message
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from app.core.config import settings
+from app.services.email_delivery import delivery_queue
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,6 +24,53 @@ class EmailService:
             settings.SMTP_FROM_EMAIL
         )
     
+    @staticmethod
+    def build_message(
+        to_email: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None
+    ) -> Message:
+        """
+        Build an email message.
+        
+        Args:
+            to_email: Recipient email address
+            subject: Email subject
+            body: Plain text email body
+            html_body: Optional HTML email body
+        """
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = settings.SMTP_FROM_EMAIL
+        msg['To'] = to_email
+        
+        # Add plain text part
+        text_part = MIMEText(body, 'plain')
+        msg.attach(text_part)
+        
+        # Add HTML part if provided
+        if html_body:
+            html_part = MIMEText(html_body, 'html')
+            msg.attach(html_part)
+        return msg
+    
+    @staticmethod
+    def send_messages(messages: List[Message]) -> List[bool]:
+        """
+        Send many messages through the delivery queue, which batches them over
+        reused SMTP sessions and retries transient failures.
+        
+        Returns:
+            Whether each message was sent, in order
+        """
+        if not EmailService.is_enabled():
+            logger.warning("Email service is not enabled or not configured. Skipping email send.")
+            return [False] * len(messages)
+        if not messages:
+            return []
+        return delivery_queue.send(messages)
+    
     @staticmethod
     def send_email(
         to_email: str,
@@ -47,35 +95,17 @@ class EmailService:
             return False
         
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = settings.SMTP_FROM_EMAIL
-            msg['To'] = to_email
-            
-            # Add plain text part
-            text_part = MIMEText(body, 'plain')
-            msg.attach(text_part)
-            
-            # Add HTML part if provided
-            if html_body:
-                html_part = MIMEText(html_body, 'html')
-                msg.attach(html_part)
-            
-            # Send email
-            with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-                if settings.SMTP_USE_TLS:
-                    server.starttls()
-                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                server.send_message(msg)
-            
-            logger.info(f"Email sent successfully to {to_email}: {subject}")
-            return True
-            
+            msg = EmailService.build_message(to_email, subject, body, html_body)
+            return EmailService.send_messages([msg])[0]
         except Exception as e:
             logger.error(f"Failed to send email to {to_email}: {str(e)}")
             return False
     
+    @staticmethod
+    def shutdown():
+        """Deliver queued mail and close SMTP sessions (called on application shutdown)."""
+        delivery_queue.stop()
+    
     @staticmethod
     def send_class_reminder(
         admin_email: str,
@@ -101,6 +131,31 @@ class EmailService:
         Returns:
             True if email was sent successfully, False otherwise
         """
+        msg = EmailService.build_class_reminder(admin_email, course_name, batch_code, class_time, start_time, end_time, day)
+        return EmailService.send_messages([msg])[0]
+    
+    @staticmethod
+    def build_class_reminder(
+        admin_email: str,
+        course_name: str,
+        batch_code: str,
+        class_time: datetime,
+        start_time: str,
+        end_time: str,
+        day: str
+    ) -> Message:
+        """
+        Build a class reminder email to the admin.
+        
+        Args:
+            admin_email: Admin email address
+            course_name: Name of the course
+            batch_code: Batch code
+            class_time: DateTime of the class
+            start_time: Start time (HH:MM format)
+            end_time: End time (HH:MM format)
+            day: Day of the week
+        """
         # Format the class time
         time_str = class_time.strftime("%B %d, %Y at %I:%M %p")
         
@@ -142,7 +197,7 @@ Please ensure you are prepared for the class.
         </html>
         """
         
-        return EmailService.send_email(
+        return EmailService.build_message(
             to_email=admin_email,
             subject=subject,
             body=body,
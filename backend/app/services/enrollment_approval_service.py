@@ -0,0 +1,151 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import update, case, func
+from datetime import datetime
+from typing import Dict, Iterable, List
+from fastapi import HTTPException
+from app.models.enrollment import Enrollment, ApprovalStatus, EligibilityStatus
+from app.models.course import Course
+
+class EnrollmentApprovalService:
+    """
+    Service for approving enrollments against course seat limits.
+
+    Seats are only granted while the course row is locked (SELECT ... FOR
+    UPDATE), and seat counters are only changed with atomic
+    current_enrolled + n updates, so concurrent approvals cannot oversubscribe
+    a course or lose each other's updates.
+    """
+
+    @staticmethod
+    def lock_courses(db: Session, course_ids: Iterable[int]) -> Dict[int, Course]:
+        """Lock the given courses until the transaction ends; returns them by id with fresh seat counts."""
+        course_ids = sorted(set(course_ids))
+        if not course_ids:
+            return {}
+        # Locking in id order keeps concurrent transactions from deadlocking
+        courses = db.query(Course).filter(
+            Course.id.in_(course_ids)
+        ).order_by(Course.id).with_for_update().populate_existing().all()
+        return {course.id: course for course in courses}
+
+    @staticmethod
+    def available_seats(course: Course) -> int:
+        """Seats left in a course (never negative)."""
+        return max((course.seat_limit or 0) - (course.current_enrolled or 0), 0)
+
+    @staticmethod
+    def adjust_seats(db: Session, changes: Dict[int, int]) -> None:
+        """Add changes[course_id] (negative to release) to each course's current_enrolled in one UPDATE."""
+        changes = {course_id: n for course_id, n in changes.items() if n}
+        if not changes:
+            return
+        db.execute(
+            update(Course)
+            .where(Course.id.in_(list(changes)))
+            .values(current_enrolled=func.greatest(
+                func.coalesce(Course.current_enrolled, 0) + case(changes, value=Course.id, else_=0),
+                0
+            ))
+            .execution_options(synchronize_session="fetch")
+        )
+
+    @staticmethod
+    def reserve_seat(db: Session, course_id: int) -> bool:
+        """
+        Take one seat in a course if one is available.
+
+        The course stays locked until the caller commits, so the seat check and
+        the increment cannot interleave with another approval.
+        """
+        course = EnrollmentApprovalService.lock_courses(db, [course_id]).get(course_id)
+        if course is None or EnrollmentApprovalService.available_seats(course) < 1:
+            return False
+        EnrollmentApprovalService.adjust_seats(db, {course_id: 1})
+        return True
+
+    @staticmethod
+    def release_seat(db: Session, course_id: int) -> None:
+        """Give back one seat in a course."""
+        EnrollmentApprovalService.adjust_seats(db, {course_id: -1})
+
+    @staticmethod
+    def bulk_approve(db: Session, enrollment_ids: List[int], approved: bool, approved_by: str) -> dict:
+        """
+        Approve or reject enrollments as one transaction.
+
+        The enrollments and their courses are locked once. Approvals are granted
+        in request order until each course's remaining seats run out. The changes
+        are then written with one UPDATE per outcome and one seat counter UPDATE.
+        Rejecting an approved enrollment gives its seat back.
+
+        Returns:
+            Dictionary with approved/rejected counts, errors and a per-enrollment
+            results list ({enrollment_id, outcome, error}) in request order
+        """
+        enrollment_ids = list(dict.fromkeys(enrollment_ids))
+        enrollments = db.query(Enrollment).filter(
+            Enrollment.id.in_(enrollment_ids)
+        ).order_by(Enrollment.id).with_for_update().populate_existing().all()
+
+        if len(enrollments) != len(enrollment_ids):
+            raise HTTPException(status_code=404, detail="Some enrollments not found")
+
+        by_id = {enrollment.id: enrollment for enrollment in enrollments}
+        courses = EnrollmentApprovalService.lock_courses(db, [e.course_id for e in enrollments]) if approved else {}
+        remaining = {course_id: EnrollmentApprovalService.available_seats(course) for course_id, course in courses.items()}
+
+        results = {"approved": 0, "rejected": 0, "errors": [], "results": []}
+        granted: List[int] = []
+        rejected: List[int] = []
+        seat_changes: Dict[int, int] = {}
+
+        for enrollment_id in enrollment_ids:
+            enrollment = by_id[enrollment_id]
+            error = None
+            if enrollment.eligibility_status != EligibilityStatus.ELIGIBLE:
+                error = f"Not eligible: {enrollment.eligibility_status}"
+            elif approved:
+                if enrollment.approval_status == ApprovalStatus.APPROVED:
+                    error = "Already approved"
+                elif remaining.get(enrollment.course_id, 0) < 1:
+                    error = "No available seats"
+                else:
+                    remaining[enrollment.course_id] -= 1
+                    seat_changes[enrollment.course_id] = seat_changes.get(enrollment.course_id, 0) + 1
+                    granted.append(enrollment_id)
+            else:
+                if enrollment.approval_status == ApprovalStatus.APPROVED:
+                    seat_changes[enrollment.course_id] = seat_changes.get(enrollment.course_id, 0) - 1
+                rejected.append(enrollment_id)
+
+            if error:
+                results["errors"].append({"enrollment_id": enrollment_id, "error": error})
+                results["results"].append({"enrollment_id": enrollment_id, "outcome": "error", "error": error})
+            else:
+                results["results"].append({
+                    "enrollment_id": enrollment_id,
+                    "outcome": "approved" if approved else "rejected",
+                    "error": None
+                })
+
+        if granted:
+            db.execute(
+                update(Enrollment)
+                .where(Enrollment.id.in_(granted))
+                .values(
+                    approval_status=ApprovalStatus.APPROVED,
+                    approved_by=approved_by,
+                    approved_at=datetime.utcnow()
+                )
+            )
+        if rejected:
+            db.execute(
+                update(Enrollment)
+                .where(Enrollment.id.in_(rejected))
+                .values(approval_status=ApprovalStatus.REJECTED)
+            )
+        EnrollmentApprovalService.adjust_seats(db, seat_changes)
+
+        results["approved"] = len(granted)
+        results["rejected"] = len(rejected)
+        return results
@@ -0,0 +1,188 @@
+import os
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.services.import_service import ImportService
+
+logger = logging.getLogger(__name__)
+
+# Job types
+ENROLLMENT_IMPORT = "enrollments"
+EMPLOYEE_IMPORT = "employees"
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+class ImportJobService:
+    """
+    Run file imports in a background worker pool and track their progress.
+
+    Jobs live in process memory, so a job id can only be polled on the
+    API process that accepted the upload.
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _jobs: Dict[str, Dict] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _get_executor() -> ThreadPoolExecutor:
+        """Create the worker pool on first use."""
+        with ImportJobService._lock:
+            if ImportJobService._executor is None:
+                ImportJobService._executor = ThreadPoolExecutor(
+                    max_workers=settings.IMPORT_JOB_WORKERS,
+                    thread_name_prefix="import-job"
+                )
+            return ImportJobService._executor
+
+    @staticmethod
+    def submit(job_type: str, file_path: str, filename: str, course_id: Optional[int] = None) -> Dict:
+        """
+        Queue an uploaded file for background processing.
+
+        The worker owns the file from here on and removes it when done.
+
+        Returns:
+            Snapshot of the new job
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'type': job_type,
+            'filename': filename,
+            'course_id': course_id,
+            'file_path': file_path,
+            'status': QUEUED,
+            'results': None,
+            'error': None,
+            'created_at': datetime.utcnow(),
+            'started_at': None,
+            'finished_at': None,
+        }
+        with ImportJobService._lock:
+            ImportJobService._prune_finished_jobs()
+            ImportJobService._jobs[job_id] = job
+            snapshot = ImportJobService._snapshot(job)
+
+        future = ImportJobService._get_executor().submit(ImportJobService._run, job_id)
+        future.add_done_callback(lambda f: ImportJobService._on_done(job_id, f))
+        return snapshot
+
+    @staticmethod
+    def get_job(job_id: str) -> Optional[Dict]:
+        """Get the current state of a job, or None if it is unknown."""
+        with ImportJobService._lock:
+            job = ImportJobService._jobs.get(job_id)
+            return ImportJobService._snapshot(job) if job else None
+
+    @staticmethod
+    def list_active_jobs() -> List[Dict]:
+        """Get all queued and running jobs, oldest first."""
+        with ImportJobService._lock:
+            jobs = [job for job in ImportJobService._jobs.values() if job['status'] in ACTIVE_STATUSES]
+            return [ImportJobService._snapshot(job, include_errors=False) for job in jobs]
+
+    @staticmethod
+    def shutdown(wait: bool = False):
+        """Stop the worker pool (called on application shutdown); queued jobs are cancelled."""
+        with ImportJobService._lock:
+            executor = ImportJobService._executor
+            ImportJobService._executor = None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    @staticmethod
+    def _run(job_id: str):
+        """Worker entry point: process the file with its own database session."""
+        with ImportJobService._lock:
+            job = ImportJobService._jobs[job_id]
+            job['status'] = RUNNING
+            job['started_at'] = datetime.utcnow()
+            # Shared with the processor so progress is visible while it runs
+            job['results'] = {}
+
+        db = SessionLocal()
+        try:
+            if job['type'] == ENROLLMENT_IMPORT:
+                records = ImportService.iter_records(job['file_path'])
+                ImportService.process_incoming_enrollments(db, records, job['course_id'], results=job['results'])
+            else:
+                records = ImportService.iter_records(job['file_path'], include_experience=True)
+                ImportService.process_employee_imports(db, records, results=job['results'])
+            status, error = COMPLETED, None
+        except Exception as e:
+            logger.error(f"Import job {job_id} failed: {str(e)}")
+            db.rollback()
+            status = FAILED
+            # Don't expose internal error details for enrollment imports
+            if job['type'] == ENROLLMENT_IMPORT:
+                error = "Error processing file. Please check the file format and try again."
+            else:
+                error = f"Error processing file: {str(e)}"
+        finally:
+            db.close()
+            if os.path.exists(job['file_path']):
+                os.remove(job['file_path'])
+
+        with ImportJobService._lock:
+            job['status'] = status
+            job['error'] = error
+            job['finished_at'] = datetime.utcnow()
+
+    @staticmethod
+    def _on_done(job_id: str, future):
+        """Fail a job whose queued work was cancelled before it ran, and remove its file."""
+        if not future.cancelled():
+            return
+        with ImportJobService._lock:
+            job = ImportJobService._jobs[job_id]
+            job['status'] = FAILED
+            job['error'] = "Import cancelled because the server shut down. Please upload the file again."
+            job['finished_at'] = datetime.utcnow()
+        if os.path.exists(job['file_path']):
+            os.remove(job['file_path'])
+
+    @staticmethod
+    def _prune_finished_jobs():
+        """Forget finished jobs older than the retention window (caller holds the lock)."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.IMPORT_JOB_RETENTION_SECONDS)
+        expired = [
+            job_id for job_id, job in ImportJobService._jobs.items()
+            if job['finished_at'] and job['finished_at'] < cutoff
+        ]
+        for job_id in expired:
+            del ImportJobService._jobs[job_id]
+
+    @staticmethod
+    def _snapshot(job: Dict, include_errors: bool = True) -> Dict:
+        """Build a JSON-friendly copy of a job (caller holds the lock)."""
+        results = job['results'] or {}
+        errors = list(results.get('errors', []))
+        snapshot = {
+            'job_id': job['job_id'],
+            'type': job['type'],
+            'filename': job['filename'],
+            'course_id': job['course_id'],
+            'status': job['status'],
+            'rows_processed': results.get('total', 0),
+            'error_count': len(errors),
+            'created_at': job['created_at'].isoformat(),
+            'started_at': job['started_at'].isoformat() if job['started_at'] else None,
+            'finished_at': job['finished_at'].isoformat() if job['finished_at'] else None,
+        }
+        if include_errors:
+            snapshot['errors'] = errors
+            snapshot['error'] = job['error']
+            snapshot['results'] = dict(results, errors=errors) if job['status'] == COMPLETED else None
+        return snapshot
@@ -1,44 +1,158 @@
+import os
 import pandas as pd
+from openpyxl import load_workbook
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
 from datetime import datetime, date
 from app.models.enrollment import IncomingEnrollment
 from app.models.student import Student, SBU
 from app.models.course import Course
 from app.services.eligibility_service import EligibilityService
 from app.models.enrollment import Enrollment, EligibilityStatus, ApprovalStatus
+from app.core.metrics import IMPORT_DURATION
 import json
+from itertools import islice
+
+# Rows per DataFrame chunk when reading import files
+IMPORT_CHUNK_ROWS = 5000
+
+# Rows per INSERT ... ON CONFLICT statement when importing employees
+EMPLOYEE_UPSERT_CHUNK_SIZE = 1000
+
+# SBU enum names, used to map free-text SBU values from import files
+_SBU_NAMES = {e.name for e in SBU}
 
 class ImportService:
     """Service for importing enrollment data from Microsoft Forms or Excel."""
     
     @staticmethod
-    def parse_excel(file_path: str) -> List[Dict]:
-        """Parse Excel file and return list of enrollment records (for interest submissions)."""
-        try:
-            df = pd.read_excel(file_path)
+    def read_chunks(file_path: str, chunk_size: int = IMPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Read an uploaded sheet as DataFrames of at most chunk_size rows, with normalized column names.
+        CSV files are read with pandas' chunked reader and .xlsx files through openpyxl's read-only
+        mode, so memory does not grow with the file. Legacy .xls files are read whole.
+        Always yields at least one (possibly empty) DataFrame so callers can inspect the columns.
+        """
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == '.csv':
+            chunks = pd.read_csv(file_path, chunksize=chunk_size)
+        elif ext == '.xls':
+            chunks = [pd.read_excel(file_path)]
+        else:
+            chunks = ImportService._read_xlsx_chunks(file_path, chunk_size)
+        
+        for df in chunks:
             # Normalize column names (handle variations)
             df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+            yield df
+    
+    @staticmethod
+    def _read_xlsx_chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Stream the first worksheet of an .xlsx file in read-only mode as DataFrame chunks."""
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            columns = [f"Unnamed: {i}" if h is None else str(h) for i, h in enumerate(header)]
+            width = len(columns)
             
-            records = []
-            for _, row in df.iterrows():
-                record = {
-                    'employee_id': str(row.get('employee_id', '')).strip(),
-                    'name': str(row.get('name', '')).strip(),
-                    'email': str(row.get('email', '')).strip(),
-                    'sbu': str(row.get('sbu', '')).strip() if pd.notna(row.get('sbu')) else '',
-                    'designation': str(row.get('designation', '')).strip() if pd.notna(row.get('designation')) else '',
-                }
-                # Handle career_start_date
-                if pd.notna(row.get('career_start_date')):
-                    record['career_start_date'] = row.get('career_start_date')
-                # Handle bs_join_date or bs_joining_date (both variations)
-                bs_date = row.get('bs_join_date') if pd.notna(row.get('bs_join_date')) else row.get('bs_joining_date')
-                if pd.notna(bs_date):
-                    record['bs_joining_date'] = bs_date
-                records.append(record)
+            batch = []
+            blank_rows = []  # Held back so trailing empty rows are dropped, like pd.read_excel
+            offset = 0
+            yielded = False
+            for row in rows:
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                if all(value is None for value in row):
+                    blank_rows.append(row)
+                    continue
+                batch.extend(blank_rows)
+                blank_rows = []
+                batch.append(row)
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame.from_records(batch, columns=columns, index=pd.RangeIndex(offset, offset + len(batch)))
+                    offset += len(batch)
+                    batch = []
+                    yielded = True
             
-            return records
+            if batch or not yielded:
+                yield pd.DataFrame.from_records(batch, columns=columns, index=pd.RangeIndex(offset, offset + len(batch)))
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def iter_records(file_path: str, include_experience: bool = False) -> Iterator[Dict]:
+        """Yield normalized import records from an Excel/CSV file, one chunk at a time."""
+        for df in ImportService.read_chunks(file_path):
+            yield from ImportService._frame_to_records(df, include_experience=include_experience)
+    
+    @staticmethod
+    def _frame_to_records(df: pd.DataFrame, include_experience: bool = False) -> List[Dict]:
+        """
+        Normalize an import sheet column by column and return one dict per row.
+        Text columns are cast and stripped as whole columns, the bs_join_date/bs_joining_date
+        aliases are coalesced and date columns are parsed once per column. Date keys are only
+        set on rows that have a value. Expects column names already normalized by read_chunks.
+        """
+        def text(col: str, keep_missing: bool) -> pd.Series:
+            if col not in df.columns:
+                return pd.Series('', index=df.index, dtype=object)
+            values = df[col].astype(str).str.strip()
+            # Required columns keep str() of missing cells, optional ones become ''
+            return values if keep_missing else values.where(df[col].notna(), '')
+        
+        columns = {
+            'employee_id': text('employee_id', True),
+            'name': text('name', True),
+            'email': text('email', True),
+            'sbu': text('sbu', False),
+            'designation': text('designation', False),
+        }
+        if include_experience:
+            if 'experience_years' not in df.columns:
+                columns['experience_years'] = pd.Series(0, index=df.index)
+            elif pd.api.types.is_numeric_dtype(df['experience_years']):
+                columns['experience_years'] = df['experience_years'].fillna(0).astype(int)
+            else:
+                columns['experience_years'] = df['experience_years'].map(lambda v: int(v) if pd.notna(v) else 0)
+        
+        records = pd.DataFrame(columns, index=df.index).to_dict('records')
+        
+        # Handle bs_join_date or bs_joining_date (both variations)
+        bs_dates = df.get('bs_join_date')
+        if 'bs_joining_date' in df.columns:
+            bs_dates = df['bs_joining_date'] if bs_dates is None else bs_dates.where(bs_dates.notna(), df['bs_joining_date'])
+        
+        for key, raw in (('career_start_date', df.get('career_start_date')), ('bs_joining_date', bs_dates)):
+            if raw is None:
+                continue
+            for record, value in zip(records, ImportService._parse_date_column(raw)):
+                if value is not None:
+                    record[key] = value
+        
+        return records
+    
+    @staticmethod
+    def _parse_date_column(raw: pd.Series) -> List[Optional[date]]:
+        """Parse a column of date cells to dates (None where missing or unparseable)."""
+        if pd.api.types.is_datetime64_any_dtype(raw):
+            parsed = raw
+        else:
+            # Fast path infers one format for the column; cells in other formats are retried individually
+            parsed = pd.to_datetime(raw, errors='coerce')
+            retry = parsed.isna() & raw.notna()
+            if retry.any():
+                parsed = parsed.astype(object)
+                parsed[retry] = pd.to_datetime(raw[retry].astype(str), errors='coerce', format='mixed')
+                parsed = pd.to_datetime(parsed, errors='coerce')
+        return parsed.dt.date.where(parsed.notna(), None).tolist()
+    
+    @staticmethod
+    def parse_excel(file_path: str) -> List[Dict]:
+        """Parse Excel file and return list of enrollment records (for interest submissions)."""
+        try:
+            return list(ImportService.iter_records(file_path))
         except Exception as e:
             raise ValueError(f"Error parsing Excel file: {str(e)}")
     
@@ -46,28 +160,7 @@ class ImportService:
     def parse_csv(file_path: str) -> List[Dict]:
         """Parse CSV file and return list of enrollment records (for interest submissions)."""
         try:
-            df = pd.read_csv(file_path)
-            df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-            
-            records = []
-            for _, row in df.iterrows():
-                record = {
-                    'employee_id': str(row.get('employee_id', '')).strip(),
-                    'name': str(row.get('name', '')).strip(),
-                    'email': str(row.get('email', '')).strip(),
-                    'sbu': str(row.get('sbu', '')).strip() if pd.notna(row.get('sbu')) else '',
-                    'designation': str(row.get('designation', '')).strip() if pd.notna(row.get('designation')) else '',
-                }
-                # Handle career_start_date
-                if pd.notna(row.get('career_start_date')):
-                    record['career_start_date'] = row.get('career_start_date')
-                # Handle bs_join_date or bs_joining_date (both variations)
-                bs_date = row.get('bs_join_date') if pd.notna(row.get('bs_join_date')) else row.get('bs_joining_date')
-                if pd.notna(bs_date):
-                    record['bs_joining_date'] = bs_date
-                records.append(record)
-            
-            return records
+            return list(ImportService.iter_records(file_path))
         except Exception as e:
             raise ValueError(f"Error parsing CSV file: {str(e)}")
     
@@ -78,17 +171,11 @@ class ImportService:
         student = db.query(Student).filter(Student.employee_id == employee_id).first()
         
         if not student:
-            # Map SBU string to enum
-            try:
-                sbu_enum = SBU[sbu.upper()] if sbu.upper() in [e.name for e in SBU] else SBU.OTHER
-            except:
-                sbu_enum = SBU.OTHER
-            
             student = Student(
                 employee_id=employee_id,
                 name=name,
                 email=email,
-                sbu=sbu_enum,
+                sbu=ImportService._map_sbu(sbu),
                 designation=designation
             )
             db.add(student)
@@ -116,38 +203,71 @@ class ImportService:
         return query.first()
     
     @staticmethod
-    def find_student_by_employee_id_or_email(db: Session, employee_id: str, email: str) -> Optional[Student]:
-        """Find existing student by employee_id or email."""
-        student = db.query(Student).filter(Student.employee_id == employee_id).first()
-        if not student:
-            student = db.query(Student).filter(Student.email == email).first()
-        return student
+    def find_students_by_employee_id_or_email(db: Session, records: List[Dict]) -> Tuple[Dict[str, Student], Dict[str, Student]]:
+        """
+        Find existing students for a batch of records by employee_id or email (one query).
+        
+        Returns:
+            Two dictionaries of the matching students, keyed by employee_id and by email
+        """
+        employee_ids = {record['employee_id'] for record in records}
+        emails = {record['email'] for record in records}
+        if not employee_ids:
+            return {}, {}
+        students = db.query(Student).filter(
+            or_(Student.employee_id.in_(employee_ids), Student.email.in_(emails))
+        ).all()
+        return {s.employee_id: s for s in students}, {s.email: s for s in students}
     
     @staticmethod
-    def process_incoming_enrollments(db: Session, records: List[Dict], course_id: int) -> Dict:
+    @IMPORT_DURATION.labels(kind="enrollments").time()
+    def process_incoming_enrollments(db: Session, records: Iterable[Dict], course_id: int, results: Optional[Dict] = None) -> Dict:
         """
         Process incoming enrollment records for a specific course:
         1. Store in incoming_enrollments table
         2. Find existing students (by employee_id or email) - don't create new ones
-        3. Run eligibility checks
+        3. Run eligibility checks (batched across all records)
         4. Create enrollment records
+        
+        Students are looked up once per chunk of IMPORT_CHUNK_ROWS records and the
+        course's existing enrollments once per import. If a results dict is passed
+        it is filled in place, so callers can watch progress while the import runs.
         """
         # Get the course
         course = db.query(Course).filter(Course.id == course_id).first()
         if not course:
             raise ValueError(f"Course with ID {course_id} not found")
         
-        results = {
-            'total': len(records),
+        if results is None:
+            results = {}
+        results.update({
+            'total': 0,
             'processed': 0,
             'errors': [],
             'eligible': 0,
             'ineligible': 0,
             'not_found': 0
+        })
+        
+        # Students already enrolled in the course (one query); rows for them,
+        # or repeated later in the file, are stored but not enrolled again
+        enrolled_student_ids = {
+            student_id for (student_id,) in
+            db.query(Enrollment.student_id).filter(Enrollment.course_id == course.id)
         }
         
-        for record in records:
-            try:
+        # Records that passed validation, waiting for the batched eligibility check
+        pending = []
+        
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, IMPORT_CHUNK_ROWS))
+            if not chunk:
+                break
+            
+            valid = []
+            for record in chunk:
+                results['total'] += 1
                 # Validate required fields
                 if not all([record.get('employee_id'), record.get('name'), record.get('email')]):
                     results['errors'].append({
@@ -155,80 +275,79 @@ class ImportService:
                         'error': 'Missing required fields (employee_id, name, email)'
                     })
                     continue
-                
-                # Find existing student (don't create new ones)
-                student = ImportService.find_student_by_employee_id_or_email(
-                    db, 
-                    record['employee_id'],
-                    record['email']
-                )
-                
-                if not student:
-                    results['errors'].append({
-                        'record': record,
-                        'error': f"Employee not found in database (employee_id: {record['employee_id']}, email: {record['email']})"
-                    })
-                    results['not_found'] += 1
-                    continue
-                
-                # Update student's career_start_date and bs_joining_date if provided
-                if record.get('career_start_date'):
-                    try:
-                        if isinstance(record['career_start_date'], str):
-                            career_date = pd.to_datetime(record['career_start_date']).date()
-                        elif isinstance(record['career_start_date'], (datetime, pd.Timestamp)):
-                            career_date = record['career_start_date'].date() if hasattr(record['career_start_date'], 'date') else pd.to_datetime(record['career_start_date']).date()
-                        else:
-                            career_date = record['career_start_date']
-                        student.career_start_date = career_date
-                    except Exception:
-                        pass  # Skip if date parsing fails
-                
-                if record.get('bs_joining_date'):
-                    try:
-                        if isinstance(record['bs_joining_date'], str):
-                            bs_date = pd.to_datetime(record['bs_joining_date']).date()
-                        elif isinstance(record['bs_joining_date'], (datetime, pd.Timestamp)):
-                            bs_date = record['bs_joining_date'].date() if hasattr(record['bs_joining_date'], 'date') else pd.to_datetime(record['bs_joining_date']).date()
-                        else:
-                            bs_date = record['bs_joining_date']
-                        student.bs_joining_date = bs_date
-                    except Exception:
-                        pass  # Skip if date parsing fails
-                
-                # Store in incoming_enrollments
-                incoming = IncomingEnrollment(
-                    employee_id=record['employee_id'],
-                    name=record['name'],
-                    email=record['email'],
-                    sbu=record.get('sbu'),
-                    designation=record.get('designation'),
-                    course_name=course.name,
-                    batch_code=course.batch_code,
-                    raw_data=json.dumps(record)
-                )
-                db.add(incoming)
-                db.flush()
-                
-                # Check if enrollment already exists
-                existing_enrollment = db.query(Enrollment).filter(
-                    Enrollment.student_id == student.id,
-                    Enrollment.course_id == course.id
-                ).first()
-                
-                if existing_enrollment:
+                valid.append(record)
+            
+            # Find existing students for the whole chunk (don't create new ones)
+            by_employee_id, by_email = ImportService.find_students_by_employee_id_or_email(db, valid)
+            
+            for record in valid:
+                try:
+                    student = by_employee_id.get(record['employee_id']) or by_email.get(record['email'])
+                    
+                    if not student:
+                        results['errors'].append({
+                            'record': record,
+                            'error': f"Employee not found in database (employee_id: {record['employee_id']}, email: {record['email']})"
+                        })
+                        results['not_found'] += 1
+                        continue
+                    
+                    # Update student's career_start_date and bs_joining_date if provided
+                    if record.get('career_start_date'):
+                        career_date = ImportService._parse_date(record['career_start_date'])
+                        if career_date:
+                            student.career_start_date = career_date
+                    
+                    if record.get('bs_joining_date'):
+                        bs_date = ImportService._parse_date(record['bs_joining_date'])
+                        if bs_date:
+                            student.bs_joining_date = bs_date
+                    
+                    # Store in incoming_enrollments (written with the other rows in one flush)
+                    incoming = IncomingEnrollment(
+                        employee_id=record['employee_id'],
+                        name=record['name'],
+                        email=record['email'],
+                        sbu=record.get('sbu'),
+                        designation=record.get('designation'),
+                        course_name=course.name,
+                        batch_code=course.batch_code,
+                        raw_data=json.dumps(record, default=str)
+                    )
+                    db.add(incoming)
+                    
+                    # Check if enrollment already exists (in the database or earlier in this file)
+                    if student.id in enrolled_student_ids:
+                        results['errors'].append({
+                            'record': record,
+                            'error': f"Enrollment already exists for {student.name} in {course.name}"
+                        })
+                        incoming.processed = True
+                        incoming.processed_at = datetime.utcnow()
+                        continue
+                    
+                    enrolled_student_ids.add(student.id)
+                    pending.append((record, student, incoming))
+                    
+                except Exception as e:
                     results['errors'].append({
                         'record': record,
-                        'error': f"Enrollment already exists for {student.name} in {course.name}"
+                        'error': str(e)
                     })
-                    incoming.processed = True
-                    incoming.processed_at = datetime.utcnow()
-                    continue
-                
-                # Run eligibility checks
-                eligibility_status, reason = EligibilityService.run_all_checks(
-                    db, student.id, course.id
-                )
+        
+        # Insert the incoming rows together so the enrollments can reference their ids
+        db.flush()
+        
+        # Run eligibility checks for the whole file in one pass.
+        # New enrollments are PENDING and checks only consider APPROVED ones,
+        # so rows in the same file cannot affect each other's eligibility.
+        eligibility = EligibilityService.evaluate_many(
+            db, [(student.id, course.id) for _, student, _ in pending]
+        )
+        
+        for record, student, incoming in pending:
+            try:
+                eligibility_status, reason = eligibility[(student.id, course.id)]
                 
                 # Create enrollment record
                 # All enrollments start as PENDING (even if ineligible) so admin can manually approve if needed
@@ -269,30 +388,7 @@ class ImportService:
     def parse_employee_excel(file_path: str) -> List[Dict]:
         """Parse Excel file and return list of employee records."""
         try:
-            df = pd.read_excel(file_path)
-            # Normalize column names (handle variations)
-            df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-            
-            records = []
-            for _, row in df.iterrows():
-                record = {
-                    'employee_id': str(row.get('employee_id', '')).strip(),
-                    'name': str(row.get('name', '')).strip(),
-                    'email': str(row.get('email', '')).strip(),
-                    'sbu': str(row.get('sbu', '')).strip() if pd.notna(row.get('sbu')) else '',
-                    'designation': str(row.get('designation', '')).strip() if pd.notna(row.get('designation')) else '',
-                    'experience_years': int(row.get('experience_years', 0)) if pd.notna(row.get('experience_years')) else 0,
-                }
-                # Handle career_start_date
-                if pd.notna(row.get('career_start_date')):
-                    record['career_start_date'] = row.get('career_start_date')
-                # Handle bs_join_date or bs_joining_date (both variations)
-                bs_date = row.get('bs_join_date') if pd.notna(row.get('bs_join_date')) else row.get('bs_joining_date')
-                if pd.notna(bs_date):
-                    record['bs_joining_date'] = bs_date
-                records.append(record)
-            
-            return records
+            return list(ImportService.iter_records(file_path, include_experience=True))
         except Exception as e:
             raise ValueError(f"Error parsing Excel file: {str(e)}")
     
@@ -300,47 +396,64 @@ class ImportService:
     def parse_employee_csv(file_path: str) -> List[Dict]:
         """Parse CSV file and return list of employee records."""
         try:
-            df = pd.read_csv(file_path)
-            df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-            
-            records = []
-            for _, row in df.iterrows():
-                record = {
-                    'employee_id': str(row.get('employee_id', '')).strip(),
-                    'name': str(row.get('name', '')).strip(),
-                    'email': str(row.get('email', '')).strip(),
-                    'sbu': str(row.get('sbu', '')).strip() if pd.notna(row.get('sbu')) else '',
-                    'designation': str(row.get('designation', '')).strip() if pd.notna(row.get('designation')) else '',
-                    'experience_years': int(row.get('experience_years', 0)) if pd.notna(row.get('experience_years')) else 0,
-                }
-                # Handle career_start_date
-                if pd.notna(row.get('career_start_date')):
-                    record['career_start_date'] = row.get('career_start_date')
-                # Handle bs_join_date or bs_joining_date (both variations)
-                bs_date = row.get('bs_join_date') if pd.notna(row.get('bs_join_date')) else row.get('bs_joining_date')
-                if pd.notna(bs_date):
-                    record['bs_joining_date'] = bs_date
-                records.append(record)
-            
-            return records
+            return list(ImportService.iter_records(file_path, include_experience=True))
         except Exception as e:
             raise ValueError(f"Error parsing CSV file: {str(e)}")
     
     @staticmethod
-    def process_employee_imports(db: Session, records: List[Dict]) -> Dict:
+    def _map_sbu(sbu) -> SBU:
+        """Map an SBU string to the enum, falling back to OTHER."""
+        try:
+            return SBU[sbu.upper()] if sbu.upper() in _SBU_NAMES else SBU.OTHER
+        except Exception:
+            return SBU.OTHER
+    
+    @staticmethod
+    def _parse_date(value) -> Optional[date]:
+        """Convert a parsed date cell (string, datetime or date) to a date. Returns None if it can't be parsed."""
+        try:
+            if isinstance(value, str):
+                return pd.to_datetime(value).date()
+            elif isinstance(value, (datetime, pd.Timestamp)):
+                return value.date() if hasattr(value, 'date') else pd.to_datetime(value).date()
+            return value
+        except Exception:
+            return None
+    
+    @staticmethod
+    @IMPORT_DURATION.labels(kind="employees").time()
+    def process_employee_imports(db: Session, records: Iterable[Dict], results: Optional[Dict] = None) -> Dict:
         """
         Process employee import records:
         1. Create new employees or update existing ones (by employee_id or email)
         2. Update employee information if they already exist
+        
+        Existing students are loaded once and conflicts are resolved in memory;
+        the resulting rows are written with INSERT ... ON CONFLICT in chunks.
+        If a results dict is passed it is filled in place for progress reporting.
         """
-        results = {
-            'total': len(records),
+        if results is None:
+            results = {}
+        results.update({
+            'total': 0,
             'created': 0,
             'updated': 0,
             'errors': []
-        }
+        })
+        
+        # Index every existing student by employee_id and email (one query)
+        by_employee_id = {}
+        by_email = {}
+        for student_id, employee_id, email in db.query(Student.id, Student.employee_id, Student.email).all():
+            entry = {'id': student_id, 'employee_id': employee_id, 'email': email, 'values': None, 'records': [], 'counts': {}}
+            by_employee_id[employee_id] = entry
+            by_email[email] = entry
+        
+        # Entries to write, in file order (each student appears once, later rows merged in)
+        touched = []
         
         for record in records:
+            results['total'] += 1
             try:
                 # Validate required fields
                 if not all([record.get('employee_id'), record.get('name'), record.get('email')]):
@@ -350,129 +463,90 @@ class ImportService:
                     })
                     continue
                 
+                employee_id = record['employee_id']
+                email = record['email']
+                career_date = ImportService._parse_date(record['career_start_date']) if record.get('career_start_date') else None
+                bs_date = ImportService._parse_date(record['bs_joining_date']) if record.get('bs_joining_date') else None
+                
                 # Check if employee exists by employee_id or email
-                existing_student = db.query(Student).filter(
-                    (Student.employee_id == record['employee_id']) | 
-                    (Student.email == record['email'])
-                ).first()
+                existing = by_employee_id.get(employee_id) or by_email.get(email)
                 
-                if existing_student:
-                    # Update existing employee
-                    # If employee_id matches, update all fields
-                    # If only email matches, update employee_id and other fields
-                    if existing_student.employee_id != record['employee_id']:
-                        # Email match but different employee_id - check if new employee_id exists
-                        conflicting = db.query(Student).filter(
-                            Student.employee_id == record['employee_id']
-                        ).first()
-                        if conflicting:
-                            results['errors'].append({
-                                'record': record,
-                                'error': f"Employee ID {record['employee_id']} already exists for another employee"
-                            })
-                            continue
-                        existing_student.employee_id = record['employee_id']
+                if existing:
+                    # If only email matches, the employee_id is being changed - it must not belong to someone else
+                    other = by_employee_id.get(employee_id)
+                    if existing['employee_id'] != employee_id and other is not None and other is not existing:
+                        results['errors'].append({
+                            'record': record,
+                            'error': f"Employee ID {employee_id} already exists for another employee"
+                        })
+                        continue
                     
                     # Check if email is being changed to one that exists for another employee
-                    if existing_student.email != record['email']:
-                        email_conflict = db.query(Student).filter(
-                            Student.email == record['email'],
-                            Student.id != existing_student.id
-                        ).first()
-                        if email_conflict:
-                            results['errors'].append({
-                                'record': record,
-                                'error': f"Email {record['email']} already exists for another employee"
-                            })
-                            continue
-                    
-                    existing_student.name = record['name']
-                    existing_student.email = record['email']
+                    other = by_email.get(email)
+                    if existing['email'] != email and other is not None and other is not existing:
+                        results['errors'].append({
+                            'record': record,
+                            'error': f"Email {email} already exists for another employee"
+                        })
+                        continue
                     
-                    # Map SBU string to enum
-                    try:
-                        sbu_enum = SBU[record['sbu'].upper()] if record['sbu'].upper() in [e.name for e in SBU] else SBU.OTHER
-                    except:
-                        sbu_enum = SBU.OTHER
-                    existing_student.sbu = sbu_enum
+                    # Re-key the entry under its new employee_id/email
+                    by_employee_id.pop(existing['employee_id'], None)
+                    by_email.pop(existing['email'], None)
+                    existing['employee_id'] = employee_id
+                    existing['email'] = email
+                    by_employee_id[employee_id] = existing
+                    by_email[email] = existing
                     
+                    if existing['values'] is None:
+                        # Optional fields left as None keep their stored value (COALESCE on write)
+                        existing['values'] = {
+                            'designation': None,
+                            'experience_years': None,
+                            'career_start_date': None,
+                            'bs_joining_date': None,
+                        }
+                        touched.append(existing)
+                    values = existing['values']
+                    values['employee_id'] = employee_id
+                    values['name'] = record['name']
+                    values['email'] = email
+                    values['sbu'] = ImportService._map_sbu(record.get('sbu'))
                     if record.get('designation'):
-                        existing_student.designation = record['designation']
-                    
+                        values['designation'] = record['designation']
                     if record.get('experience_years') is not None:
-                        existing_student.experience_years = record['experience_years']
-                    
-                    # Update career_start_date if provided
-                    if record.get('career_start_date'):
-                        try:
-                            if isinstance(record['career_start_date'], str):
-                                career_date = pd.to_datetime(record['career_start_date']).date()
-                            elif isinstance(record['career_start_date'], (datetime, pd.Timestamp)):
-                                career_date = record['career_start_date'].date() if hasattr(record['career_start_date'], 'date') else pd.to_datetime(record['career_start_date']).date()
-                            else:
-                                career_date = record['career_start_date']
-                            existing_student.career_start_date = career_date
-                        except Exception:
-                            pass  # Skip if date parsing fails
-                    
-                    # Update bs_joining_date if provided
-                    if record.get('bs_joining_date'):
-                        try:
-                            if isinstance(record['bs_joining_date'], str):
-                                bs_date = pd.to_datetime(record['bs_joining_date']).date()
-                            elif isinstance(record['bs_joining_date'], (datetime, pd.Timestamp)):
-                                bs_date = record['bs_joining_date'].date() if hasattr(record['bs_joining_date'], 'date') else pd.to_datetime(record['bs_joining_date']).date()
-                            else:
-                                bs_date = record['bs_joining_date']
-                            existing_student.bs_joining_date = bs_date
-                        except Exception:
-                            pass  # Skip if date parsing fails
+                        values['experience_years'] = record['experience_years']
+                    if career_date:
+                        values['career_start_date'] = career_date
+                    if bs_date:
+                        values['bs_joining_date'] = bs_date
+                    existing['records'].append(record)
+                    existing['counts']['updated'] = existing['counts'].get('updated', 0) + 1
                     
                     results['updated'] += 1
                 else:
                     # Create new employee
-                    # Map SBU string to enum
-                    try:
-                        sbu_enum = SBU[record['sbu'].upper()] if record['sbu'].upper() in [e.name for e in SBU] else SBU.OTHER
-                    except:
-                        sbu_enum = SBU.OTHER
-                    
-                    # Parse date fields
-                    career_date = None
-                    if record.get('career_start_date'):
-                        try:
-                            if isinstance(record['career_start_date'], str):
-                                career_date = pd.to_datetime(record['career_start_date']).date()
-                            elif isinstance(record['career_start_date'], (datetime, pd.Timestamp)):
-                                career_date = record['career_start_date'].date() if hasattr(record['career_start_date'], 'date') else pd.to_datetime(record['career_start_date']).date()
-                            else:
-                                career_date = record['career_start_date']
-                        except Exception:
-                            pass  # Skip if date parsing fails
-                    
-                    bs_date = None
-                    if record.get('bs_joining_date'):
-                        try:
-                            if isinstance(record['bs_joining_date'], str):
-                                bs_date = pd.to_datetime(record['bs_joining_date']).date()
-                            elif isinstance(record['bs_joining_date'], (datetime, pd.Timestamp)):
-                                bs_date = record['bs_joining_date'].date() if hasattr(record['bs_joining_date'], 'date') else pd.to_datetime(record['bs_joining_date']).date()
-                            else:
-                                bs_date = record['bs_joining_date']
-                        except Exception:
-                            pass  # Skip if date parsing fails
-                    
-                    new_student = Student(
-                        employee_id=record['employee_id'],
-                        name=record['name'],
-                        email=record['email'],
-                        sbu=sbu_enum,
-                        designation=record.get('designation'),
-                        experience_years=record.get('experience_years', 0),
-                        career_start_date=career_date,
-                        bs_joining_date=bs_date
-                    )
-                    db.add(new_student)
+                    entry = {
+                        'id': None,
+                        'employee_id': employee_id,
+                        'email': email,
+                        # Every file row merged into this entry, and the counter each one incremented
+                        'records': [record],
+                        'counts': {'created': 1},
+                        'values': {
+                            'employee_id': employee_id,
+                            'name': record['name'],
+                            'email': email,
+                            'sbu': ImportService._map_sbu(record.get('sbu')),
+                            'designation': record.get('designation'),
+                            'experience_years': record.get('experience_years', 0),
+                            'career_start_date': career_date,
+                            'bs_joining_date': bs_date,
+                        }
+                    }
+                    by_employee_id[employee_id] = entry
+                    by_email[email] = entry
+                    touched.append(entry)
                     results['created'] += 1
                 
             except Exception as e:
@@ -481,6 +555,54 @@ class ImportService:
                     'error': str(e)
                 })
         
-        db.commit()
+        now = datetime.utcnow()
+        updates = [dict(e['values'], id=e['id'], updated_at=now) for e in touched if e['id'] is not None]
+        inserts = [dict(e['values'], updated_at=now) for e in touched if e['id'] is None]
+        update_entries = [e for e in touched if e['id'] is not None]
+        insert_entries = [e for e in touched if e['id'] is None]
+        
+        ImportService._upsert_students(db, updates, update_entries, 'id', results)
+        ImportService._upsert_students(db, inserts, insert_entries, 'employee_id', results)
+        
         return results
-
+    
+    @staticmethod
+    def _upsert_students(db: Session, rows: List[Dict], entries: List[Dict], conflict_column: str,
+                         results: Dict) -> None:
+        """
+        Write student rows with INSERT ... ON CONFLICT (conflict_column) DO UPDATE, committing per chunk.
+        If a chunk fails it is rolled back, each file row merged into its entries is
+        reported as an error and taken back out of the created/updated counts.
+        """
+        table = Student.__table__
+        for start in range(0, len(rows), EMPLOYEE_UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + EMPLOYEE_UPSERT_CHUNK_SIZE]
+            stmt = pg_insert(table).values(chunk)
+            excluded = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[conflict_column],
+                set_={
+                    'employee_id': excluded.employee_id,
+                    'name': excluded.name,
+                    'email': excluded.email,
+                    'sbu': excluded.sbu,
+                    'designation': func.coalesce(excluded.designation, table.c.designation),
+                    'experience_years': func.coalesce(excluded.experience_years, table.c.experience_years),
+                    'career_start_date': func.coalesce(excluded.career_start_date, table.c.career_start_date),
+                    'bs_joining_date': func.coalesce(excluded.bs_joining_date, table.c.bs_joining_date),
+                    'updated_at': excluded.updated_at,
+                }
+            )
+            try:
+                db.execute(stmt)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                for entry in entries[start:start + EMPLOYEE_UPSERT_CHUNK_SIZE]:
+                    for counter, count in entry['counts'].items():
+                        results[counter] -= count
+                    for record in entry['records']:
+                        results['errors'].append({
+                            'record': record,
+                            'error': str(e.orig) if hasattr(e, 'orig') else str(e)
+                        })
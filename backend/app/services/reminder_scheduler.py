@@ -0,0 +1,215 @@
+"""Event-driven scheduling of class reminders across API worker processes."""
+import select
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.schedulers.base import BaseScheduler
+from apscheduler.triggers.date import DateTrigger
+from app.core.config import settings
+from app.db.base import SessionLocal, engine
+from app.services.class_occurrence_index import occurrence_index, SCHEDULE_CHANGE_CHANNEL
+from app.services.reminder_service import ReminderService
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL advisory lock key for the reminder scheduling lease ("REMI")
+REMINDER_LEASE_KEY = 0x52454D49
+
+# Job ids on the APScheduler instance
+REMINDER_JOB_PREFIX = 'class_reminder:'
+SYNC_JOB_ID = 'class_reminder_sync'
+REFRESH_JOB_ID = 'class_reminder_refresh'
+
+# Reminders may still go out this late, e.g. right after a lease takeover
+REMINDER_MISFIRE_GRACE_SECONDS = 60
+
+# How long the lease holder waits on the connection before checking for shutdown
+LEASE_POLL_SECONDS = 5
+
+class ReminderScheduler:
+    """
+    Register one-shot reminder jobs for upcoming class occurrences.
+
+    Every API process starts one of these, but only the process holding the
+    PostgreSQL advisory lock REMINDER_LEASE_KEY schedules reminders. The lock
+    is tied to a dedicated connection, so it is released as soon as that
+    process or its connection goes away and a standby worker takes over on
+    its next retry. The lease holder LISTENs for course schedule changes and
+    re-syncs its jobs when one is committed, so nothing runs while no class
+    is coming up.
+    """
+
+    def __init__(self, scheduler: BaseScheduler, bind=engine):
+        """
+        Args:
+            scheduler: APScheduler instance that runs the reminder jobs
+            bind: Engine used for the lease connection
+        """
+        self.scheduler = scheduler
+        self.bind = bind
+        self._raw_connection = None  # Dedicated pool-detached connection for the lease
+        self._connection = None  # Its psycopg2 connection, used for LISTEN/poll
+        self._is_leader = False
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sync_lock = threading.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process currently holds the scheduling lease."""
+        return self._is_leader
+
+    def start(self):
+        """Start competing for the lease in a background thread."""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="reminder-lease", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the lease thread and give up the lease (called on application shutdown)."""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=LEASE_POLL_SECONDS + 1)
+            self._thread = None
+        self._release_lease()
+
+    def request_sync(self):
+        """Re-sync reminder jobs as soon as possible on the scheduler's worker threads."""
+        if not self._is_leader or not self.scheduler.running:
+            return
+        # A second instance lets a change that arrives mid-sync still be picked up
+        self.scheduler.add_job(
+            self.sync,
+            id=SYNC_JOB_ID,
+            name='Sync class reminder jobs',
+            replace_existing=True,
+            max_instances=2,
+            misfire_grace_time=None
+        )
+
+    def sync(self):
+        """
+        Make the scheduled reminder jobs match the occurrence index: one job per
+        fire time, covering every upcoming class of every ongoing course.
+        """
+        if not self._is_leader:
+            return
+
+        with self._sync_lock:
+            now = datetime.now()
+            db = SessionLocal()
+            try:
+                occurrence_index.ensure_fresh(db, now)
+            except Exception as e:
+                logger.error(f"Error rebuilding class occurrence index: {str(e)}")
+                return
+            finally:
+                db.close()
+
+            fire_from, _ = ReminderService.due_window(now)
+            now_rounded = now.replace(second=0, microsecond=0)
+            by_fire_at = defaultdict(list)
+            for occurrence in occurrence_index.due(fire_from, datetime.max):
+                if occurrence.class_datetime > now_rounded:
+                    by_fire_at[occurrence.fire_at].append(occurrence)
+
+            wanted = set()
+            for fire_at, occurrences in by_fire_at.items():
+                job_id = f"{REMINDER_JOB_PREFIX}{fire_at:%Y%m%d%H%M}"
+                wanted.add(job_id)
+                self.scheduler.add_job(
+                    ReminderService.send_reminders,
+                    trigger=DateTrigger(run_date=max(fire_at, now)),
+                    args=[occurrences],
+                    id=job_id,
+                    name=f"Send class reminders for {fire_at:%Y-%m-%d %H:%M}",
+                    replace_existing=True,
+                    misfire_grace_time=REMINDER_MISFIRE_GRACE_SECONDS
+                )
+
+            for job in self.scheduler.get_jobs():
+                if job.id.startswith(REMINDER_JOB_PREFIX) and job.id not in wanted:
+                    self._remove_job(job.id)
+
+            # Extend the index before it stops covering the lookahead window
+            refresh_at = occurrence_index.refresh_at()
+            if refresh_at:
+                self.scheduler.add_job(
+                    self.sync,
+                    trigger=DateTrigger(run_date=max(refresh_at, now)),
+                    id=REFRESH_JOB_ID,
+                    name='Refresh class reminder jobs',
+                    replace_existing=True,
+                    misfire_grace_time=None
+                )
+            logger.info(f"Scheduled class reminders for {len(wanted)} fire time(s)")
+
+    def _run(self):
+        """Lease thread: acquire the lease, then wait for schedule change notifications."""
+        while not self._stopping.is_set():
+            try:
+                if not self._is_leader:
+                    if not self._try_acquire_lease():
+                        self._stopping.wait(settings.REMINDER_LEASE_RETRY_SECONDS)
+                    continue
+
+                readable, _, _ = select.select([self._connection], [], [], LEASE_POLL_SECONDS)
+                if readable:
+                    self._connection.poll()
+                    if self._connection.notifies:
+                        self._connection.notifies.clear()
+                        occurrence_index.invalidate()
+                        self.request_sync()
+            except Exception as e:
+                logger.error(f"Reminder scheduling lease lost: {str(e)}")
+                self._release_lease()
+                self._stopping.wait(settings.REMINDER_LEASE_RETRY_SECONDS)
+
+    def _try_acquire_lease(self) -> bool:
+        """Try to take the advisory lock on the dedicated connection, opening it if needed."""
+        if self._connection is None:
+            self._raw_connection = self.bind.raw_connection()
+            self._connection = self._raw_connection.driver_connection
+            # Keep the lease connection (and its session-level lock) out of the pool
+            self._raw_connection.detach()
+            self._connection.autocommit = True
+
+        with self._connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (REMINDER_LEASE_KEY,))
+            if not cursor.fetchone()[0]:
+                return False
+            cursor.execute(f"LISTEN {SCHEDULE_CHANGE_CHANNEL}")
+
+        self._is_leader = True
+        logger.info("Acquired the class reminder scheduling lease")
+        # Changes may have been committed while another process held the lease
+        occurrence_index.invalidate()
+        self.request_sync()
+        return True
+
+    def _release_lease(self):
+        """Drop scheduled reminder jobs and close the lease connection, which releases the lock."""
+        was_leader = self._is_leader
+        self._is_leader = False
+        if was_leader and self.scheduler.running:
+            for job in self.scheduler.get_jobs():
+                if job.id.startswith(REMINDER_JOB_PREFIX) or job.id in (SYNC_JOB_ID, REFRESH_JOB_ID):
+                    self._remove_job(job.id)
+
+        raw_connection, self._raw_connection, self._connection = self._raw_connection, None, None
+        if raw_connection is not None:
+            try:
+                raw_connection.close()
+            except Exception:
+                pass
+        if was_leader:
+            logger.info("Released the class reminder scheduling lease")
+
+    def _remove_job(self, job_id: str):
+        try:
+            self.scheduler.remove_job(job_id)
+        except JobLookupError:
+            pass  # Already ran or was removed
@@ -1,13 +1,14 @@
 """Service for checking and sending class reminders."""
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional, Set, Tuple
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.db.base import SessionLocal
-from app.models.course import Course
 from app.models.class_reminder import ClassReminder
 from app.services.email_service import EmailService
+from app.services.class_occurrence_index import occurrence_index, ClassOccurrence, LOOKAHEAD
 from app.core.config import settings
-from app.models.course import CourseStatus
+from app.core.metrics import REMINDER_JOB_DURATION
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,164 +25,119 @@ class ReminderService:
     """Service for managing class reminders."""
     
     @staticmethod
+    @REMINDER_JOB_DURATION.labels(job="check").time()
     def check_and_send_reminders():
         """
         Check for upcoming classes and send reminders if needed.
-        This should be called periodically (e.g., every minute).
+        This should be called periodically (e.g., every minute) when the
+        event-driven ReminderScheduler is not available.
+        
+        Candidate classes come from the in-memory occurrence index, so a tick
+        is a range lookup plus one query for reminders that were already sent.
         """
-        if not EmailService.is_enabled():
-            logger.debug("Email service is not enabled. Skipping reminder check.")
+        if not ReminderService._can_send():
             return
         
-        if not settings.ADMIN_EMAIL:
-            logger.warning("ADMIN_EMAIL is not configured. Cannot send reminders.")
+        db = SessionLocal()
+        try:
+            occurrence_index.ensure_fresh(db, datetime.now())
+        except Exception as e:
+            logger.error(f"Error in reminder check: {str(e)}")
             return
+        finally:
+            db.close()
+        
+        ReminderService.send_reminders(occurrence_index.due(*ReminderService.due_window()))
+    
+    @staticmethod
+    def due_window(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+        """
+        Fire-time window of reminders that are due now.
+        Reminders go out REMINDER_MINUTES_BEFORE minutes before class, allowing
+        one minute either way to account for scheduler timing.
+        """
+        now_rounded = (now or datetime.now()).replace(second=0, microsecond=0)
+        return now_rounded - timedelta(minutes=1), now_rounded + timedelta(minutes=1)
+    
+    @staticmethod
+    @REMINDER_JOB_DURATION.labels(job="send").time()
+    def send_reminders(occurrences: List[ClassOccurrence]) -> int:
+        """
+        Send reminders for the given class occurrences unless they were already
+        sent or the class has started.
+        
+        Returns:
+            Number of reminders sent
+        """
+        if not ReminderService._can_send():
+            return 0
+        
+        now_rounded = datetime.now().replace(second=0, microsecond=0)
+        occurrences = [o for o in occurrences if o.class_datetime > now_rounded]
+        if not occurrences:
+            return 0
         
         db = SessionLocal()
+        reminders_sent = 0
         try:
-            # Get current time
-            now = datetime.now()
-            reminder_time = now + timedelta(minutes=settings.REMINDER_MINUTES_BEFORE)
-            
-            # Round to the nearest minute for comparison
-            reminder_time = reminder_time.replace(second=0, microsecond=0)
-            now_rounded = now.replace(second=0, microsecond=0)
-            
-            # Get all courses with class schedules
-            courses = db.query(Course).all()
+            already_sent = ReminderService._sent_reminder_keys(db, occurrences)
+            pending = [
+                o for o in occurrences
+                if (o.course_id, o.class_datetime, o.start_time) not in already_sent
+            ]
+            if not pending:
+                return 0
             
-            reminders_sent = 0
+            # Hand the whole batch to the delivery queue, which sends it over one SMTP session
+            messages = [
+                EmailService.build_class_reminder(
+                    admin_email=settings.ADMIN_EMAIL,
+                    course_name=occurrence.course_name,
+                    batch_code=occurrence.batch_code,
+                    class_time=occurrence.class_datetime,
+                    start_time=occurrence.start_time,
+                    end_time=occurrence.end_time,
+                    day=occurrence.day
+                )
+                for occurrence in pending
+            ]
+            results = EmailService.send_messages(messages)
             
-            for course in courses:
-                # Only send reminders for ongoing courses
-                if course.status != CourseStatus.ONGOING:
-                    continue
-                
-                if not course.class_schedule or not isinstance(course.class_schedule, list):
-                    continue
-                
-                # Check each scheduled class
-                for schedule in course.class_schedule:
-                    if not schedule.get('day') or not schedule.get('start_time'):
-                        continue
-                    
-                    # Get today's date
-                    today = now.date()
-                    
-                    # Map day name to day of week (Python: 0=Monday, 6=Sunday)
-                    day_map = {
-                        'Monday': 0,
-                        'Tuesday': 1,
-                        'Wednesday': 2,
-                        'Thursday': 3,
-                        'Friday': 4,
-                        'Saturday': 5,
-                        'Sunday': 6
-                    }
-                    
-                    scheduled_day = day_map.get(schedule['day'])
-                    if scheduled_day is None:
-                        continue
-                    
-                    # Calculate the date for the next occurrence of the scheduled day
-                    today_weekday = today.weekday()  # 0=Monday, 6=Sunday
-                    days_until = (scheduled_day - today_weekday) % 7
-                    
-                    # If it's today, check if the time has already passed
-                    if days_until == 0:
-                        try:
-                            start_hour, start_min = map(int, schedule['start_time'].split(':'))
-                            current_minutes = now.hour * 60 + now.minute
-                            scheduled_minutes = start_hour * 60 + start_min
-                            
-                            # If time has passed today, get next week's occurrence
-                            if current_minutes >= scheduled_minutes:
-                                days_until = 7
-                        except (ValueError, IndexError):
-                            # If we can't parse time, skip this schedule
-                            continue
-                    
-                    class_date = today + timedelta(days=days_until)
-                    
-                    # Parse start time
-                    try:
-                        start_hour, start_min = map(int, schedule['start_time'].split(':'))
-                        class_datetime = datetime.combine(class_date, datetime.min.time().replace(hour=start_hour, minute=start_min))
-                    except (ValueError, IndexError):
-                        logger.warning(f"Invalid start_time format for course {course.id}: {schedule.get('start_time')}")
-                        continue
-                    
-                    # Check if reminder should be sent (within the current minute window)
-                    # We want to send reminder exactly REMINDER_MINUTES_BEFORE minutes before class
-                    time_diff_minutes = (class_datetime - now_rounded).total_seconds() / 60
-                    
-                    # Check if we're within 1 minute of the reminder time (to account for scheduler timing)
-                    if abs(time_diff_minutes - settings.REMINDER_MINUTES_BEFORE) <= 1:
-                        # Check if reminder already sent
-                        existing_reminder = db.query(ClassReminder).filter(
-                            ClassReminder.course_id == course.id,
-                            ClassReminder.class_date == class_datetime,
-                            ClassReminder.start_time == schedule['start_time']
-                        ).first()
-                        
-                        if existing_reminder:
-                            continue  # Already sent
-                        
-                        # Check if class is within course date range
-                        course_start = course.start_date
-                        course_end = course.end_date
-                        
-                        if class_date < course_start or (course_end and class_date > course_end):
-                            continue  # Class is outside course date range
-                        
-                        # Send reminder
-                        try:
-                            success = EmailService.send_class_reminder(
-                                admin_email=settings.ADMIN_EMAIL,
-                                course_name=course.name,
-                                batch_code=course.batch_code,
-                                class_time=class_datetime,
-                                start_time=schedule['start_time'],
-                                end_time=schedule.get('end_time', ''),
-                                day=schedule['day']
-                            )
-                            
-                            if success:
-                                # Record that reminder was sent
-                                reminder = ClassReminder(
-                                    course_id=course.id,
-                                    course_name=course.name,
-                                    batch_code=course.batch_code,
-                                    class_date=class_datetime,
-                                    start_time=schedule['start_time'],
-                                    end_time=schedule.get('end_time', ''),
-                                    day=schedule['day'],
-                                    sent=True
-                                )
-                                db.add(reminder)
-                                db.commit()
-                                reminders_sent += 1
-                                logger.info(f"Reminder sent for course {course.name} ({course.batch_code}) on {class_datetime}")
-                            else:
-                                logger.error(f"Failed to send reminder for course {course.id}")
-                                
-                        except Exception as e:
-                            logger.error(f"Error sending reminder for course {course.id}: {str(e)}")
-                            db.rollback()
+            for occurrence, success in zip(pending, results):
+                if success:
+                    # Record that reminder was sent
+                    db.add(ClassReminder(
+                        course_id=occurrence.course_id,
+                        course_name=occurrence.course_name,
+                        batch_code=occurrence.batch_code,
+                        class_date=occurrence.class_datetime,
+                        start_time=occurrence.start_time,
+                        end_time=occurrence.end_time,
+                        day=occurrence.day,
+                        sent=True
+                    ))
+                    reminders_sent += 1
+                    logger.info(f"Reminder sent for course {occurrence.course_name} ({occurrence.batch_code}) on {occurrence.class_datetime}")
+                else:
+                    logger.error(f"Failed to send reminder for course {occurrence.course_id}")
+            db.commit()
             
             if reminders_sent > 0:
                 logger.info(f"Sent {reminders_sent} class reminder(s)")
                 
         except Exception as e:
-            logger.error(f"Error in reminder check: {str(e)}")
+            logger.error(f"Error sending class reminders: {str(e)}")
             db.rollback()
+            reminders_sent = 0
         finally:
             db.close()
+        return reminders_sent
     
     @staticmethod
     def get_upcoming_classes(hours_ahead: int = 24) -> List[dict]:
         """
         Get list of upcoming classes within the specified hours.
+        Only the next occurrence of each scheduled class is considered.
         
         Args:
             hours_ahead: Number of hours to look ahead (default: 24)
@@ -192,72 +148,44 @@ class ReminderService:
         db = SessionLocal()
         try:
             now = datetime.now()
-            end_time = now + timedelta(hours=hours_ahead)
-            
-            courses = db.query(Course).all()
-            upcoming_classes = []
-            
-            for course in courses:
-                if course.status != CourseStatus.ONGOING:
-                    continue
-                
-                if not course.class_schedule or not isinstance(course.class_schedule, list):
-                    continue
-                
-                for schedule in course.class_schedule:
-                    if not schedule.get('day') or not schedule.get('start_time'):
-                        continue
-                    
-                    # Calculate next occurrence
-                    day_map = {
-                        'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3,
-                        'Friday': 4, 'Saturday': 5, 'Sunday': 6
-                    }
-                    
-                    scheduled_day = day_map.get(schedule['day'])
-                    if scheduled_day is None:
-                        continue
-                    
-                    today = now.date()
-                    days_until = (scheduled_day - today.weekday()) % 7
-                    
-                    if days_until == 0:
-                        # Check if time has passed today
-                        try:
-                            start_hour, start_min = map(int, schedule['start_time'].split(':'))
-                            if now.hour * 60 + now.minute >= start_hour * 60 + start_min:
-                                days_until = 7  # Next week
-                        except (ValueError, IndexError):
-                            continue
-                    
-                    class_date = today + timedelta(days=days_until)
-                    
-                    try:
-                        start_hour, start_min = map(int, schedule['start_time'].split(':'))
-                        class_datetime = datetime.combine(class_date, datetime.min.time().replace(hour=start_hour, minute=start_min))
-                    except (ValueError, IndexError):
-                        continue
-                    
-                    if now <= class_datetime <= end_time:
-                        # Check course date range
-                        course_start = course.start_date
-                        course_end = course.end_date
-                        
-                        if class_date >= course_start and (not course_end or class_date <= course_end):
-                            upcoming_classes.append({
-                                'course_id': course.id,
-                                'course_name': course.name,
-                                'batch_code': course.batch_code,
-                                'class_datetime': class_datetime,
-                                'start_time': schedule['start_time'],
-                                'end_time': schedule.get('end_time', ''),
-                                'day': schedule['day']
-                            })
+            occurrence_index.ensure_fresh(db, now)
+            end_time = min(now + timedelta(hours=hours_ahead), now.replace(second=0, microsecond=0) + LOOKAHEAD)
             
-            # Sort by datetime
-            upcoming_classes.sort(key=lambda x: x['class_datetime'])
-            return upcoming_classes
+            return [
+                {
+                    'course_id': occurrence.course_id,
+                    'course_name': occurrence.course_name,
+                    'batch_code': occurrence.batch_code,
+                    'class_datetime': occurrence.class_datetime,
+                    'start_time': occurrence.start_time,
+                    'end_time': occurrence.end_time,
+                    'day': occurrence.day
+                }
+                for occurrence in occurrence_index.upcoming(now, end_time)
+            ]
             
         finally:
             db.close()
-
+    
+    @staticmethod
+    def _can_send() -> bool:
+        """Whether email is enabled and there is an admin address to send reminders to."""
+        if not EmailService.is_enabled():
+            logger.debug("Email service is not enabled. Skipping reminder check.")
+            return False
+        
+        if not settings.ADMIN_EMAIL:
+            logger.warning("ADMIN_EMAIL is not configured. Cannot send reminders.")
+            return False
+        return True
+    
+    @staticmethod
+    def _sent_reminder_keys(db: Session, occurrences: List[ClassOccurrence]) -> Set[Tuple[int, datetime, str]]:
+        """(course_id, class_date, start_time) of the given occurrences that already have a reminder, in one query."""
+        keys = [(o.course_id, o.class_datetime, o.start_time) for o in occurrences]
+        rows = db.query(
+            ClassReminder.course_id, ClassReminder.class_date, ClassReminder.start_time
+        ).filter(
+            tuple_(ClassReminder.course_id, ClassReminder.class_date, ClassReminder.start_time).in_(keys)
+        ).all()
+        return {tuple(row) for row in rows}
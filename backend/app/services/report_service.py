@@ -0,0 +1,286 @@
+import os
+import csv
+import tempfile
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from typing import Dict, Iterable, Iterator, List, Sequence
+from app.models.student import Student
+from app.models.course import Course
+from app.models.enrollment import Enrollment, ApprovalStatus, CompletionStatus, EligibilityStatus
+from app.services.completion_rate_service import CompletionRateService
+
+# Rows fetched per round trip from the server-side cursor
+REPORT_FETCH_SIZE = 1000
+
+# Bytes sent per chunk when streaming a finished report file
+REPORT_STREAM_CHUNK_SIZE = 64 * 1024
+
+OVERALL_REPORT_COLUMNS = [
+    'bsid', 'name', 'email', 'sbu', 'designation',
+    'course_name', 'batch_code', 'attendance', 'score',
+    'completion_status', 'approval_date', 'completion_date',
+    'withdrawn'
+]
+
+# Column widths for the overall report; rows are streamed, so widths are
+# fixed up front instead of measured from the data
+OVERALL_REPORT_WIDTHS = {
+    'bsid': 15, 'name': 30, 'email': 35, 'sbu': 15, 'designation': 30,
+    'course_name': 40, 'batch_code': 20, 'attendance': 12, 'score': 10,
+    'completion_status': 19, 'approval_date': 15, 'completion_date': 17,
+    'withdrawn': 11
+}
+
+COURSE_REPORT_COLUMNS = [
+    'Employee ID', 'Name', 'Email', 'SBU', 'Designation',
+    'Approval Status', 'Completion Status', 'Total Classes', 'Classes Attended',
+    'Attendance', 'Score', 'Total Courses Assigned', 'Completed Courses',
+    'Overall Completion Rate', 'Enrollment Date', 'Approval Date',
+    'Withdrawal Date', 'Withdrawal Reason'
+]
+
+# Widest column allowed when sizing columns from their contents
+MAX_COLUMN_WIDTH = 50
+
+INELIGIBLE_STATUSES = (
+    EligibilityStatus.INELIGIBLE_PREREQUISITE,
+    EligibilityStatus.INELIGIBLE_DUPLICATE,
+    EligibilityStatus.INELIGIBLE_ANNUAL_LIMIT
+)
+
+class ReportService:
+    """Service for building large Excel/CSV reports with bounded memory."""
+
+    @staticmethod
+    def iter_overall_report_rows(db: Session) -> Iterator[List[str]]:
+        """
+        Yield one row per enrollment of every active employee (employees without
+        enrollments get a single "No courses taken yet" row), ordered by bsid and
+        then approval date, newest first.
+
+        All rows come from one joined query read through a server-side cursor.
+        """
+        stmt = select(
+            Student.employee_id,
+            Student.name,
+            Student.email,
+            Student.sbu,
+            Student.designation,
+            Enrollment.id.label('enrollment_id'),
+            func.coalesce(Enrollment.course_name, Course.name).label('course_name'),
+            func.coalesce(Enrollment.batch_code, Course.batch_code).label('batch_code'),
+            Enrollment.total_attendance,
+            Enrollment.present,
+            Enrollment.attendance_percentage,
+            Enrollment.attendance_status,
+            Enrollment.score,
+            Enrollment.eligibility_status,
+            Enrollment.approval_status,
+            Enrollment.completion_status,
+            Enrollment.approved_at,
+            Enrollment.completion_date
+        ).select_from(Student).outerjoin(
+            Enrollment, Enrollment.student_id == Student.id
+        ).outerjoin(
+            Course, Course.id == Enrollment.course_id
+        ).where(
+            Student.is_active == True
+        ).order_by(
+            # Byte-wise ordering matches the previous in-Python sort
+            Student.employee_id.collate('C'),
+            func.date(Enrollment.approved_at).desc().nullslast(),
+            Enrollment.id
+        ).execution_options(yield_per=REPORT_FETCH_SIZE)
+
+        for row in db.execute(stmt):
+            student_columns = [
+                row.employee_id or '',
+                row.name or '',
+                row.email or '',
+                row.sbu.value if row.sbu else '',
+                row.designation or ''
+            ]
+
+            # Student has no enrollments
+            if row.enrollment_id is None:
+                yield student_columns + [
+                    'No courses taken yet', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A'
+                ]
+                continue
+
+            withdrawn = row.approval_status == ApprovalStatus.WITHDRAWN
+            yield student_columns + [
+                row.course_name or '',
+                row.batch_code or '',
+                ReportService.format_attendance(row),
+                f"{row.score}%" if row.score is not None else '',
+                ReportService.report_completion_status(row.approval_status, row.eligibility_status, row.completion_status),
+                row.approved_at.strftime('%Y-%m-%d') if row.approved_at else '',
+                row.completion_date.strftime('%Y-%m-%d') if row.completion_date else '',
+                'TRUE' if withdrawn else 'FALSE'
+            ]
+
+    @staticmethod
+    def course_report_rows(db: Session, course_id: int) -> List[list]:
+        """
+        Build the course report rows (approved and withdrawn enrollments only,
+        excluding rejected and pending) from one query joining enrollments,
+        students and each student's completion counts.
+        """
+        course_student_ids = select(Enrollment.student_id).where(Enrollment.course_id == course_id)
+        counts = CompletionRateService.counts_subquery(course_student_ids)
+
+        stmt = select(
+            Enrollment,
+            Student.employee_id,
+            Student.name,
+            Student.email,
+            Student.sbu,
+            Student.designation,
+            func.coalesce(counts.c.total_courses, 0).label('total_courses'),
+            func.coalesce(counts.c.completed_courses, 0).label('completed_courses')
+        ).join(
+            Student, Student.id == Enrollment.student_id
+        ).outerjoin(
+            counts, counts.c.student_id == Enrollment.student_id
+        ).where(
+            Enrollment.course_id == course_id,
+            Enrollment.approval_status.in_([ApprovalStatus.APPROVED, ApprovalStatus.WITHDRAWN])
+        ).order_by(Enrollment.id)
+
+        rows = []
+        for enrollment, employee_id, name, email, sbu, designation, total_courses, completed_courses in db.execute(stmt):
+            # Attendance percentage from present/total, falling back to the stored values
+            attendance_display = '-'
+            if enrollment.total_attendance and enrollment.total_attendance > 0:
+                if enrollment.present is not None:
+                    attendance_display = f"{(enrollment.present / enrollment.total_attendance * 100):.1f}%"
+            elif enrollment.attendance_percentage is not None:
+                attendance_display = f"{enrollment.attendance_percentage:.1f}%"
+            elif enrollment.attendance_status:
+                attendance_display = enrollment.attendance_status
+
+            withdrawn = enrollment.approval_status == ApprovalStatus.WITHDRAWN
+            rows.append([
+                employee_id,
+                name,
+                email,
+                sbu.value if sbu else '',
+                designation or '',
+                enrollment.approval_status.value if enrollment.approval_status else '',
+                enrollment.completion_status.value if enrollment.completion_status else '',
+                enrollment.total_attendance or 0,
+                enrollment.present or 0,
+                attendance_display,
+                enrollment.score if enrollment.score is not None else '-',
+                total_courses,
+                completed_courses,
+                f"{CompletionRateService.completion_rate(completed_courses, total_courses):.1f}%",
+                enrollment.created_at.strftime('%Y-%m-%d %H:%M:%S') if enrollment.created_at else '',
+                enrollment.approved_at.strftime('%Y-%m-%d %H:%M:%S') if enrollment.approved_at and enrollment.approval_status == ApprovalStatus.APPROVED else '',
+                enrollment.updated_at.strftime('%Y-%m-%d %H:%M:%S') if withdrawn and enrollment.updated_at else '',
+                enrollment.rejection_reason if withdrawn else '',
+            ])
+        return rows
+
+    @staticmethod
+    def column_widths(columns: List[str], rows: Iterable[Sequence], max_width: int = MAX_COLUMN_WIDTH) -> Dict[str, int]:
+        """Size each column to its longest value (header included) plus padding, capped at max_width."""
+        lengths = [len(col) for col in columns]
+        for row in rows:
+            for idx, value in enumerate(row):
+                if value is not None:
+                    lengths[idx] = max(lengths[idx], len(str(value)))
+        return {col: min(length + 2, max_width) for col, length in zip(columns, lengths)}
+
+    @staticmethod
+    def format_attendance(row) -> str:
+        """Attendance as a percentage (present/total_attendance), falling back to the stored values."""
+        if row.total_attendance and row.total_attendance > 0 and row.present is not None:
+            return f"{(row.present / row.total_attendance * 100):.1f}%"
+        if row.attendance_percentage is not None:
+            return f"{row.attendance_percentage:.1f}%"
+        return row.attendance_status or ''
+
+    @staticmethod
+    def report_completion_status(approval_status, eligibility_status, completion_status) -> str:
+        """Map an enrollment to COMPLETED, FAILED, WITHDRAWN, PENDING or INELIGIBLE."""
+        if approval_status == ApprovalStatus.WITHDRAWN:
+            return 'WITHDRAWN'
+        if eligibility_status in INELIGIBLE_STATUSES:
+            return 'INELIGIBLE'
+        if approval_status == ApprovalStatus.PENDING:
+            return 'PENDING'
+        if completion_status == CompletionStatus.COMPLETED:
+            return 'COMPLETED'
+        if completion_status == CompletionStatus.FAILED:
+            return 'FAILED'
+        return 'PENDING'  # Default for NOT_STARTED, IN_PROGRESS, etc.
+
+    @staticmethod
+    def write_xlsx(rows: Iterable[Sequence], columns: List[str], sheet_name: str, widths: Dict[str, int]) -> str:
+        """
+        Write rows to a temporary .xlsx file using a write-only workbook.
+
+        Args:
+            rows: Row values in column order
+            columns: Header row
+            sheet_name: Worksheet title
+            widths: Column widths by header name
+
+        Returns:
+            Path of the temporary file (the caller removes it)
+        """
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(sheet_name)
+        # Write-only sheets only accept column widths before the first row
+        for idx, col in enumerate(columns):
+            worksheet.column_dimensions[get_column_letter(idx + 1)].width = widths.get(col, len(col) + 2)
+
+        worksheet.append(columns)
+        for row in rows:
+            worksheet.append(row)
+
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            workbook.save(path)
+        except Exception:
+            os.remove(path)
+            raise
+        return path
+
+    @staticmethod
+    def write_csv(rows: Iterable[Sequence], columns: List[str]) -> str:
+        """
+        Write rows to a temporary .csv file.
+
+        Returns:
+            Path of the temporary file (the caller removes it)
+        """
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(rows)
+        except Exception:
+            os.remove(path)
+            raise
+        return path
+
+    @staticmethod
+    def iter_file_chunks(path: str, chunk_size: int = REPORT_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream a report file in chunks and delete it once it has been sent."""
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1 @@
+"""Performance harnesses run against a scratch copy of the schema with seeded data."""
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark results files and report regressions.
+
+Usage (from backend/):
+    python -m benchmarks.compare baseline.json results.json [--threshold 0.2] [--min-delta-ms 1]
+
+Exits with status 1 when any endpoint regressed.
+"""
+import sys
+import argparse
+from benchmarks.results import load_results, compare_results
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="Results of the reference commit")
+    parser.add_argument("current", help="Results to check")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed latency growth as a fraction (default 0.2)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    print(f"Baseline {baseline.get('git_commit')} vs current {current.get('git_commit')}")
+    print(f"\n{'Endpoint':<36} {'p50 ms':>19} {'p95 ms':>19} {'queries':>11}")
+    for name, after in sorted(current["endpoints"].items()):
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            print(f"{name:<36} (new)")
+            continue
+        print(f"{name:<36} "
+              f"{before['latency_ms']['p50']:>8} -> {after['latency_ms']['p50']:<8} "
+              f"{before['latency_ms']['p95']:>8} -> {after['latency_ms']['p95']:<8} "
+              f"{before['queries']['max']:>4} -> {after['queries']['max']:<4}")
+
+    regressions = compare_results(baseline, current, threshold=args.threshold, min_delta_ms=args.min_delta_ms)
+    print()
+    if regressions:
+        print("✗ REGRESSIONS:")
+        for regression in regressions:
+            print(f"  - {regression}")
+    else:
+        print("✓ NO REGRESSIONS")
+    return not regressions
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
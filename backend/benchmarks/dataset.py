@@ -0,0 +1,175 @@
+"""Scratch databases and a deterministic, seeded dataset generator."""
+import os
+import sys
+import subprocess
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine, make_url
+from app.core.config import settings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Rows generated per enrollment
+STUDENTS_PER_ENROLLMENT = 1 / 20
+COURSES_PER_ENROLLMENT = 1 / 200
+MENTORS_PER_COURSE = 1 / 20
+COURSES_PER_MENTOR = 40
+
+# Named dataset sizes (number of enrollments)
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+def parse_scale(value: str) -> int:
+    """Number of enrollments for a named scale (10k, 100k, 1m) or a plain number."""
+    return SCALES.get(value.lower()) or int(value.replace('_', ''))
+
+@contextmanager
+def scratch_database(suffix: str, keep: bool = False) -> Iterator[Engine]:
+    """
+    Create a database next to the configured one, migrate it to head and yield an engine for it.
+
+    The database is named after the configured one plus suffix and is dropped
+    afterwards unless keep is set.
+    """
+    url = make_url(settings.DATABASE_URL)
+    scratch_url = url.set(database=f"{url.database}_{suffix}")
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{scratch_url.database}"'))
+        connection.execute(text(f'CREATE DATABASE "{scratch_url.database}"'))
+
+    engine = None
+    try:
+        # Run the real migrations so the schema (and its indexes) match production
+        migration = subprocess.run(
+            [sys.executable, "-m", "alembic", "upgrade", "head"],
+            cwd=BACKEND_DIR,
+            env={**os.environ, "DATABASE_URL": scratch_url.render_as_string(hide_password=False)},
+            capture_output=True,
+            text=True
+        )
+        if migration.returncode != 0:
+            raise RuntimeError(f"Migrating the scratch database failed:\n{migration.stderr}")
+        engine = create_engine(scratch_url)
+        yield engine
+    finally:
+        if engine is not None:
+            engine.dispose()
+        if not keep:
+            with admin.connect() as connection:
+                connection.execute(text(f'DROP DATABASE IF EXISTS "{scratch_url.database}" WITH (FORCE)'))
+        admin.dispose()
+
+def seed_dataset(connection: Connection, enrollments: int = 1_000_000, seed: float = 0.42) -> Dict[str, int]:
+    """
+    Fill an empty schema with students, courses, mentors and enrollments.
+
+    Rows are generated in SQL with generate_series, and random() is seeded
+    with setseed(), so the same arguments always produce the same data.
+    Statuses follow a realistic mix (most enrollments approved, about half
+    of those completed), every tenth course has a prerequisite and every
+    course has a weekly class schedule.
+
+    Returns:
+        Number of rows generated per table
+    """
+    counts = {
+        'students': max(int(enrollments * STUDENTS_PER_ENROLLMENT), 10),
+        'courses': max(int(enrollments * COURSES_PER_ENROLLMENT), 5),
+        'enrollments': enrollments,
+    }
+    counts['mentors'] = max(int(counts['courses'] * MENTORS_PER_COURSE), 1)
+
+    connection.execute(text("SELECT setseed(:seed)"), {"seed": seed})
+    connection.execute(text("""
+        INSERT INTO students (employee_id, name, email, sbu, designation, experience_years,
+                              career_start_date, is_active, created_at, updated_at)
+        SELECT 'EMP' || lpad(g::text, 7, '0'),
+               'Employee ' || g,
+               'employee' || g || '@example.com',
+               (enum_range(NULL::sbu))[1 + floor(random() * 7)::int],
+               (ARRAY['Engineer', 'Analyst', 'Manager', 'Officer'])[1 + floor(random() * 4)::int],
+               floor(random() * 20)::int,
+               DATE '2005-01-01' + floor(random() * 7000)::int,
+               random() < 0.95,
+               now(), now()
+        FROM generate_series(1, :n) AS g
+    """), {"n": counts['students']})
+    connection.execute(text("""
+        INSERT INTO courses (name, batch_code, description, start_date, end_date, seat_limit,
+                             current_enrolled, is_archived, total_classes_offered, status,
+                             class_schedule, created_at, updated_at)
+        SELECT 'Course ' || (g % 500),
+               'BATCH-' || lpad(g::text, 6, '0'),
+               'Seeded course ' || g,
+               DATE '2022-01-01' + (g % 1400),
+               DATE '2022-01-01' + (g % 1400) + 30,
+               250, 0, false, 10,
+               (ARRAY['draft', 'ongoing', 'completed'])[1 + floor(random() * 3)::int]::coursestatus,
+               json_build_array(json_build_object(
+                   'day', (ARRAY['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'])[1 + g % 5],
+                   'start_time', lpad((9 + g % 8)::text, 2, '0') || '\:00',
+                   'end_time', lpad((11 + g % 8)::text, 2, '0') || '\:00'
+               )),
+               now(), now()
+        FROM generate_series(1, :n) AS g
+    """), {"n": counts['courses']})
+    connection.execute(text("""
+        UPDATE courses SET prerequisite_course_id = id - 1
+        WHERE id % 10 = 0
+    """))
+    connection.execute(text("""
+        INSERT INTO enrollments (student_id, course_id, course_name, batch_code, eligibility_status,
+                                 approval_status, completion_status, score, attendance_percentage,
+                                 total_attendance, present, created_at, updated_at)
+        SELECT student_id, course_id, c.name, c.batch_code,
+               CASE WHEN r_eligibility < 0.8 THEN 'ELIGIBLE'
+                    ELSE (enum_range(NULL::eligibilitystatus))[3 + floor(random() * 3)::int]::text
+               END::eligibilitystatus,
+               approval::approvalstatus,
+               CASE WHEN approval <> 'APPROVED' THEN 'NOT_STARTED'
+                    WHEN r_completion < 0.5 THEN 'COMPLETED'
+                    WHEN r_completion < 0.6 THEN 'FAILED'
+                    WHEN r_completion < 0.75 THEN 'IN_PROGRESS'
+                    ELSE 'NOT_STARTED'
+               END::completionstatus,
+               round((random() * 100)::numeric, 1),
+               round((random() * 100)::numeric, 1),
+               10, floor(random() * 11)::int,
+               now() - floor(random() * 1000)::int * interval '1 day', now()
+        FROM (
+            SELECT 1 + floor(random() * :students)::int AS student_id,
+                   1 + floor(random() * :courses)::int AS course_id,
+                   random() AS r_eligibility,
+                   random() AS r_completion,
+                   CASE WHEN r < 0.6 THEN 'APPROVED' WHEN r < 0.75 THEN 'PENDING'
+                        WHEN r < 0.9 THEN 'REJECTED' ELSE 'WITHDRAWN' END AS approval
+            FROM (SELECT random() AS r FROM generate_series(1, :n)) AS draws
+        ) AS e
+        JOIN courses c ON c.id = e.course_id
+    """), {"n": enrollments, "students": counts['students'], "courses": counts['courses']})
+    connection.execute(text("""
+        UPDATE courses c SET current_enrolled = approved.n
+        FROM (SELECT course_id, count(*) AS n FROM enrollments
+              WHERE approval_status = 'APPROVED' GROUP BY course_id) AS approved
+        WHERE approved.course_id = c.id
+    """))
+    connection.execute(text("""
+        INSERT INTO mentors (is_internal, name, email, created_at, updated_at)
+        SELECT false, 'Mentor ' || g, 'mentor' || g || '@example.com', now(), now()
+        FROM generate_series(1, :n) AS g
+    """), {"n": counts['mentors']})
+    connection.execute(text("""
+        INSERT INTO course_mentors (course_id, mentor_id, hours_taught, amount_paid, created_at, updated_at)
+        SELECT DISTINCT ON (course_id, mentor_id) course_id, mentor_id, 12.5, 500, now(), now()
+        FROM (
+            SELECT 1 + floor(random() * :courses)::int AS course_id, m AS mentor_id
+            FROM generate_series(1, :mentors) AS m, generate_series(1, :per_mentor)
+        ) AS assignments
+    """), {"courses": counts['courses'], "mentors": counts['mentors'], "per_mentor": COURSES_PER_MENTOR})
+    return counts
+
+def analyze(engine: Engine) -> None:
+    """Refresh planner statistics after seeding."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE"))
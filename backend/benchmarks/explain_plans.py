@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN harness for the main enrollment and student queries.
+
+Seeds a scratch database (1M enrollments by default), runs the real
+service and endpoint code against it, captures every SELECT it issues and
+checks with EXPLAIN that none of them scans the enrollments or students
+tables sequentially and that each workload uses the index built for it.
+
+Usage (from backend/):
+    python -m benchmarks.explain_plans [--enrollments N] [--seed S] [--keep]
+"""
+import sys
+import json
+import argparse
+from typing import Callable, Dict, List, NamedTuple, Set, Tuple
+from fastapi import Response
+from sqlalchemy import event, func, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.models.enrollment import Enrollment
+from app.models.student import Student
+from app.services.eligibility_service import EligibilityService
+from app.services.completion_rate_service import CompletionRateService
+from app.services.report_service import ReportService
+from app.core.pagination import paginate
+from app.api.students import STUDENT_SORT
+from app.api.enrollments import get_eligible_enrollments
+from app.api.mentors import get_mentor_stats
+from benchmarks.dataset import scratch_database, seed_dataset, analyze
+
+# Tables that must only be read through indexes
+LARGE_TABLES = {'enrollments', 'students'}
+
+class Sample(NamedTuple):
+    """Ids the workloads query with."""
+    student_id: int
+    course_id: int
+    prerequisite_course_id: int
+    mentor_id: int
+    student_page: List[int]
+    next_cursor: str
+
+def student_page(db: Session, response: Response, cursor: str = None) -> List[Student]:
+    """The page GET /students/ reads (the endpoint is async, so run its query through the sync session)."""
+    query = db.query(Student).filter(Student.is_active == True)
+    return paginate(query, STUDENT_SORT, response, 100, cursor=cursor)
+
+def pick_sample(db: Session) -> Sample:
+    """Pick typical rows: a student with an average history, a course with a prerequisite."""
+    student_id = db.query(Enrollment.student_id).group_by(Enrollment.student_id).order_by(
+        func.abs(func.count(Enrollment.id) - 20), Enrollment.student_id
+    ).limit(1).scalar()
+    response = Response()
+    page = student_page(db, response)
+    return Sample(
+        student_id=student_id,
+        course_id=11,
+        prerequisite_course_id=10,
+        mentor_id=1,
+        student_page=[student.id for student in page],
+        next_cursor=response.headers['X-Next-Cursor']
+    )
+
+# (name, workload, indexes its plans must use); each workload runs application code against the session
+WORKLOADS: List[Tuple[str, Callable[[Session, Sample], object], Set[str]]] = [
+    ("Prerequisite check", lambda db, s: EligibilityService.check_prerequisite(db, s.student_id, s.prerequisite_course_id),
+     {'ix_enrollments_student_approval_completion'}),
+    ("Duplicate check", lambda db, s: EligibilityService.check_duplicate(db, s.student_id, s.course_id),
+     {'ix_enrollments_student_approval_completion'}),
+    ("Annual limit check", lambda db, s: EligibilityService.check_annual_limit(db, s.student_id, s.course_id),
+     {'ix_enrollments_student_approval_completion'}),
+    ("Student completion rate", lambda db, s: CompletionRateService.get_stats(db, s.student_id),
+     {'ix_enrollments_student_approval_completion'}),
+    ("Completion rates for a page", lambda db, s: CompletionRateService.get_stats_for_students(db, s.student_page),
+     {'ix_enrollments_student_approval_completion'}),
+    ("Course report", lambda db, s: ReportService.course_report_rows(db, s.course_id),
+     {'ix_enrollments_course_approval'}),
+    ("Approval queue for a course", lambda db, s: get_eligible_enrollments(course_id=s.course_id, sbu=None, db=db),
+     {'ix_enrollments_pending_eligible_course'}),
+    ("Mentor stats", lambda db, s: get_mentor_stats(s.mentor_id, db),
+     {'ix_enrollments_approved_course_completion'}),
+    ("Student list first page", lambda db, s: student_page(db, Response()),
+     {'ix_students_active_employee_id'}),
+    ("Student list by cursor", lambda db, s: student_page(db, Response(), s.next_cursor),
+     {'ix_students_active_employee_id'}),
+]
+
+def capture_selects(engine: Engine, workload: Callable[[Session, Sample], object], sample: Sample) -> List[Tuple[str, object]]:
+    """Run a workload and return the SELECT statements (with parameters) it issued."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session(bind=engine) as db:
+            workload(db, sample)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+def plan_scans(plan: Dict) -> List[Tuple[str, str, str]]:
+    """Flatten a JSON plan into (node type, relation, index) for every scan node."""
+    scans = []
+    if 'Relation Name' in plan or 'Index Name' in plan:
+        scans.append((plan['Node Type'], plan.get('Relation Name', ''), plan.get('Index Name', '')))
+    for child in plan.get('Plans', []):
+        scans.extend(plan_scans(child))
+    return scans
+
+def explain(engine: Engine, statement: str, parameters) -> Dict:
+    """EXPLAIN a captured statement with the parameters it ran with."""
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        return (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+    finally:
+        connection.close()
+
+def check_workload(engine: Engine, name: str, workload, expected: Set[str], sample: Sample) -> bool:
+    """Check that no query of a workload scans a large table sequentially and that it uses the expected indexes."""
+    statements = capture_selects(engine, workload, sample)
+    indexes: Set[str] = set()
+    problems = []
+    for statement, parameters in statements:
+        for node_type, relation, index in plan_scans(explain(engine, statement, parameters)):
+            if node_type == 'Seq Scan' and relation in LARGE_TABLES:
+                problems.append(f"Seq Scan on {relation} in: {' '.join(statement.split())[:160]}")
+            if index:
+                indexes.add(index)
+    for index in sorted(expected - indexes):
+        problems.append(f"Expected index {index} not used")
+
+    if problems:
+        print(f"✗ {name}")
+        for problem in problems:
+            print(f"    {problem}")
+        return False
+    print(f"✓ {name}: {len(statements)} queries, indexes used: {', '.join(sorted(indexes)) or 'none'}")
+    return True
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--enrollments", type=int, default=1_000_000, help="Number of enrollments to seed")
+    parser.add_argument("--seed", type=float, default=0.42, help="Random seed for the dataset (-1 to 1)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("QUERY PLAN CHECKS")
+    print("=" * 60)
+
+    with scratch_database("explain", keep=args.keep) as engine:
+        with engine.begin() as connection:
+            counts = seed_dataset(connection, enrollments=args.enrollments, seed=args.seed)
+        analyze(engine)
+        print("Seeded " + ", ".join(f"{n:,} {table}" for table, n in counts.items()))
+
+        with Session(bind=engine) as db:
+            sample = pick_sample(db)
+            db.execute(text("SELECT 1"))
+
+        results = [check_workload(engine, name, workload, expected, sample) for name, workload, expected in WORKLOADS]
+
+    print("\n" + "=" * 60)
+    if all(results):
+        print("✓ ALL QUERIES USE INDEXES")
+    else:
+        print("✗ SOME QUERIES SCAN LARGE TABLES SEQUENTIALLY OR MISS THEIR INDEXES")
+    print("=" * 60)
+    return all(results)
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
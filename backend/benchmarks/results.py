@@ -0,0 +1,110 @@
+"""
+Benchmark results files.
+
+Results are JSON written with sorted keys, fixed indentation and rounded
+numbers so that two runs (e.g. before and after a commit) can be compared
+with a plain diff or with compare_results():
+
+    {
+      "format": 1,
+      "git_commit": "...", "created_at": "...",
+      "dataset": {"seed": 0.42, "students": 500, "courses": 50, "enrollments": 10000, "mentors": 2},
+      "iterations": 20,
+      "endpoints": {
+        "GET /enrollments": {
+          "requests": 20, "status_codes": [200], "response_bytes": 51234,
+          "latency_ms": {"mean": 4.1, "p50": 3.9, "p90": 4.8, "p95": 5.2, "p99": 6.0, "max": 6.0},
+          "queries": {"median": 2, "max": 2}
+        }
+      }
+    }
+"""
+import json
+import math
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+from benchmarks.dataset import BACKEND_DIR
+
+RESULTS_FORMAT = 1
+PERCENTILES = (50, 90, 95, 99)
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """p-th percentile of values (nearest rank)."""
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+def summarize(latencies_ms: List[float], query_counts: List[int], status_codes: List[int], response_bytes: int) -> Dict:
+    """Summary of all timed requests for one endpoint."""
+    latency = {f"p{p}": round(percentile(latencies_ms, p), 2) for p in PERCENTILES}
+    latency["mean"] = round(statistics.fmean(latencies_ms), 2)
+    latency["max"] = round(max(latencies_ms), 2)
+    return {
+        "requests": len(latencies_ms),
+        "status_codes": sorted(set(status_codes)),
+        "response_bytes": response_bytes,
+        "latency_ms": latency,
+        "queries": {"median": int(statistics.median(query_counts)), "max": max(query_counts)},
+    }
+
+def git_commit() -> Optional[str]:
+    """Commit the benchmarked tree is at (None outside a git checkout)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def new_results(dataset: Dict, iterations: int) -> Dict:
+    """Empty results document for a run."""
+    return {
+        "format": RESULTS_FORMAT,
+        "git_commit": git_commit(),
+        "created_at": datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
+        "dataset": dataset,
+        "iterations": iterations,
+        "endpoints": {},
+    }
+
+def write_results(path: str, results: Dict) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def load_results(path: str) -> Dict:
+    with open(path) as f:
+        results = json.load(f)
+    if results.get("format") != RESULTS_FORMAT:
+        raise ValueError(f"{path}: unsupported results format {results.get('format')!r}")
+    return results
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = 0.2, min_delta_ms: float = 1.0) -> List[str]:
+    """
+    Regressions of current against baseline.
+
+    An endpoint regresses when its p50 or p95 latency grows by more than
+    threshold (as a fraction) and by at least min_delta_ms, when it issues
+    more queries, or when its status codes change.
+    """
+    regressions = []
+    if baseline["dataset"] != current["dataset"]:
+        regressions.append(f"datasets differ: {baseline['dataset']} vs {current['dataset']}")
+
+    for name, before in sorted(baseline["endpoints"].items()):
+        after = current["endpoints"].get(name)
+        if after is None:
+            regressions.append(f"{name}: missing from current results")
+            continue
+        for key in ("p50", "p95"):
+            old, new = before["latency_ms"][key], after["latency_ms"][key]
+            if new - old >= min_delta_ms and new > old * (1 + threshold):
+                growth = f" (+{(new / old - 1) * 100:.0f}%)" if old else ""
+                regressions.append(f"{name}: {key} latency {old}ms -> {new}ms{growth}")
+        if after["queries"]["max"] > before["queries"]["max"]:
+            regressions.append(f"{name}: queries {before['queries']['max']} -> {after['queries']['max']}")
+        if after["status_codes"] != before["status_codes"]:
+            regressions.append(f"{name}: status codes {before['status_codes']} -> {after['status_codes']}")
+    return regressions
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+End-to-end endpoint benchmarks.
+
+Seeds a scratch database at the requested scale, drives the FastAPI app
+in-process (TestClient, no network) against it and records latency
+percentiles and SQL query counts per endpoint in a JSON results file.
+
+Usage (from backend/):
+    python -m benchmarks.runner --scale 10k [--iterations 20] [--output results.json]
+    python -m benchmarks.compare baseline.json results.json
+"""
+import io
+import csv
+import sys
+import time
+import argparse
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from anyio.from_thread import start_blocking_portal
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.main import app
+from app.db.base import SessionLocal, AsyncSessionLocal, async_database_url
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.services.import_job_service import ACTIVE_STATUSES, COMPLETED
+from benchmarks.dataset import scratch_database, seed_dataset, analyze, parse_scale
+from benchmarks.results import new_results, summarize, write_results
+
+API = "/api/v1"
+
+class Sample(NamedTuple):
+    """Ids the benchmarked requests refer to (all exist at every scale)."""
+    course_id: int = 10  # Has a prerequisite (every tenth course does)
+    student_id: int = 1
+    mentor_id: int = 1
+    import_rows: int = 200
+
+class Case(NamedTuple):
+    """One benchmarked endpoint."""
+    name: str
+    path: str  # Formatted with the Sample fields
+    method: str = "GET"
+    upload: Optional[Callable[[Sample], Tuple[str, bytes]]] = None  # File for import endpoints
+    max_iterations: Optional[int] = None  # Cap for endpoints that read whole tables
+
+def _employee_csv(sample: Sample) -> Tuple[str, bytes]:
+    """CSV of existing employees (an import that updates them)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['employee_id', 'name', 'email', 'sbu', 'designation'])
+    for i in range(1, sample.import_rows + 1):
+        writer.writerow([f"EMP{i:07d}", f"Employee {i}", f"employee{i}@example.com", 'IT', 'Engineer'])
+    return "employees.csv", buffer.getvalue().encode('utf-8')
+
+def _enrollment_csv(sample: Sample) -> Tuple[str, bytes]:
+    """CSV enrolling existing employees in the sample course."""
+    name, content = _employee_csv(sample)
+    return "enrollments.csv", content
+
+CASES: List[Case] = [
+    Case("GET /enrollments", f"{API}/enrollments/?limit=100"),
+    Case("GET /enrollments?course_id", f"{API}/enrollments/?course_id={{course_id}}"),
+    Case("GET /enrollments/eligible", f"{API}/enrollments/eligible?course_id={{course_id}}"),
+    Case("GET /enrollments/dashboard/stats", f"{API}/enrollments/dashboard/stats"),
+    Case("GET /students", f"{API}/students/?limit=100"),
+    Case("GET /students/{id}/enrollments", f"{API}/students/{{student_id}}/enrollments"),
+    Case("GET /students/all/with-courses", f"{API}/students/all/with-courses?limit=1000"),
+    Case("GET /courses", f"{API}/courses/?limit=100"),
+    Case("GET /courses/{id}", f"{API}/courses/{{course_id}}"),
+    Case("GET /courses/{id}/report", f"{API}/courses/{{course_id}}/report"),
+    Case("GET /students/report/overall", f"{API}/students/report/overall", max_iterations=3),
+    Case("GET /mentors", f"{API}/mentors/"),
+    Case("GET /mentors/{id}/stats", f"{API}/mentors/{{mentor_id}}/stats"),
+    Case("POST /students/import/csv", f"{API}/students/import/csv", "POST", _employee_csv, max_iterations=5),
+    Case("POST /imports/csv", f"{API}/imports/csv?course_id={{course_id}}", "POST", _enrollment_csv, max_iterations=5),
+]
+
+class QueryCounter:
+    """Counts statements executed on a set of engines (from any thread)."""
+
+    def __init__(self, *engines: Engine):
+        self.count = 0
+        self._lock = threading.Lock()
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.count += 1
+
+def _wait_for_job(client: TestClient, headers: Dict, job_id: str, timeout: float = 600) -> None:
+    """Poll an import job until it finishes; a failed job aborts the run."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"{API}/imports/jobs/{job_id}", headers=headers).json()
+        if job["status"] == COMPLETED:
+            return
+        if job["status"] not in ACTIVE_STATUSES:
+            raise RuntimeError(f"Import job {job_id} {job['status']}: {job.get('error')}")
+        time.sleep(0.01)
+    raise RuntimeError(f"Import job {job_id} did not finish within {timeout}s")
+
+def run_once(client: TestClient, headers: Dict, case: Case, sample: Sample) -> Tuple[int, int]:
+    """
+    Issue one request for a case.
+
+    Import uploads are timed until their background job has finished.
+
+    Returns:
+        (status code, response size in bytes)
+    """
+    path = case.path.format(**sample._asdict())
+    if case.upload is None:
+        response = client.request(case.method, path, headers=headers)
+        return response.status_code, len(response.content)
+
+    filename, content = case.upload(sample)
+    response = client.request(case.method, path, headers=headers, files={"file": (filename, content, "text/csv")})
+    if response.status_code == 202:
+        _wait_for_job(client, headers, response.json()["job_id"])
+    return response.status_code, len(response.content)
+
+def run_case(client: TestClient, headers: Dict, counter: QueryCounter, case: Case, sample: Sample,
+             iterations: int, warmup: int) -> Dict:
+    """Time a case and summarize latency and query counts."""
+    iterations = min(iterations, case.max_iterations or iterations)
+    for _ in range(min(warmup, iterations)):
+        run_once(client, headers, case, sample)
+
+    latencies, query_counts, status_codes = [], [], []
+    response_bytes = 0
+    for _ in range(iterations):
+        queries_before = counter.count
+        started = time.perf_counter()
+        status_code, response_bytes = run_once(client, headers, case, sample)
+        latencies.append((time.perf_counter() - started) * 1000)
+        query_counts.append(counter.count - queries_before)
+        status_codes.append(status_code)
+    return summarize(latencies, query_counts, status_codes, response_bytes)
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="10k", help="Enrollments to seed: 10k, 100k, 1m or a number")
+    parser.add_argument("--seed", type=float, default=0.42, help="Random seed for the dataset (-1 to 1)")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per endpoint first")
+    parser.add_argument("--only", action="append", help="Only run cases whose name contains this (repeatable)")
+    parser.add_argument("--output", help="Results file (default: benchmark_<scale>.json)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    args = parser.parse_args()
+
+    enrollments = parse_scale(args.scale)
+    cases = [c for c in CASES if not args.only or any(o in c.name for o in args.only)]
+    output = args.output or f"benchmark_{args.scale}.json"
+
+    print("=" * 60)
+    print(f"ENDPOINT BENCHMARKS ({enrollments:,} enrollments)")
+    print("=" * 60)
+
+    with scratch_database("bench", keep=args.keep) as engine:
+        with engine.begin() as connection:
+            counts = seed_dataset(connection, enrollments=enrollments, seed=args.seed)
+        analyze(engine)
+        print("Seeded " + ", ".join(f"{n:,} {table}" for table, n in counts.items()))
+
+        # Every session the app opens (requests and background jobs) now uses the scratch database
+        SessionLocal.configure(bind=engine)
+        async_engine = create_async_engine(async_database_url(engine.url))
+        AsyncSessionLocal.configure(bind=async_engine)
+        counter = QueryCounter(engine, async_engine.sync_engine)
+        headers = {"Authorization": f"Bearer {create_access_token(settings.ADMIN_EMAIL)}"}
+        sample = Sample()
+
+        results = new_results({"seed": args.seed, **counts}, args.iterations)
+        print(f"\n{'Endpoint':<36} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}")
+        # Serve every request on one event loop, as uvicorn does (the async pool's
+        # connections belong to it), without running the app's lifespan: its
+        # scheduler jobs would add statements to the measured requests
+        with start_blocking_portal() as portal:
+            client = TestClient(app)
+            client.portal = portal
+            for case in cases:
+                summary = run_case(client, headers, counter, case, sample, args.iterations, args.warmup)
+                results["endpoints"][case.name] = summary
+                flag = "" if summary["status_codes"] in ([200], [202]) else f"  status {summary['status_codes']}"
+                print(f"{case.name:<36} {summary['latency_ms']['p50']:>9} {summary['latency_ms']['p95']:>9} "
+                      f"{summary['queries']['max']:>8}{flag}")
+            portal.call(async_engine.dispose)
+
+    write_results(output, results)
+    print(f"\nResults written to {output}")
+    return all(s["status_codes"] in ([200], [202]) for s in results["endpoints"].values())
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,23 @@
+"""Pytest fixtures for the test scripts. Kept here so running a script never imports pytest."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app_client(request):
+    """Run the module's requests inside `with client:` so pooled async connections share one event loop."""
+    client = getattr(request.module, "client", None)
+    if not isinstance(client, TestClient):
+        yield None
+        return
+    with client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def data(request):
+    """Data seeded once by the module's create_test_data(), removed by its cleanup_test_data()."""
+    data = request.module.create_test_data()
+    yield data
+    request.module.cleanup_test_data(data)
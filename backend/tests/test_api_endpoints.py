@@ -7,13 +7,20 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi.testclient import TestClient
 from app.main import app
-from app.db.base import SessionLocal
+from app.db.base import SessionLocal, engine, async_engine
 from app.models.course import Course
 from app.models.student import Student
+from app.models.mentor import Mentor
+from app.models.course_mentor import CourseMentor
 from app.models.enrollment import Enrollment, ApprovalStatus, CompletionStatus, EligibilityStatus
 from app.core.auth import create_access_token
 from app.core.config import settings
+from sqlalchemy import event
 from datetime import date, timedelta
+import asyncio
+import time
+import anyio.to_thread
+import httpx
 
 client = TestClient(app)
 
@@ -227,6 +234,48 @@ def test_get_enrollments_endpoint():
         print(f"✗ FAIL: Request failed with status {response.status_code}: {response.text}")
         return False
 
+def test_overall_report_endpoint(student_id):
+    """Test overall training history report in Excel and CSV formats."""
+    print("\n" + "=" * 60)
+    print("TEST: Overall Report Endpoint")
+    print("=" * 60)
+    
+    import io
+    import pandas as pd
+    
+    headers = get_auth_headers()
+    db = SessionLocal()
+    try:
+        employee_id = db.query(Student.employee_id).filter(Student.id == student_id).scalar()
+    finally:
+        db.close()
+    
+    all_passed = True
+    for report_format, reader in [("xlsx", pd.read_excel), ("csv", pd.read_csv)]:
+        response = client.get(f"/api/v1/students/report/overall?format={report_format}", headers=headers)
+        print(f"✓ {report_format} response status: {response.status_code}")
+        if response.status_code != 200:
+            print(f"✗ FAIL: Request failed with status {response.status_code}: {response.text}")
+            all_passed = False
+            continue
+        
+        df = reader(io.BytesIO(response.content), dtype=str, keep_default_na=False)
+        rows = df[df['bsid'] == employee_id]
+        print(f"✓ {report_format} report has {len(df)} rows")
+        # The new student has no enrollments yet
+        if (list(df.columns)[:3] == ['bsid', 'name', 'email']
+                and len(rows) == 1
+                and rows.iloc[0]['course_name'] == 'No courses taken yet'
+                and list(df['bsid']) == sorted(df['bsid'])):
+            print(f"✓ {report_format} report contents are correct")
+        else:
+            print(f"✗ FAIL: Unexpected {report_format} report contents")
+            all_passed = False
+    
+    if all_passed:
+        print("\n✓ PASS: Overall report endpoint works correctly")
+    return all_passed
+
 def test_unauthorized_access():
     """Test that endpoints require authentication."""
     print("\n" + "=" * 60)
@@ -245,6 +294,254 @@ def test_unauthorized_access():
         print(f"\n✗ FAIL: Expected 403, got {response.status_code}")
         return False
 
+def test_students_with_courses_query_count(course_id, student_id):
+    """Test that students with course history are loaded in a fixed number of queries."""
+    print("\n" + "=" * 60)
+    print("TEST: Students With Courses Query Count")
+    print("=" * 60)
+    
+    headers = get_auth_headers()
+    db = SessionLocal()
+    try:
+        db.add(Enrollment(
+            student_id=student_id,
+            course_id=course_id,
+            approval_status=ApprovalStatus.APPROVED,
+            completion_status=CompletionStatus.COMPLETED
+        ))
+        db.commit()
+    finally:
+        db.close()
+    
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        queries = {}
+        for limit in (1, 1000):
+            statements.clear()
+            response = client.get(f"/api/v1/students/all/with-courses?limit={limit}", headers=headers)
+            if response.status_code != 200:
+                print(f"✗ FAIL: Request failed with status {response.status_code}: {response.text}")
+                return False
+            queries[limit] = len(statements)
+            print(f"✓ {len(response.json())} student(s) loaded with {len(statements)} queries")
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    
+    if queries[1] != queries[1000]:
+        print(f"✗ FAIL: Query count grows with page size: {queries}")
+        return False
+    
+    student = next((s for s in response.json() if s['id'] == student_id), None)
+    if not student or student['total_courses'] != 1 or student['completed_courses'] != 1:
+        print(f"✗ FAIL: Unexpected course history: {student}")
+        return False
+    if not student['enrollments'][0]['course_name'].startswith("Test Course API") or student['never_taken_course']:
+        print(f"✗ FAIL: Unexpected enrollment entry: {student['enrollments']}")
+        return False
+    print("✓ Course history and completion counts included")
+    
+    print("\n✓ PASS: Students with courses loaded without per-student queries")
+    return True
+
+def test_mentor_stats_endpoints(course_id, student_id):
+    """Test mentor listing and statistics computed with grouped queries."""
+    print("\n" + "=" * 60)
+    print("TEST: Mentor Listing and Stats")
+    print("=" * 60)
+    
+    headers = get_auth_headers()
+    db = SessionLocal()
+    mentor_id = None
+    try:
+        mentor = Mentor(is_internal=False, name=f"Test Mentor API {int(time.time() * 1000)}")
+        db.add(mentor)
+        db.flush()
+        mentor_id = mentor.id
+        db.add(CourseMentor(course_id=course_id, mentor_id=mentor_id, hours_taught=12.5, amount_paid=300))
+        db.commit()
+        
+        statements = []
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        # The listing is an async endpoint served by the async engine
+        for bind in (engine, async_engine.sync_engine):
+            event.listen(bind, "before_cursor_execute", count_statement)
+        try:
+            listing = client.get("/api/v1/mentors/?type=external", headers=headers)
+            listing_queries = len(statements)
+            statements.clear()
+            stats = client.get(f"/api/v1/mentors/{mentor_id}/stats", headers=headers)
+            stats_queries = len(statements)
+        finally:
+            for bind in (engine, async_engine.sync_engine):
+                event.remove(bind, "before_cursor_execute", count_statement)
+        
+        if listing.status_code != 200 or stats.status_code != 200:
+            print(f"✗ FAIL: Requests failed with status {listing.status_code}/{stats.status_code}")
+            return False
+        
+        listed = next((m for m in listing.json() if m['id'] == mentor_id), None)
+        if not listed or listed['course_count'] != 1 or listing_queries != 1:
+            print(f"✗ FAIL: Unexpected listing ({listing_queries} queries): {listed}")
+            return False
+        print("✓ Mentors listed with course counts in one query")
+        
+        # The enrollment from the student tests is approved and completed
+        data = stats.json()
+        course_stats = data['per_course_stats']
+        if data['total_courses_mentored'] != 1 or data['total_hours_overall'] != 12.5 or data['total_amount_overall'] != 300.0:
+            print(f"✗ FAIL: Unexpected totals: {data}")
+            return False
+        if len(course_stats) != 1 or course_stats[0]['participants_count'] != 1 or course_stats[0]['completion_ratio'] != 1.0:
+            print(f"✗ FAIL: Unexpected per-course stats: {course_stats}")
+            return False
+        if stats_queries != 2:
+            print(f"✗ FAIL: Stats took {stats_queries} queries, expected 2")
+            return False
+        print("✓ Mentor stats computed with one grouped query")
+        
+        print("\n✓ PASS: Mentor endpoints work correctly")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"✗ FAIL: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if mentor_id:
+            db.query(CourseMentor).filter(CourseMentor.mentor_id == mentor_id).delete()
+            db.query(Mentor).filter(Mentor.id == mentor_id).delete()
+            db.commit()
+        db.close()
+
+def test_keyset_pagination():
+    """Test cursor pagination and total counts on list endpoints."""
+    print("\n" + "=" * 60)
+    print("TEST: Keyset Pagination")
+    print("=" * 60)
+    
+    headers = get_auth_headers()
+    db = SessionLocal()
+    prefix = f"TEST-PAGE-{int(time.time() * 1000)}"
+    try:
+        for i in range(5):
+            db.add(Student(
+                employee_id=f"{prefix}-{i}",
+                name=f"Test Page Student {i}",
+                email=f"{prefix.lower()}-{i}@example.com",
+                sbu="IT"
+            ))
+        db.commit()
+        
+        # Walk all pages by cursor and compare with one offset page
+        response = client.get("/api/v1/students/?sbu=IT&limit=1000&include_total=true", headers=headers)
+        expected = [s['employee_id'] for s in response.json()]
+        if response.headers.get("X-Total-Count") != str(len(expected)):
+            print(f"✗ FAIL: X-Total-Count {response.headers.get('X-Total-Count')} != {len(expected)}")
+            return False
+        print(f"✓ X-Total-Count reports {len(expected)} students")
+        
+        seen = []
+        cursor = None
+        while True:
+            url = "/api/v1/students/?sbu=IT&limit=2" + (f"&cursor={cursor}" if cursor else "")
+            response = client.get(url, headers=headers)
+            if response.status_code != 200:
+                print(f"✗ FAIL: Page request failed with status {response.status_code}: {response.text}")
+                return False
+            seen.extend(s['employee_id'] for s in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        if seen != expected:
+            print("✗ FAIL: Cursor pages do not match offset results")
+            return False
+        print(f"✓ {len(seen)} students paged by cursor in employee_id order")
+        
+        response = client.get("/api/v1/students/?cursor=not-a-cursor", headers=headers)
+        if response.status_code != 400:
+            print(f"✗ FAIL: Invalid cursor returned {response.status_code}")
+            return False
+        print("✓ Invalid cursor rejected with 400")
+        
+        # Courses sort by start date and id, both descending
+        for path in ("/api/v1/courses/", "/api/v1/enrollments/"):
+            first = client.get(f"{path}?limit=1", headers=headers)
+            cursor = first.headers.get("X-Next-Cursor")
+            if cursor:
+                second = client.get(f"{path}?limit=1&cursor={cursor}", headers=headers)
+                offset = client.get(f"{path}?limit=1&skip=1", headers=headers)
+                if second.status_code != 200 or second.json() != offset.json():
+                    print(f"✗ FAIL: Second cursor page of {path} differs from offset page")
+                    return False
+            print(f"✓ {path} supports cursor pagination")
+        
+        print("\n✓ PASS: Keyset pagination works correctly")
+        return True
+    except Exception as e:
+        print(f"✗ FAIL: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.query(Student).filter(Student.employee_id.like(f"{prefix}-%")).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+def test_async_reads_without_threadpool():
+    """Test that the async read endpoints are served while every threadpool worker is busy."""
+    print("\n" + "=" * 60)
+    print("TEST: Async Reads Without the Threadpool")
+    print("=" * 60)
+
+    paths = [
+        "/api/v1/students/",
+        "/api/v1/students/count",
+        "/api/v1/courses/",
+        "/api/v1/enrollments/",
+        "/api/v1/enrollments/dashboard/stats",
+        "/api/v1/mentors/",
+    ]
+    headers = get_auth_headers()
+
+    async def fetch_all():
+        # Take the threadpool's only token: a sync endpoint or dependency would wait forever
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        total_tokens = limiter.total_tokens
+        limiter.total_tokens = 1
+        await limiter.acquire()
+        try:
+            async with httpx.AsyncClient(app=app, base_url="http://test") as async_client:
+                return await asyncio.wait_for(
+                    asyncio.gather(*(async_client.get(path, headers=headers) for path in paths)),
+                    timeout=30
+                )
+        finally:
+            limiter.release()
+            limiter.total_tokens = total_tokens
+
+    try:
+        # Run on the client's event loop, which owns the pooled async connections
+        responses = client.portal.call(fetch_all)
+    except asyncio.TimeoutError:
+        print("✗ FAIL: Requests waited for a threadpool worker")
+        return False
+
+    for path, response in zip(paths, responses):
+        if response.status_code != 200:
+            print(f"✗ FAIL: {path} returned {response.status_code}: {response.text[:200]}")
+            return False
+    print(f"✓ {len(paths)} concurrent reads served without a threadpool worker")
+
+    print("\n✓ PASS: Read endpoints run on the event loop")
+    return True
+
 def cleanup_test_data(course_id, student_id):
     """Clean up test data."""
     print("\n" + "=" * 60)
@@ -304,6 +601,23 @@ def main():
     # Test 8: Get enrollments
     results.append(test_get_enrollments_endpoint())
     
+    if student_id:
+        # Test 9: Overall report
+        results.append(test_overall_report_endpoint(student_id))
+    
+    if course_id and student_id:
+        # Test 10: Students with course history
+        results.append(test_students_with_courses_query_count(course_id, student_id))
+        
+        # Test 11: Mentor listing and stats
+        results.append(test_mentor_stats_endpoints(course_id, student_id))
+    
+    # Test 12: Keyset pagination
+    results.append(test_keyset_pagination())
+    
+    # Test 13: Async read endpoints
+    results.append(test_async_reads_without_threadpool())
+    
     # Cleanup
     cleanup_test_data(course_id, student_id)
     
@@ -317,6 +631,8 @@ def main():
     print("=" * 60)
 
 if __name__ == "__main__":
-    success = main()
+    # One event loop for all requests: pooled async connections belong to it
+    with client:
+        success = main()
     sys.exit(0 if success else 1)
 
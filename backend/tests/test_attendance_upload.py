@@ -250,6 +250,135 @@ def test_attendance_matching_logic():
     finally:
         db.close()
 
+def test_attendance_upload_endpoint():
+    """Test the attendance upload endpoint resolves students in batched queries."""
+    print("\n" + "=" * 60)
+    print("TEST: Attendance Upload Endpoint")
+    print("=" * 60)
+    
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.main import app
+    from app.db.base import engine
+    from app.core.auth import create_access_token
+    from app.core.config import settings
+    
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token(getattr(settings, 'ADMIN_EMAIL', 'test@example.com'))}"}
+    
+    db = SessionLocal()
+    timestamp = int(time.time() * 1000)
+    course_id = None
+    student_ids = []
+    try:
+        course = Course(
+            name=f"Test Course Upload {timestamp}",
+            batch_code=f"UPLOAD-{timestamp}",
+            description="Test course",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            seat_limit=50,
+            current_enrolled=0,
+            total_classes_offered=10,
+            is_archived=False
+        )
+        db.add(course)
+        students = [
+            Student(
+                employee_id=f"TEST-UPLOAD-{i}-{timestamp}",
+                name=f"Upload Student {i} {timestamp}",
+                email=f"testupload{i}{timestamp}@example.com",
+                sbu="IT",
+                designation="Developer"
+            )
+            for i in range(4)
+        ]
+        db.add_all(students)
+        db.commit()
+        course_id = course.id
+        student_ids = [student.id for student in students]
+        
+        # Students 0-2 are enrolled, student 3 is not
+        for student in students[:3]:
+            db.add(Enrollment(
+                student_id=student.id,
+                course_id=course.id,
+                course_name=course.name,
+                batch_code=course.batch_code,
+                eligibility_status=EligibilityStatus.ELIGIBLE,
+                approval_status=ApprovalStatus.APPROVED,
+                completion_status=CompletionStatus.IN_PROGRESS
+            ))
+        db.commit()
+        
+        csv_data = pd.DataFrame([
+            {'bsid': students[0].employee_id, 'email': None, 'name': None, 'total_classes_attended': 9, 'score': 90},
+            {'bsid': None, 'email': students[1].email, 'name': None, 'total_classes_attended': 5, 'score': 50},
+            {'bsid': None, 'email': None, 'name': students[2].name, 'total_classes_attended': 8, 'score': 80},
+            {'bsid': f"UNKNOWN-{timestamp}", 'email': None, 'name': None, 'total_classes_attended': 8, 'score': 80},
+            {'bsid': students[3].employee_id, 'email': None, 'name': None, 'total_classes_attended': 8, 'score': 80},
+            {'bsid': None, 'email': None, 'name': None, 'total_classes_attended': 8, 'score': 80},
+        ]).to_csv(index=False).encode()
+        
+        # Count queries that touch the students table during the upload
+        student_queries = []
+        def count_student_queries(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT') and 'FROM students' in statement:
+                student_queries.append(statement)
+        event.listen(engine, "before_cursor_execute", count_student_queries)
+        try:
+            response = client.post(
+                f"/api/v1/completions/attendance/upload?course_id={course.id}",
+                files={"file": ("attendance.csv", csv_data, "text/csv")},
+                headers=headers
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", count_student_queries)
+        
+        print(f"✓ Upload response status: {response.status_code}")
+        data = response.json()
+        print(f"✓ Results: processed={data.get('processed')}, not_found={data.get('not_found')}, student queries={len(student_queries)}")
+        
+        db.expire_all()
+        statuses = {
+            e.student_id: e.completion_status
+            for e in db.query(Enrollment).filter(Enrollment.course_id == course.id)
+        }
+        errors = {error['row']: error['error'] for error in data.get('errors', [])}
+        checks = [
+            response.status_code == 200,
+            data['processed'] == 3,
+            data['not_found'] == 2,
+            statuses[students[0].id] == CompletionStatus.COMPLETED,
+            statuses[students[1].id] == CompletionStatus.FAILED,
+            statuses[students[2].id] == CompletionStatus.COMPLETED,
+            errors.get(5) == f"Student not found: UNKNOWN-{timestamp}",
+            errors.get(6) == f"Enrollment not found for {students[3].name} in {course.name}",
+            errors.get(7) == "Name, email, or bsid/employee_id is required",
+            len(student_queries) <= 3,
+        ]
+        
+        if all(checks):
+            print("\n✓ PASS: Attendance upload endpoint works correctly")
+            return True
+        else:
+            print(f"\n✗ FAIL: Unexpected upload result: {checks}")
+            return False
+    except Exception as e:
+        db.rollback()
+        print(f"\n✗ FAIL: Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if course_id:
+            db.query(Enrollment).filter(Enrollment.course_id == course_id).delete()
+            db.query(Course).filter(Course.id == course_id).delete()
+        if student_ids:
+            db.query(Student).filter(Student.id.in_(student_ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
 def cleanup_test_data(enrollment_id, course_id, student_id):
     """Clean up test data."""
     print("\n" + "=" * 60)
@@ -307,6 +436,9 @@ def main():
     if not student_id and s_id:
         student_id = s_id
     
+    # Test 4: Upload endpoint
+    results.append(test_attendance_upload_endpoint())
+    
     # Cleanup
     cleanup_test_data(enrollment_id, course_id, student_id)
     
@@ -6,10 +6,12 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.db.base import SessionLocal
-from app.core.auth import verify_admin_credentials, create_access_token, verify_token
+from app.core.auth import verify_admin_credentials, create_access_token, verify_token, clear_token_cache
 from app.core.config import settings
+from fastapi import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
 from jose import jwt
+import time
 
 def test_password_timing_attack_protection():
     """Test that password comparison uses constant-time comparison."""
@@ -108,6 +110,93 @@ def test_jwt_token_expiration():
         print(f"\n✗ FAIL: Token expiration time incorrect (got {time_until_expiry_minutes:.1f} min, expected {expected_minutes} min)")
         return False
 
+def _bearer(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+def test_verified_token_cache():
+    """Test that cached tokens still expire and tampered tokens are still rejected."""
+    print("\n" + "=" * 60)
+    print("TEST: Verified Token Cache")
+    print("=" * 60)
+    
+    clear_token_cache()
+    email = getattr(settings, 'ADMIN_EMAIL', 'test@example.com')
+    
+    # A token that expires in two seconds is served from the cache until then
+    token = jwt.encode(
+        {"sub": email, "exp": int(time.time()) + 2, "role": "admin"},
+        settings.SECRET_KEY, algorithm=settings.ALGORITHM
+    )
+    first = verify_token(_bearer(token))
+    second = verify_token(_bearer(token))
+    if first != second or second.get("sub") != email:
+        print("✗ FAIL: Cached token payload differs")
+        return False
+    print("✓ Repeat verification served from the cache")
+    
+    time.sleep(3)
+    try:
+        verify_token(_bearer(token))
+        print("✗ FAIL: Expired token accepted from the cache")
+        return False
+    except HTTPException as e:
+        if e.status_code != 401:
+            print(f"✗ FAIL: Expired token gave {e.status_code}, expected 401")
+            return False
+    print("✓ Cached token rejected once its exp has passed")
+    
+    # A tampered token never matches a cached digest and fails verification
+    valid = create_access_token(email)
+    verify_token(_bearer(valid))
+    tampered = valid[:-2] + ("AA" if not valid.endswith("AA") else "BB")
+    try:
+        verify_token(_bearer(tampered))
+        print("✗ FAIL: Tampered token accepted")
+        return False
+    except HTTPException as e:
+        if e.status_code != 401:
+            print(f"✗ FAIL: Tampered token gave {e.status_code}, expected 401")
+            return False
+    print("✓ Tampered token rejected")
+    
+    print("\n✓ PASS: Verified token cache works correctly")
+    return True
+
+def test_auth_path_benchmark():
+    """Micro-benchmark of the per-request auth dependency with and without the token cache."""
+    print("\n" + "=" * 60)
+    print("TEST: Auth Path Benchmark")
+    print("=" * 60)
+    
+    email = getattr(settings, 'ADMIN_EMAIL', 'test@example.com')
+    credentials = _bearer(create_access_token(email))
+    iterations = 2000
+    
+    # Before: every request decodes and verifies the signature
+    start = time.perf_counter()
+    for _ in range(iterations):
+        clear_token_cache()
+        verify_token(credentials)
+    uncached = (time.perf_counter() - start) / iterations * 1e6
+    
+    # After: repeat requests with the same token hit the cache
+    clear_token_cache()
+    verify_token(credentials)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        verify_token(credentials)
+    cached = (time.perf_counter() - start) / iterations * 1e6
+    
+    print(f"✓ Full decode per request: {uncached:.1f} µs")
+    print(f"✓ Cached verification per request: {cached:.1f} µs")
+    print(f"✓ Speedup: {uncached / cached:.1f}x")
+    
+    if cached < uncached:
+        print("\n✓ PASS: Cached auth path is faster")
+        return True
+    print("\n✗ FAIL: Cached auth path is not faster")
+    return False
+
 def main():
     """Run all authentication tests."""
     print("=" * 60)
@@ -118,6 +207,8 @@ def main():
     results.append(test_password_timing_attack_protection())
     results.append(test_jwt_token_creation())
     results.append(test_jwt_token_expiration())
+    results.append(test_verified_token_cache())
+    results.append(test_auth_path_benchmark())
     
     print("\n" + "=" * 60)
     if all(results):
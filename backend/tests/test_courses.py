@@ -234,6 +234,194 @@ def test_delete_course_preserves_enrollments(course_id):
     finally:
         db.close()
 
+def test_course_report():
+    """Test the course Excel report built from one joined query."""
+    print("\n" + "=" * 60)
+    print("TEST: Course Report")
+    print("=" * 60)
+    
+    import io
+    import time
+    from datetime import date
+    from openpyxl import load_workbook
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.core.auth import create_access_token
+    from app.core.config import settings
+    from app.models.enrollment import ApprovalStatus, CompletionStatus, EligibilityStatus
+    
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token(getattr(settings, 'ADMIN_EMAIL', 'test@example.com'))}"}
+    
+    db = SessionLocal()
+    timestamp = int(time.time() * 1000)
+    student_ids = []
+    try:
+        course = Course(
+            name=f"Test Course Report {timestamp}",
+            batch_code=f"TEST-CM-REPORT-{timestamp}",
+            start_date=date.today(),
+            seat_limit=10,
+            current_enrolled=0
+        )
+        other_course = Course(
+            name=f"Test Course Report Other {timestamp}",
+            batch_code=f"TEST-CM-REPORT-OTHER-{timestamp}",
+            start_date=date.today(),
+            seat_limit=10,
+            current_enrolled=0
+        )
+        db.add_all([course, other_course])
+        students = [
+            Student(
+                employee_id=f"TEST-CM-REPORT-{i}-{timestamp}",
+                name=f"Report Student {i}",
+                email=f"testcmreport{i}{timestamp}@example.com",
+                sbu="IT",
+                designation="Developer"
+            )
+            for i in range(3)
+        ]
+        db.add_all(students)
+        db.commit()
+        student_ids = [student.id for student in students]
+        
+        # Student 0 completed, student 1 withdrew, student 2 was rejected (excluded from the report)
+        outcomes = [
+            (ApprovalStatus.APPROVED, CompletionStatus.COMPLETED),
+            (ApprovalStatus.WITHDRAWN, CompletionStatus.NOT_STARTED),
+            (ApprovalStatus.REJECTED, CompletionStatus.NOT_STARTED),
+        ]
+        for student, (approval_status, completion_status) in zip(students, outcomes):
+            db.add(Enrollment(
+                student_id=student.id, course_id=course.id, course_name=course.name, batch_code=course.batch_code,
+                eligibility_status=EligibilityStatus.ELIGIBLE, approval_status=approval_status,
+                completion_status=completion_status, total_attendance=10, present=9, score=88.0
+            ))
+        # Student 0 also failed another course, so 1 of 2 finished courses is completed
+        db.add(Enrollment(
+            student_id=students[0].id, course_id=other_course.id, course_name=other_course.name,
+            batch_code=other_course.batch_code, eligibility_status=EligibilityStatus.ELIGIBLE,
+            approval_status=ApprovalStatus.APPROVED, completion_status=CompletionStatus.FAILED
+        ))
+        db.commit()
+        
+        response = client.get(f"/api/v1/courses/{course.id}/report", headers=headers)
+        print(f"✓ Response status: {response.status_code}")
+        if response.status_code != 200:
+            print(f"✗ FAIL: Request failed: {response.text}")
+            return False
+        
+        worksheet = load_workbook(io.BytesIO(response.content))['Enrollments']
+        rows = list(worksheet.iter_rows(values_only=True))
+        header, data = rows[0], {row[0]: dict(zip(rows[0], row)) for row in rows[1:]}
+        print(f"✓ Report has {len(data)} rows")
+        
+        completed = data.get(students[0].employee_id, {})
+        withdrawn = data.get(students[1].employee_id, {})
+        checks = [
+            header[0] == 'Employee ID' and len(header) == 18,
+            set(data) == {students[0].employee_id, students[1].employee_id},
+            completed.get('Attendance') == '90.0%',
+            completed.get('Total Courses Assigned') == 2,
+            completed.get('Completed Courses') == 1,
+            completed.get('Overall Completion Rate') == '50.0%',
+            withdrawn.get('Overall Completion Rate') == '0.0%',
+            withdrawn.get('Approval Status') == 'Withdrawn',
+            worksheet.column_dimensions['C'].width == len(students[0].email) + 2,
+        ]
+        
+        if all(checks):
+            print("\n✓ PASS: Course report works correctly")
+            return True
+        else:
+            print(f"\n✗ FAIL: Unexpected report contents: {checks}")
+            return False
+    except Exception as e:
+        db.rollback()
+        print(f"\n✗ FAIL: Error in course report test: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if student_ids:
+            db.query(Enrollment).filter(Enrollment.student_id.in_(student_ids)).delete(synchronize_session=False)
+            db.query(Student).filter(Student.id.in_(student_ids)).delete(synchronize_session=False)
+            db.commit()
+        db.close()
+
+def test_complete_ended_courses():
+    """Test the background transition of ended courses and the read-only course list."""
+    print("\n" + "=" * 60)
+    print("TEST: Complete Ended Courses")
+    print("=" * 60)
+    
+    import time
+    from datetime import date
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.core.auth import create_access_token
+    from app.core.config import settings
+    from app.models.course import CourseStatus
+    from app.services.course_status_service import CourseStatusService
+    
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token(getattr(settings, 'ADMIN_EMAIL', 'test@example.com'))}"}
+    
+    db = SessionLocal()
+    timestamp = int(time.time() * 1000)
+    try:
+        yesterday = date.today() - timedelta(days=1)
+        ended = Course(
+            name=f"Test Course Ended {timestamp}", batch_code=f"TEST-CM-ENDED-{timestamp}",
+            start_date=yesterday - timedelta(days=30), end_date=yesterday,
+            seat_limit=10, status=CourseStatus.ONGOING
+        )
+        running = Course(
+            name=f"Test Course Running {timestamp}", batch_code=f"TEST-CM-RUNNING-{timestamp}",
+            start_date=yesterday, end_date=date.today() + timedelta(days=30),
+            seat_limit=10, status=CourseStatus.ONGOING
+        )
+        db.add_all([ended, running])
+        db.commit()
+        ended_id, running_id = ended.id, running.id
+        
+        # Listing courses no longer writes
+        response = client.get("/api/v1/courses/", headers=headers)
+        db.expire_all()
+        if response.status_code != 200 or db.get(Course, ended_id).status != CourseStatus.ONGOING:
+            print(f"✗ FAIL: GET /courses changed course status ({response.status_code})")
+            return False
+        print("✓ GET /courses is read-only")
+        
+        before = datetime.utcnow()
+        completed = CourseStatusService.complete_ended_courses(db)
+        db.expire_all()
+        ended, running = db.get(Course, ended_id), db.get(Course, running_id)
+        if completed < 1 or ended.status != CourseStatus.COMPLETED or running.status != CourseStatus.ONGOING:
+            print(f"✗ FAIL: Unexpected statuses: {ended.status}, {running.status}")
+            return False
+        if ended.updated_at < before:
+            print("✗ FAIL: updated_at not set on completed course")
+            return False
+        print(f"✓ {completed} ended course(s) completed in one UPDATE, running course untouched")
+        
+        if CourseStatusService.complete_ended_courses(db) != 0:
+            print("✗ FAIL: Second run completed courses again")
+            return False
+        print("✓ Running the transition again is a no-op")
+        
+        print("\n✓ PASS: Ended courses are completed by the background job")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"\n✗ FAIL: Error in course completion test: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.close()
+
 def cleanup_test_data():
     """Clean up test data."""
     print("\n" + "=" * 60)
@@ -279,6 +467,12 @@ def main():
         # Test 4: Delete course preserves enrollments
         results.append(test_delete_course_preserves_enrollments(course_id))
     
+    # Test 5: Course report
+    results.append(test_course_report())
+    
+    # Test 6: Background course completion
+    results.append(test_complete_ended_courses())
+    
     # Cleanup
     cleanup_test_data()
     
@@ -297,6 +297,115 @@ def test_annual_limit_check():
     finally:
         db.close()
 
+def test_evaluate_many_matches_run_all_checks():
+    """Test batch eligibility evaluation returns the same results as per-pair checks."""
+    print("\n" + "=" * 60)
+    print("TEST: Batch Evaluation Matches Per-Pair Checks")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    try:
+        import time
+        timestamp = int(time.time() * 1000)
+        
+        # Prerequisite course, a course requiring it, and two batches of another course
+        prereq_course = Course(
+            name=f"Batch Prereq {timestamp}",
+            batch_code=f"BPRE-{timestamp}",
+            start_date=date.today() - timedelta(days=60),
+            end_date=date.today() - timedelta(days=30),
+            seat_limit=50,
+            current_enrolled=0
+        )
+        db.add(prereq_course)
+        db.commit()
+        db.refresh(prereq_course)
+        
+        advanced_course = Course(
+            name=f"Batch Advanced {timestamp}",
+            batch_code=f"BADV-{timestamp}",
+            start_date=date.today(),
+            seat_limit=50,
+            current_enrolled=0,
+            prerequisite_course_id=prereq_course.id
+        )
+        batch_one = Course(
+            name=f"Batch Repeat {timestamp}",
+            batch_code=f"BREP1-{timestamp}",
+            start_date=date.today() - timedelta(days=30),
+            seat_limit=50,
+            current_enrolled=0
+        )
+        batch_two = Course(
+            name=f"Batch Repeat {timestamp}",
+            batch_code=f"BREP2-{timestamp}",
+            start_date=date.today() + timedelta(days=30),
+            seat_limit=50,
+            current_enrolled=0
+        )
+        db.add_all([advanced_course, batch_one, batch_two])
+        db.commit()
+        courses = [prereq_course, advanced_course, batch_one, batch_two]
+        for course in courses:
+            db.refresh(course)
+        
+        # One student with history, one without
+        students = []
+        for i in range(2):
+            student = Student(
+                employee_id=f"TEST-ELIG-BATCH-{i}-{timestamp}",
+                name=f"Test Student Batch {i}",
+                email=f"testeligbatch{i}{timestamp}@example.com",
+                sbu="IT",
+                designation="Developer"
+            )
+            db.add(student)
+            students.append(student)
+        db.commit()
+        for student in students:
+            db.refresh(student)
+        
+        # First student passed the prerequisite and completed the first repeat batch this year
+        for course in (prereq_course, batch_one):
+            db.add(Enrollment(
+                student_id=students[0].id,
+                course_id=course.id,
+                course_name=course.name,
+                batch_code=course.batch_code,
+                eligibility_status=EligibilityStatus.ELIGIBLE,
+                approval_status=ApprovalStatus.APPROVED,
+                completion_status=CompletionStatus.COMPLETED
+            ))
+        db.commit()
+        
+        pairs = [(s.id, c.id) for s in students for c in courses]
+        batch_results = EligibilityService.evaluate_many(db, pairs)
+        
+        mismatches = []
+        for student_id, course_id in pairs:
+            expected = EligibilityService.run_all_checks(db, student_id, course_id)
+            actual = batch_results.get((student_id, course_id))
+            print(f"  - student={student_id} course={course_id}: {expected[0].value} / {actual[0].value if actual else None}")
+            if actual != expected:
+                mismatches.append((student_id, course_id, expected, actual))
+        
+        course_ids = [c.id for c in courses]
+        student_ids = [s.id for s in students]
+        if not mismatches:
+            print("\n✓ PASS: Batch evaluation matches per-pair checks")
+            return True, course_ids, student_ids
+        else:
+            print(f"\n✗ FAIL: Mismatches: {mismatches}")
+            return False, course_ids, student_ids
+    except Exception as e:
+        db.rollback()
+        print(f"\n✗ FAIL: Error in batch evaluation: {e}")
+        import traceback
+        traceback.print_exc()
+        return False, [], []
+    finally:
+        db.close()
+
 def cleanup_test_data(course_ids, student_ids):
     """Clean up test data."""
     print("\n" + "=" * 60)
@@ -380,6 +489,14 @@ def main():
     if s_id:
         student_ids.append(s_id)
     
+    # Test 4: Batch evaluation
+    success, c_ids, s_ids = test_evaluate_many_matches_run_all_checks()
+    results.append(success)
+    if c_ids:
+        course_ids.extend(c_ids)
+    if s_ids:
+        student_ids.extend(s_ids)
+    
     # Cleanup
     cleanup_test_data(course_ids, student_ids)
     
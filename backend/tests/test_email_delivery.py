@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Test pooled, batched email delivery against a local SMTP server."""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import socket
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from app.core.config import settings
+from app.services.email_delivery import EmailDeliveryQueue
+from app.services.email_service import EmailService
+from datetime import datetime
+
+class RecordingHandler:
+    """SMTP handler that records messages per session and can reject the first attempts."""
+
+    def __init__(self):
+        self.sessions = set()
+        self.messages = []
+        self.transient_failures = 0  # Reply 451 to this many DATA commands
+        self.reject_subject = None  # Reply 550 to messages with this subject
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.transient_failures > 0:
+            self.transient_failures -= 1
+            return '451 Try again later'
+        content = envelope.content.decode('utf-8', errors='replace')
+        if self.reject_subject and f"Subject: {self.reject_subject}" in content:
+            return '550 Rejected'
+        self.sessions.add(id(session))
+        self.messages.append(content)
+        return '250 OK'
+
+def _authenticate(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=auth_data.login == b'mailer' and auth_data.password == b'secret')
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _configure(port):
+    """Point the email settings at the local server; returns the previous values."""
+    overrides = {
+        'SMTP_ENABLED': True,
+        'SMTP_HOST': '127.0.0.1',
+        'SMTP_PORT': port,
+        'SMTP_USER': 'mailer',
+        'SMTP_PASSWORD': 'secret',
+        'SMTP_FROM_EMAIL': 'noreply@example.com',
+        'SMTP_USE_TLS': False,
+        'SMTP_RETRY_BACKOFF_SECONDS': 0.1,
+        'SMTP_DELIVERY_TIMEOUT_SECONDS': 30,
+    }
+    previous = {key: getattr(settings, key) for key in overrides}
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    return previous
+
+def _message(subject):
+    return EmailService.build_message('admin@example.com', subject, f"Body of {subject}")
+
+def test_batch_over_one_session(handler, delivery_queue):
+    """Test that a batch of messages is delivered over a single SMTP session."""
+    print("\n" + "=" * 60)
+    print("TEST: Batch Delivery Over One Session")
+    print("=" * 60)
+
+    results = delivery_queue.send([_message(f"Batch {i}") for i in range(20)])
+    if results != [True] * 20:
+        print(f"✗ Not all messages were delivered: {results}")
+        return False
+    if len(handler.messages) != 20:
+        print(f"✗ Server received {len(handler.messages)} messages, expected 20")
+        return False
+    if len(handler.sessions) != 1:
+        print(f"✗ Messages used {len(handler.sessions)} SMTP sessions, expected 1")
+        return False
+    print("✓ 20 messages delivered over one authenticated session")
+
+    # The next batch reuses the same open session
+    if delivery_queue.send([_message("Reused")]) != [True] or len(handler.sessions) != 1:
+        print("✗ Session was not reused for the next batch")
+        return False
+    print("✓ Session reused for later messages")
+    return True
+
+def test_retry_and_rejection(handler, delivery_queue):
+    """Test that transient failures are retried and permanent rejections are not."""
+    print("\n" + "=" * 60)
+    print("TEST: Retry and Rejection")
+    print("=" * 60)
+
+    handler.transient_failures = 2
+    if delivery_queue.send([_message("Retried")]) != [True]:
+        print("✗ Message was not delivered after transient failures")
+        return False
+    if not any("Subject: Retried" in m for m in handler.messages):
+        print("✗ Retried message not received by the server")
+        return False
+    print("✓ Transient 451 replies retried with backoff")
+
+    handler.reject_subject = "Rejected"
+    results = delivery_queue.send([_message("Rejected"), _message("Accepted")])
+    handler.reject_subject = None
+    if results != [False, True]:
+        print(f"✗ Unexpected results for rejected/accepted messages: {results}")
+        return False
+    print("✓ Permanent 550 rejection fails without blocking the rest of the batch")
+    return True
+
+def test_unexpected_error(handler, delivery_queue):
+    """Test that a message failing with a non-SMTP error does not stop the worker."""
+    print("\n" + "=" * 60)
+    print("TEST: Unexpected Delivery Error")
+    print("=" * 60)
+
+    # smtplib raises ValueError for more than one Resent- header block
+    malformed = _message("Malformed")
+    malformed['Resent-Date'] = 'Mon, 7 Jan 2030 14:00:00 +0000'
+    malformed['Resent-Date'] = 'Mon, 7 Jan 2030 15:00:00 +0000'
+    results = delivery_queue.send([malformed, _message("After malformed")], timeout=10)
+    if results != [False, True]:
+        print(f"✗ Unexpected results for malformed/valid messages: {results}")
+        return False
+    print("✓ Malformed message fails without ending the worker")
+
+    if delivery_queue.send([_message("Still delivering")], timeout=10) != [True]:
+        print("✗ Later messages not delivered")
+        return False
+    print("✓ Later messages still delivered")
+    return True
+
+def test_class_reminder_send(handler):
+    """Test that EmailService sends class reminders through the delivery queue."""
+    print("\n" + "=" * 60)
+    print("TEST: Class Reminder Email")
+    print("=" * 60)
+
+    sent = EmailService.send_class_reminder(
+        admin_email='admin@example.com',
+        course_name='Test Course',
+        batch_code='TEST-EMAIL-001',
+        class_time=datetime(2030, 1, 7, 14, 0),
+        start_time='14:00',
+        end_time='17:00',
+        day='Monday'
+    )
+    if not sent or not any('TEST-EMAIL-001' in m for m in handler.messages):
+        print("✗ Class reminder was not delivered")
+        return False
+    print("✓ Class reminder delivered")
+    EmailService.shutdown()
+    return True
+
+def main():
+    """Run all email delivery tests."""
+    print("=" * 60)
+    print("EMAIL DELIVERY TESTS")
+    print("=" * 60)
+
+    port = _free_port()
+    handler = RecordingHandler()
+    controller = Controller(
+        handler,
+        hostname='127.0.0.1',
+        port=port,
+        authenticator=_authenticate,
+        auth_require_tls=False
+    )
+    controller.start()
+    previous = _configure(port)
+    delivery_queue = EmailDeliveryQueue()
+
+    results = []
+    try:
+        # Test 1: Batching over one session
+        results.append(test_batch_over_one_session(handler, delivery_queue))
+
+        # Test 2: Retries and permanent failures
+        results.append(test_retry_and_rejection(handler, delivery_queue))
+
+        # Test 3: Non-SMTP errors
+        results.append(test_unexpected_error(handler, delivery_queue))
+
+        # Test 4: Class reminder through EmailService
+        results.append(test_class_reminder_send(handler))
+    finally:
+        delivery_queue.stop()
+        controller.stop()
+        for key, value in previous.items():
+            setattr(settings, key, value)
+
+    print("\n" + "=" * 60)
+    if all(results):
+        print("✓ ALL EMAIL DELIVERY TESTS PASSED")
+    else:
+        print("✗ SOME EMAIL DELIVERY TESTS FAILED")
+    print("=" * 60)
+
+    return all(results)
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
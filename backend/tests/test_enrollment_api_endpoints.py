@@ -10,11 +10,17 @@ from app.main import app
 from app.db.base import SessionLocal
 from app.models.course import Course
 from app.models.student import Student
+from app.models.mentor import Mentor
 from app.models.enrollment import Enrollment, ApprovalStatus, CompletionStatus, EligibilityStatus
 from app.core.auth import create_access_token
 from app.core.config import settings
+from app.services.enrollment_approval_service import EnrollmentApprovalService
+from app.api.enrollments import approve_enrollment, withdraw_enrollment, reapprove_enrollment
+from app.schemas.enrollment import EnrollmentApproval
+from sqlalchemy import update
 from datetime import date, timedelta
 import time
+import threading
 
 client = TestClient(app)
 
@@ -380,6 +386,365 @@ def test_get_eligible_enrollments_endpoint():
         print(f"✗ FAIL: Request failed with status {response.status_code}: {response.text}")
         return False
 
+def test_dashboard_stats_endpoint():
+    """Test dashboard statistics match individual counts and refresh after writes."""
+    print("\n" + "=" * 60)
+    print("TEST: Dashboard Stats Endpoint")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    headers = get_auth_headers()
+    student_id = None
+    
+    try:
+        response = client.get("/api/v1/enrollments/dashboard/stats", headers=headers)
+        print(f"✓ Response status: {response.status_code}")
+        stats = response.json()
+        
+        expected = {
+            "active_employees": db.query(Student).filter(Student.is_active == True).count(),
+            "previous_employees": db.query(Student).filter(Student.is_active == False).count(),
+            "active_courses": db.query(Course).filter(Course.is_archived == False).count(),
+            "archived_courses": db.query(Course).filter(Course.is_archived == True).count(),
+            "total_enrollments": db.query(Enrollment).count(),
+            "approved_enrollments": db.query(Enrollment).filter(Enrollment.approval_status == ApprovalStatus.APPROVED).count(),
+            "pending_enrollments": db.query(Enrollment).filter(Enrollment.approval_status == ApprovalStatus.PENDING).count(),
+            "withdrawn_enrollments": db.query(Enrollment).filter(Enrollment.approval_status == ApprovalStatus.WITHDRAWN).count(),
+        }
+        mismatched = {key: (stats.get(key), value) for key, value in expected.items() if stats.get(key) != value}
+        if response.status_code != 200 or mismatched:
+            print(f"✗ FAIL: Stats differ from individual counts: {mismatched}")
+            return False, student_id
+        print("✓ Stats match individual counts")
+        
+        # A committed student write must invalidate the cached stats
+        timestamp = int(time.time() * 1000)
+        student = Student(
+            employee_id=f"TEST-DASH-{timestamp}",
+            name="Test Student Dashboard",
+            email=f"testdash{timestamp}@example.com",
+            sbu="IT",
+            designation="Developer"
+        )
+        db.add(student)
+        db.commit()
+        student_id = student.id
+        
+        refreshed = client.get("/api/v1/enrollments/dashboard/stats", headers=headers).json()
+        if refreshed["active_employees"] != stats["active_employees"] + 1:
+            print(f"✗ FAIL: Stale stats after write: {refreshed['active_employees']} active employees")
+            return False, student_id
+        print("✓ Stats refreshed after student write")
+        
+        # Core statements (like the employee import's upsert) only count on counted tables
+        db.execute(update(Mentor.__table__).where(Mentor.__table__.c.id == -1).values(name="Nobody"))
+        if db.info.get('dashboard_stale'):
+            print("✗ FAIL: Core statement on mentors marked the stats stale")
+            return False, student_id
+        db.execute(update(Student.__table__).where(Student.__table__.c.id == student_id).values(is_active=False))
+        db.commit()
+        refreshed = client.get("/api/v1/enrollments/dashboard/stats", headers=headers).json()
+        if refreshed["active_employees"] != stats["active_employees"]:
+            print(f"✗ FAIL: Stale stats after Core update: {refreshed['active_employees']} active employees")
+            return False, student_id
+        print("✓ Core statements only invalidate the stats when they target counted tables")
+        
+        print("\n✓ PASS: Dashboard stats endpoint works correctly")
+        return True, student_id
+    except Exception as e:
+        db.rollback()
+        print(f"\n✗ FAIL: Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False, student_id
+    finally:
+        db.close()
+
+def _create_bulk_test_data(db, timestamp, seat_limit, student_count):
+    """Create a course and pending, eligible enrollments for bulk approval tests."""
+    course = Course(
+        name=f"Test Course Bulk {timestamp}",
+        batch_code=f"BULK-{timestamp}",
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=30),
+        seat_limit=seat_limit,
+        current_enrolled=0
+    )
+    db.add(course)
+    students = [
+        Student(
+            employee_id=f"TEST-BULK-{timestamp}-{i}",
+            name=f"Test Student Bulk {i}",
+            email=f"testbulk{timestamp}-{i}@example.com",
+            sbu="IT"
+        )
+        for i in range(student_count)
+    ]
+    db.add_all(students)
+    db.flush()
+    enrollments = [
+        Enrollment(
+            student_id=student.id,
+            course_id=course.id,
+            eligibility_status=EligibilityStatus.ELIGIBLE,
+            approval_status=ApprovalStatus.PENDING,
+            completion_status=CompletionStatus.NOT_STARTED
+        )
+        for student in students
+    ]
+    db.add_all(enrollments)
+    db.commit()
+    return course.id, [s.id for s in students], [e.id for e in enrollments]
+
+def test_bulk_approve_endpoint():
+    """Test bulk approval seat accounting and per-enrollment outcomes."""
+    print("\n" + "=" * 60)
+    print("TEST: Bulk Approve Endpoint")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    headers = get_auth_headers()
+    course_id, student_ids, enrollment_ids = None, [], []
+    
+    try:
+        course_id, student_ids, enrollment_ids = _create_bulk_test_data(db, int(time.time() * 1000), 2, 4)
+        db.query(Enrollment).filter(Enrollment.id == enrollment_ids[3]).update({
+            Enrollment.eligibility_status: EligibilityStatus.INELIGIBLE_PREREQUISITE
+        })
+        db.commit()
+        
+        # Seats go to the enrollments in the order they are listed
+        requested = [enrollment_ids[2], enrollment_ids[3], enrollment_ids[0], enrollment_ids[1]]
+        response = client.post(
+            "/api/v1/enrollments/approve/bulk",
+            json={"enrollment_ids": requested, "approved": True},
+            headers=headers,
+            params={"approved_by": "test_admin"}
+        )
+        if response.status_code != 200:
+            print(f"✗ FAIL: Request failed with status {response.status_code}: {response.text}")
+            return False, course_id, student_ids, enrollment_ids
+        data = response.json()
+        outcomes = [(r['enrollment_id'], r['outcome']) for r in data['results']]
+        expected = [
+            (enrollment_ids[2], "approved"),
+            (enrollment_ids[3], "error"),
+            (enrollment_ids[0], "approved"),
+            (enrollment_ids[1], "error")
+        ]
+        if outcomes != expected or data['approved'] != 2 or len(data['errors']) != 2:
+            print(f"✗ FAIL: Unexpected outcomes: {data}")
+            return False, course_id, student_ids, enrollment_ids
+        print("✓ Seats granted in request order, ineligible and over-capacity enrollments reported")
+        
+        db.expire_all()
+        course = db.query(Course).filter(Course.id == course_id).first()
+        if course.current_enrolled != 2:
+            print(f"✗ FAIL: current_enrolled is {course.current_enrolled}, expected 2")
+            return False, course_id, student_ids, enrollment_ids
+        print("✓ Seat counter updated")
+        
+        # Rejecting an approved enrollment gives its seat back
+        response = client.post(
+            "/api/v1/enrollments/approve/bulk",
+            json={"enrollment_ids": [enrollment_ids[0]], "approved": False},
+            headers=headers,
+            params={"approved_by": "test_admin"}
+        )
+        db.expire_all()
+        course = db.query(Course).filter(Course.id == course_id).first()
+        if response.json().get('rejected') != 1 or course.current_enrolled != 1:
+            print(f"✗ FAIL: Seat not released on rejection: {response.json()}, {course.current_enrolled}")
+            return False, course_id, student_ids, enrollment_ids
+        print("✓ Rejection of an approved enrollment released its seat")
+        
+        print("\n✓ PASS: Bulk approve endpoint works correctly")
+        return True, course_id, student_ids, enrollment_ids
+    except Exception as e:
+        db.rollback()
+        print(f"✗ FAIL: Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False, course_id, student_ids, enrollment_ids
+    finally:
+        db.close()
+
+def test_concurrent_bulk_approvals():
+    """Test that concurrent bulk approvals cannot oversubscribe a course."""
+    print("\n" + "=" * 60)
+    print("TEST: Concurrent Bulk Approvals")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    course_id, student_ids, enrollment_ids = None, [], []
+    
+    try:
+        course_id, student_ids, enrollment_ids = _create_bulk_test_data(db, int(time.time() * 1000), 3, 8)
+        
+        # Two admins approve overlapping halves of the waiting list at the same time
+        batches = [enrollment_ids[:5], enrollment_ids[3:]]
+        barrier = threading.Barrier(len(batches))
+        outcomes = []
+        
+        def approve(ids):
+            session = SessionLocal()
+            try:
+                barrier.wait()
+                outcomes.append(EnrollmentApprovalService.bulk_approve(session, ids, True, "test_admin"))
+                session.commit()
+            finally:
+                session.close()
+        
+        threads = [threading.Thread(target=approve, args=(ids,)) for ids in batches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        approved = db.query(Enrollment).filter(
+            Enrollment.course_id == course_id,
+            Enrollment.approval_status == ApprovalStatus.APPROVED
+        ).count()
+        course = db.query(Course).filter(Course.id == course_id).first()
+        granted = sum(o['approved'] for o in outcomes)
+        if approved != 3 or granted != 3 or course.current_enrolled != 3:
+            print(f"✗ FAIL: {approved} approved, {granted} granted, current_enrolled {course.current_enrolled} (limit 3)")
+            return False, course_id, student_ids, enrollment_ids
+        print("✓ Exactly seat_limit enrollments approved across both requests")
+        
+        print("\n✓ PASS: Concurrent bulk approvals respect the seat limit")
+        return True, course_id, student_ids, enrollment_ids
+    except Exception as e:
+        db.rollback()
+        print(f"✗ FAIL: Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False, course_id, student_ids, enrollment_ids
+    finally:
+        db.close()
+
+def test_concurrent_single_approvals():
+    """Test that concurrent approvals of one enrollment take one seat, and rejecting it gives the seat back."""
+    print("\n" + "=" * 60)
+    print("TEST: Concurrent Single Approvals")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    course_id, student_ids, enrollment_ids = None, [], []
+    
+    try:
+        course_id, student_ids, enrollment_ids = _create_bulk_test_data(db, int(time.time() * 1000), 5, 1)
+        
+        # Two admins approve the same pending enrollment at the same time
+        barrier = threading.Barrier(2)
+        errors = []
+        
+        def decide(approved, barrier=None):
+            session = SessionLocal()
+            try:
+                if barrier:
+                    barrier.wait()
+                approve_enrollment(EnrollmentApproval(enrollment_id=enrollment_ids[0], approved=approved), "test_admin", session)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                session.close()
+        
+        threads = [threading.Thread(target=decide, args=(True, barrier)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        course = db.query(Course).filter(Course.id == course_id).first()
+        if errors or course.current_enrolled != 1:
+            print(f"✗ FAIL: current_enrolled {course.current_enrolled} after approving one enrollment twice (errors: {errors})")
+            return False, course_id, student_ids, enrollment_ids
+        print("✓ One seat taken by concurrent approvals of the same enrollment")
+        
+        decide(False)
+        db.expire_all()
+        course = db.query(Course).filter(Course.id == course_id).first()
+        if errors or course.current_enrolled != 0:
+            print(f"✗ FAIL: current_enrolled {course.current_enrolled} after rejecting the approved enrollment (errors: {errors})")
+            return False, course_id, student_ids, enrollment_ids
+        print("✓ Rejecting an approved enrollment releases its seat")
+        
+        print("\n✓ PASS: Single approvals keep seat counts consistent")
+        return True, course_id, student_ids, enrollment_ids
+    except Exception as e:
+        db.rollback()
+        print(f"✗ FAIL: Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False, course_id, student_ids, enrollment_ids
+    finally:
+        db.close()
+
+def test_concurrent_withdraw_and_reapprove():
+    """Test that concurrent withdrawals free one seat and concurrent reapprovals take one back."""
+    print("\n" + "=" * 60)
+    print("TEST: Concurrent Withdraw And Reapprove")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    course_id, student_ids, enrollment_ids = None, [], []
+    
+    try:
+        course_id, student_ids, enrollment_ids = _create_bulk_test_data(db, int(time.time() * 1000), 5, 2)
+        EnrollmentApprovalService.bulk_approve(db, enrollment_ids, True, "test_admin")
+        db.commit()
+        
+        def run_twice(handler, *args):
+            barrier = threading.Barrier(2)
+            errors = []
+            
+            def call():
+                session = SessionLocal()
+                try:
+                    barrier.wait()
+                    handler(enrollment_ids[0], *args, db=session)
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    session.close()
+            
+            threads = [threading.Thread(target=call) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return errors
+        
+        # Two admins withdraw the same enrollment at the same time
+        errors = run_twice(withdraw_enrollment, "test withdrawal", "test_admin")
+        db.expire_all()
+        course = db.query(Course).filter(Course.id == course_id).first()
+        if course.current_enrolled != 1 or len(errors) != 1:
+            print(f"✗ FAIL: current_enrolled {course.current_enrolled} after withdrawing one of two enrollments twice (errors: {errors})")
+            return False, course_id, student_ids, enrollment_ids
+        print("✓ One seat freed by concurrent withdrawals of the same enrollment")
+        
+        # Two admins reapprove it at the same time
+        errors = run_twice(reapprove_enrollment, "test_admin")
+        db.expire_all()
+        course = db.query(Course).filter(Course.id == course_id).first()
+        if course.current_enrolled != 2 or len(errors) != 1:
+            print(f"✗ FAIL: current_enrolled {course.current_enrolled} after reapproving the enrollment twice (errors: {errors})")
+            return False, course_id, student_ids, enrollment_ids
+        print("✓ One seat taken by concurrent reapprovals of the same enrollment")
+        
+        print("\n✓ PASS: Withdraw and reapprove keep seat counts consistent")
+        return True, course_id, student_ids, enrollment_ids
+    except Exception as e:
+        db.rollback()
+        print(f"✗ FAIL: Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False, course_id, student_ids, enrollment_ids
+    finally:
+        db.close()
+
 def cleanup_test_data(enrollment_ids, course_ids, student_ids):
     """Clean up test data."""
     print("\n" + "=" * 60)
@@ -463,6 +828,44 @@ def main():
     # Test 5: Get eligible enrollments
     results.append(test_get_eligible_enrollments_endpoint())
     
+    # Test 6: Dashboard stats
+    success, s_id = test_dashboard_stats_endpoint()
+    results.append(success)
+    if s_id:
+        student_ids.append(s_id)
+    
+    # Test 7: Bulk approve
+    success, c_id, s_ids, e_ids = test_bulk_approve_endpoint()
+    results.append(success)
+    if c_id:
+        course_ids.append(c_id)
+    student_ids.extend(s_ids)
+    enrollment_ids.extend(e_ids)
+    
+    # Test 8: Concurrent bulk approvals
+    success, c_id, s_ids, e_ids = test_concurrent_bulk_approvals()
+    results.append(success)
+    if c_id:
+        course_ids.append(c_id)
+    student_ids.extend(s_ids)
+    enrollment_ids.extend(e_ids)
+    
+    # Test 9: Concurrent single approvals and rejecting an approved enrollment
+    success, c_id, s_ids, e_ids = test_concurrent_single_approvals()
+    results.append(success)
+    if c_id:
+        course_ids.append(c_id)
+    student_ids.extend(s_ids)
+    enrollment_ids.extend(e_ids)
+    
+    # Test 10: Concurrent withdrawals and reapprovals
+    success, c_id, s_ids, e_ids = test_concurrent_withdraw_and_reapprove()
+    results.append(success)
+    if c_id:
+        course_ids.append(c_id)
+    student_ids.extend(s_ids)
+    enrollment_ids.extend(e_ids)
+    
     # Cleanup
     cleanup_test_data(enrollment_ids, course_ids, student_ids)
     
@@ -476,6 +879,8 @@ def main():
     print("=" * 60)
 
 if __name__ == "__main__":
-    success = main()
+    # One event loop for all requests: pooled async connections belong to it
+    with client:
+        success = main()
     sys.exit(0 if success else 1)
 
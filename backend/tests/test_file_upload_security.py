@@ -5,7 +5,7 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.core.file_utils import sanitize_filename, validate_file_extension, validate_file_size, get_safe_file_path
+from app.core.file_utils import sanitize_filename, validate_file_extension, validate_file_size, get_safe_file_path, save_upload_file
 from app.core.config import settings
 from fastapi import HTTPException
 
@@ -159,6 +159,55 @@ def test_safe_file_path():
         print("\n✗ FAIL: Safe file path generation has issues")
         return False
 
+def test_streaming_upload_save():
+    """Test uploads are streamed to disk in chunks and oversized files are aborted."""
+    print("\n" + "=" * 60)
+    print("TEST: Streaming Upload Save")
+    print("=" * 60)
+    
+    import io
+    import asyncio
+    from fastapi import UploadFile
+    
+    original_max = settings.MAX_UPLOAD_SIZE
+    settings.MAX_UPLOAD_SIZE = 10 * 1024  # 10KB for the test
+    all_passed = True
+    try:
+        # File within the limit, copied in 1KB chunks
+        content = b"employee_id,name\n" + b"EMP,Test\n" * 500
+        path = get_safe_file_path("stream_ok.csv")
+        written = asyncio.run(save_upload_file(UploadFile(file=io.BytesIO(content), filename="ok.csv"), path, chunk_size=1024))
+        with open(path, 'rb') as f:
+            saved = f.read()
+        os.remove(path)
+        if written == len(content) and saved == content:
+            print(f"  ✓ Saved {written} bytes intact")
+        else:
+            print(f"  ✗ Saved file differs (written={written}, expected={len(content)})")
+            all_passed = False
+        
+        # Oversized file is rejected and the partial file removed
+        path = get_safe_file_path("stream_too_big.csv")
+        try:
+            asyncio.run(save_upload_file(UploadFile(file=io.BytesIO(b"x" * 50 * 1024), filename="big.csv"), path, chunk_size=1024))
+            print("  ✗ Oversized file accepted (unexpected)")
+            all_passed = False
+        except HTTPException:
+            print("  ✓ Oversized file rejected (as expected)")
+        if os.path.exists(path):
+            print("  ✗ Partial file left on disk")
+            os.remove(path)
+            all_passed = False
+    finally:
+        settings.MAX_UPLOAD_SIZE = original_max
+    
+    if all_passed:
+        print("\n✓ PASS: Streaming upload save works correctly")
+        return True
+    else:
+        print("\n✗ FAIL: Streaming upload save has issues")
+        return False
+
 def main():
     """Run all file upload security tests."""
     print("=" * 60)
@@ -170,6 +219,7 @@ def main():
     results.append(test_file_extension_validation())
     results.append(test_file_size_validation())
     results.append(test_safe_file_path())
+    results.append(test_streaming_upload_save())
     
     print("\n" + "=" * 60)
     if all(results):
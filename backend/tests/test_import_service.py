@@ -7,13 +7,15 @@ import tempfile
 import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db.base import SessionLocal
+from app.db.base import SessionLocal, engine
 from app.models.course import Course
 from app.models.student import Student
-from app.models.enrollment import Enrollment, EligibilityStatus, ApprovalStatus
+from app.models.enrollment import Enrollment, IncomingEnrollment, EligibilityStatus, ApprovalStatus
 from app.services.import_service import ImportService
+from sqlalchemy import event
 from datetime import date, timedelta
 import time
+import threading
 
 def test_parse_excel():
     """Test Excel file parsing."""
@@ -241,6 +243,377 @@ def test_column_name_normalization():
     finally:
         os.unlink(tmp_path)
 
+def test_chunked_excel_reading():
+    """Test chunked .xlsx reading returns the same rows as reading the whole sheet."""
+    print("\n" + "=" * 60)
+    print("TEST: Chunked Excel Reading")
+    print("=" * 60)
+    
+    test_data = {
+        'Employee ID': [f'EMP{i:03d}' for i in range(25)],
+        'Name': [f'User {i}' for i in range(25)],
+        'Email': [f'user{i}@example.com' for i in range(25)],
+        'SBU': ['IT' if i % 2 else None for i in range(25)],
+    }
+    df = pd.DataFrame(test_data)
+    
+    with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp_file:
+        df.to_excel(tmp_file.name, index=False)
+        tmp_path = tmp_file.name
+    
+    try:
+        chunks = list(ImportService.read_chunks(tmp_path, chunk_size=10))
+        print(f"✓ Read {len(chunks)} chunks: {[len(c) for c in chunks]}")
+        
+        combined = pd.concat(chunks)
+        expected = ImportService._frame_to_records(pd.read_excel(tmp_path).rename(columns=lambda c: c.strip().lower().replace(' ', '_')))
+        actual = [r for c in chunks for r in ImportService._frame_to_records(c)]
+        
+        if ([len(c) for c in chunks] == [10, 10, 5] and
+                list(combined.index) == list(range(25)) and
+                actual == expected):
+            print("\n✓ PASS: Chunked Excel reading works correctly")
+            return True
+        else:
+            print("\n✗ FAIL: Chunked rows differ from whole-sheet read")
+            return False
+    except Exception as e:
+        print(f"\n✗ FAIL: Error reading chunks: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        os.unlink(tmp_path)
+
+def test_process_employee_imports():
+    """Test bulk employee import (create, update and conflict detection)."""
+    print("\n" + "=" * 60)
+    print("TEST: Process Employee Imports")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    timestamp = int(time.time() * 1000)
+    employee_ids = [f"TEST-EMPIMP-{i}-{timestamp}" for i in range(3)]
+    try:
+        # Existing employees: one to update, one whose email will be claimed
+        for i in range(2):
+            db.add(Student(
+                employee_id=employee_ids[i],
+                name=f"Existing Employee {i}",
+                email=f"empimp{i}{timestamp}@example.com",
+                sbu="IT",
+                designation="Developer"
+            ))
+        db.commit()
+        
+        records = [
+            # Update existing employee 0 (designation left blank keeps the stored value)
+            {'employee_id': employee_ids[0], 'name': 'Updated Employee 0', 'email': f"empimp0{timestamp}@example.com",
+             'sbu': 'finance', 'designation': '', 'experience_years': 5, 'career_start_date': '2015-06-01'},
+            # New employee
+            {'employee_id': employee_ids[2], 'name': 'New Employee 2', 'email': f"empimp2{timestamp}@example.com",
+             'sbu': 'HR', 'designation': 'Manager', 'experience_years': 3},
+            # Same new employee again later in the file
+            {'employee_id': employee_ids[2], 'name': 'New Employee 2 Renamed', 'email': f"empimp2{timestamp}@example.com",
+             'sbu': 'HR', 'designation': '', 'experience_years': 4},
+            # Employee 1 trying to take employee 0's email
+            {'employee_id': employee_ids[1], 'name': 'Existing Employee 1', 'email': f"empimp0{timestamp}@example.com",
+             'sbu': 'IT', 'designation': 'Developer', 'experience_years': 1},
+            # Missing fields
+            {'employee_id': '', 'name': 'No ID', 'email': 'noid@example.com', 'sbu': 'IT', 'designation': ''},
+        ]
+        
+        results = ImportService.process_employee_imports(db, records)
+        print(f"✓ Results: created={results['created']}, updated={results['updated']}, errors={len(results['errors'])}")
+        
+        db.expire_all()
+        updated = db.query(Student).filter(Student.employee_id == employee_ids[0]).first()
+        created = db.query(Student).filter(Student.employee_id == employee_ids[2]).first()
+        unchanged = db.query(Student).filter(Student.employee_id == employee_ids[1]).first()
+        
+        checks = [
+            results['total'] == 5,
+            results['created'] == 1,
+            results['updated'] == 2,
+            len(results['errors']) == 2,
+            updated.name == 'Updated Employee 0',
+            updated.sbu.value == 'Finance',
+            updated.designation == 'Developer',
+            updated.experience_years == 5,
+            str(updated.career_start_date) == '2015-06-01',
+            created is not None and created.name == 'New Employee 2 Renamed',
+            created is not None and created.experience_years == 4,
+            created is not None and created.is_active,
+            unchanged.email == f"empimp1{timestamp}@example.com",
+        ]
+        
+        if all(checks):
+            print("\n✓ PASS: Employee import works correctly")
+            return True
+        else:
+            print(f"\n✗ FAIL: Unexpected import result: {checks}")
+            return False
+    except Exception as e:
+        db.rollback()
+        print(f"\n✗ FAIL: Error processing employee imports: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.query(Student).filter(Student.employee_id.in_(employee_ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+def test_failed_chunk_counts():
+    """Test that a failed upsert chunk takes every merged file row back out of the counts."""
+    print("\n" + "=" * 60)
+    print("TEST: Failed Employee Import Chunk")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    timestamp = int(time.time() * 1000)
+    employee_ids = [f"TEST-EMPFAIL-{i}-{timestamp}" for i in range(2)]
+    try:
+        db.add(Student(
+            employee_id=employee_ids[0],
+            name="Existing Employee",
+            email=f"empfail0{timestamp}@example.com",
+            sbu="IT"
+        ))
+        db.commit()
+        
+        # experience_years out of the integer range makes both the update and the insert chunk fail
+        too_large = 10 ** 12
+        records = [
+            {'employee_id': employee_ids[0], 'name': 'Update 1', 'email': f"empfail0{timestamp}@example.com", 'sbu': 'IT'},
+            {'employee_id': employee_ids[0], 'name': 'Update 2', 'email': f"empfail0{timestamp}@example.com", 'sbu': 'IT',
+             'experience_years': too_large},
+            {'employee_id': employee_ids[1], 'name': 'New', 'email': f"empfail1{timestamp}@example.com", 'sbu': 'IT'},
+            # Matches the new employee above: counted as updated but written in the insert chunk
+            {'employee_id': employee_ids[1], 'name': 'New Again', 'email': f"empfail1{timestamp}@example.com", 'sbu': 'IT',
+             'experience_years': too_large},
+        ]
+        
+        results = ImportService.process_employee_imports(db, records)
+        print(f"✓ Results: created={results['created']}, updated={results['updated']}, errors={len(results['errors'])}")
+        
+        db.expire_all()
+        existing = db.query(Student).filter(Student.employee_id == employee_ids[0]).first()
+        if (results['created'], results['updated'], len(results['errors'])) != (0, 0, 4):
+            print("\n✗ FAIL: Expected 0 created, 0 updated and 4 errors")
+            return False
+        if existing.name != "Existing Employee" or db.query(Student).filter(Student.employee_id == employee_ids[1]).count():
+            print("\n✗ FAIL: Failed chunks were written")
+            return False
+        
+        print("\n✓ PASS: Failed chunks reported per file row and removed from the counts")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"\n✗ FAIL: Error processing employee imports: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db.query(Student).filter(Student.employee_id.in_(employee_ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+def test_enrollment_import_query_count():
+    """Test that enrollment imports issue a fixed number of statements, however many rows the file has."""
+    print("\n" + "=" * 60)
+    print("TEST: Enrollment Import Query Count")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    timestamp = int(time.time() * 1000)
+    course = None
+    try:
+        course = Course(
+            name=f"Test Course Import Batch {timestamp}",
+            batch_code=f"IMPBATCH-{timestamp}",
+            start_date=date.today() + timedelta(days=30),
+            seat_limit=100,
+            current_enrolled=0
+        )
+        students = [
+            Student(employee_id=f"TEST-IMPBATCH-{timestamp}-{i}", name=f"Batch Student {i}",
+                    email=f"impbatch{timestamp}-{i}@example.com", sbu="IT")
+            for i in range(50)
+        ]
+        db.add(course)
+        db.add_all(students)
+        db.flush()
+        db.add(Enrollment(student_id=students[0].id, course_id=course.id, approval_status=ApprovalStatus.PENDING))
+        db.commit()
+        
+        records = [
+            {'employee_id': s.employee_id, 'name': s.name, 'email': s.email, 'career_start_date': '2020-01-01'}
+            for s in students
+        ]
+        records[1]['employee_id'] = f"TEST-IMPBATCH-{timestamp}-renamed"  # Matched by email
+        records.append(dict(records[2]))  # Repeated in the same file
+        records.append({'employee_id': f"TEST-IMPBATCH-{timestamp}-missing", 'name': 'Missing',
+                        'email': f"impbatch{timestamp}-missing@example.com"})
+        
+        statements = []
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            results = ImportService.process_incoming_enrollments(db, records, course.id)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        
+        print(f"✓ {len(records)} rows: processed={results['processed']}, not_found={results['not_found']}, "
+              f"errors={len(results['errors'])}, {len(statements)} statements")
+        if (results['processed'], results['not_found'], len(results['errors'])) != (49, 1, 3):
+            print("\n✗ FAIL: Expected 49 processed, 1 not found and 3 errors")
+            return False
+        if len(statements) > 15:
+            print(f"\n✗ FAIL: {len(statements)} statements for {len(records)} rows (expected a fixed number)")
+            return False
+        
+        db.expire_all()
+        if db.query(Student).filter(Student.id == students[1].id, Student.career_start_date == date(2020, 1, 1)).count() != 1:
+            print("\n✗ FAIL: Student matched by email was not updated")
+            return False
+        
+        print("\n✓ PASS: Students, existing enrollments and incoming rows handled in batches")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"\n✗ FAIL: Error processing incoming enrollments: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if course is not None and course.id:
+            db.query(Enrollment).filter(Enrollment.course_id == course.id).delete()
+            db.query(IncomingEnrollment).filter(IncomingEnrollment.batch_code == f"IMPBATCH-{timestamp}").delete()
+            db.query(Course).filter(Course.id == course.id).delete()
+        db.query(Student).filter(Student.employee_id.like(f"TEST-IMPBATCH-{timestamp}-%")).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+def test_background_import_job():
+    """Test employee import through the background job queue with progress polling."""
+    print("\n" + "=" * 60)
+    print("TEST: Background Import Job")
+    print("=" * 60)
+    
+    from app.services.import_job_service import ImportJobService, EMPLOYEE_IMPORT, COMPLETED
+    from app.core.file_utils import get_safe_file_path
+    
+    timestamp = int(time.time() * 1000)
+    employee_ids = [f"TEST-JOB-{i}-{timestamp}" for i in range(3)]
+    df = pd.DataFrame({
+        # Last row moves employee 1 onto employee 0's email and is reported as an error
+        'Employee ID': employee_ids + [employee_ids[1]],
+        'Name': [f'Job Employee {i}' for i in range(4)],
+        'Email': [f'job{i}{timestamp}@example.com' for i in range(3)] + [f'job0{timestamp}@example.com'],
+        'SBU': ['IT'] * 4,
+        'Designation': ['Engineer'] * 4,
+    })
+    file_path = get_safe_file_path(f"job_{timestamp}.csv")
+    df.to_csv(file_path, index=False)
+    
+    db = SessionLocal()
+    try:
+        job = ImportJobService.submit(EMPLOYEE_IMPORT, file_path, "employees.csv")
+        print(f"✓ Job queued: {job['job_id']} ({job['status']})")
+        
+        # Poll until the worker finishes
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            job = ImportJobService.get_job(job['job_id'])
+            if job['status'] not in ('queued', 'running'):
+                break
+            time.sleep(0.1)
+        print(f"✓ Job finished: status={job['status']}, rows={job['rows_processed']}, errors={job['error_count']}")
+        
+        active_ids = [j['job_id'] for j in ImportJobService.list_active_jobs()]
+        created = db.query(Student).filter(Student.employee_id.in_(employee_ids)).count()
+        checks = [
+            job['status'] == COMPLETED,
+            job['rows_processed'] == 4,
+            job['error_count'] == 1,
+            job['results'] is not None and job['results']['created'] == 3,
+            created == 3,
+            job['job_id'] not in active_ids,
+            not os.path.exists(file_path),
+            ImportJobService.get_job('missing-job') is None,
+        ]
+        
+        if all(checks):
+            print("\n✓ PASS: Background import job works correctly")
+            return True
+        else:
+            print(f"\n✗ FAIL: Unexpected job state: {checks}")
+            return False
+    except Exception as e:
+        print(f"\n✗ FAIL: Error running import job: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        db.query(Student).filter(Student.employee_id.in_(employee_ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+def test_import_job_shutdown():
+    """Test that shutting down the worker pool fails queued jobs and removes their files."""
+    print("\n" + "=" * 60)
+    print("TEST: Import Job Shutdown")
+    print("=" * 60)
+    
+    from app.services.import_job_service import ImportJobService, EMPLOYEE_IMPORT, FAILED
+    from app.core.file_utils import get_safe_file_path
+    from app.core.config import settings
+    
+    timestamp = int(time.time() * 1000)
+    file_path = get_safe_file_path(f"job_shutdown_{timestamp}.csv")
+    pd.DataFrame({'Employee ID': [f"TEST-JOBSTOP-{timestamp}"], 'Name': ['Job Stop'],
+                  'Email': [f'jobstop{timestamp}@example.com'], 'SBU': ['IT']}).to_csv(file_path, index=False)
+    
+    # Keep every worker busy so the import job stays queued
+    release = threading.Event()
+    try:
+        executor = ImportJobService._get_executor()
+        for _ in range(settings.IMPORT_JOB_WORKERS):
+            executor.submit(release.wait, 30)
+        job = ImportJobService.submit(EMPLOYEE_IMPORT, file_path, "employees.csv")
+        print(f"✓ Job queued behind busy workers: {job['job_id']} ({job['status']})")
+        
+        ImportJobService.shutdown()
+        job = ImportJobService.get_job(job['job_id'])
+        print(f"✓ After shutdown: status={job['status']}, error={job['error']}")
+        
+        active_ids = [j['job_id'] for j in ImportJobService.list_active_jobs()]
+        checks = [
+            job['status'] == FAILED,
+            job['error'] is not None,
+            job['finished_at'] is not None,
+            job['job_id'] not in active_ids,
+            not os.path.exists(file_path),
+        ]
+        if all(checks):
+            print("\n✓ PASS: Queued jobs are failed and their files removed on shutdown")
+            return True
+        print(f"\n✗ FAIL: Unexpected job state: {checks}")
+        return False
+    except Exception as e:
+        print(f"\n✗ FAIL: Error shutting down import jobs: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        release.set()
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
 def cleanup_test_data(enrollment_id, course_id, student_id):
     """Clean up test data."""
     print("\n" + "=" * 60)
@@ -296,6 +669,24 @@ def main():
     # Test 4: Column name normalization
     results.append(test_column_name_normalization())
     
+    # Test 5: Chunked Excel reading
+    results.append(test_chunked_excel_reading())
+    
+    # Test 6: Employee imports
+    results.append(test_process_employee_imports())
+    
+    # Test 7: Failed upsert chunks
+    results.append(test_failed_chunk_counts())
+    
+    # Test 8: Enrollment import statement count
+    results.append(test_enrollment_import_query_count())
+    
+    # Test 9: Background import job
+    results.append(test_background_import_job())
+    
+    # Test 10: Queued import jobs on shutdown
+    results.append(test_import_job_shutdown())
+    
     # Cleanup
     cleanup_test_data(enrollment_id, course_id, student_id)
     
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Test the Prometheus /metrics endpoint and the timers around background work."""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from app.main import app
+from app.db.base import SessionLocal
+from app.models.course import Course
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.core.metrics import UNMATCHED_ROUTE
+from app.services.import_service import ImportService
+from app.services.reminder_service import ReminderService
+from datetime import date, timedelta
+import time
+
+client = TestClient(app)
+
+def get_auth_headers():
+    """Get authentication headers for API requests."""
+    email = getattr(settings, 'ADMIN_EMAIL', 'test@example.com')
+    token = create_access_token(email)
+    return {"Authorization": f"Bearer {token}"}
+
+def scrape():
+    """Fetch /metrics and index samples by (name, sorted labels)."""
+    response = client.get("/metrics")
+    assert response.status_code == 200, response.text
+    samples = {}
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+def sample_value(name, **labels):
+    """Current value of a sample in the default registry (0 if not recorded yet)."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_request_metrics():
+    """Test route-templated latency histograms, status counters and pool gauges."""
+    print("\n" + "=" * 60)
+    print("TEST: Request and Pool Metrics")
+    print("=" * 60)
+
+    headers = get_auth_headers()
+    client.get("/api/v1/courses/999999999", headers=headers)
+    client.get("/api/v1/courses/999999998", headers=headers)
+    client.get("/no-such-path")
+    # Served by a sync endpoint, so the sync pool is used too
+    client.get("/api/v1/students/999999999", headers=headers)
+    samples = scrape()
+
+    route = "/api/v1/courses/{course_id}"
+    not_found = samples.get(("http_requests_total", (("method", "GET"), ("route", route), ("status", "404"))), 0)
+    if not_found < 2:
+        print(f"✗ FAIL: Expected 2 404s counted for {route}, got {not_found}")
+        return False
+    print(f"✓ Status counter labelled with the route template ({not_found:.0f} x 404)")
+
+    observed = samples.get(("http_request_duration_seconds_count", (("method", "GET"), ("route", route))), 0)
+    if observed < 2:
+        print(f"✗ FAIL: Expected 2 latency observations for {route}, got {observed}")
+        return False
+    print("✓ Latency histogram recorded per route")
+
+    if not any(name == "http_requests_total" and ("route", UNMATCHED_ROUTE) in labels for name, labels in samples):
+        print("✗ FAIL: Unmatched paths not grouped under one label")
+        return False
+    if any(name == "http_requests_total" and ("route", "/no-such-path") in labels for name, labels in samples):
+        print("✗ FAIL: Raw path used as a label")
+        return False
+    print("✓ Unmatched paths grouped under one label")
+
+    for pool in ("sync", "async"):
+        labels = (("pool", pool),)
+        pool_size = samples.get(("db_pool_size", labels))
+        if pool_size != 10 or ("db_pool_checked_out", labels) not in samples:
+            print(f"✗ FAIL: Missing {pool} pool gauges (db_pool_size={pool_size})")
+            return False
+        if samples.get(("db_pool_checkout_seconds_count", labels), 0) < 1:
+            print(f"✗ FAIL: {pool} pool checkouts not timed")
+            return False
+    print("✓ Pool gauges and checkout timing exported for the sync and async engines")
+
+    in_progress = samples.get(("http_requests_in_progress", (("method", "GET"),)))
+    if in_progress != 1:
+        print(f"✗ FAIL: Expected the /metrics request itself in progress, got {in_progress}")
+        return False
+    print("✓ In-flight requests gauge")
+
+    print("\n✓ PASS: Request metrics work correctly")
+    return True
+
+def test_work_timers():
+    """Test the timers around imports, report builds and reminder jobs."""
+    print("\n" + "=" * 60)
+    print("TEST: Import, Report and Reminder Timers")
+    print("=" * 60)
+
+    db = SessionLocal()
+    course_id = None
+    try:
+        timestamp = int(time.time() * 1000)
+        course = Course(
+            name=f"Test Course Metrics {timestamp}",
+            batch_code=f"TEST-METRICS-{timestamp}",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            seat_limit=10,
+            current_enrolled=0
+        )
+        db.add(course)
+        db.commit()
+        course_id = course.id
+
+        imports = sample_value("import_duration_seconds_count", kind="employees")
+        ImportService.process_employee_imports(db, [])
+        if sample_value("import_duration_seconds_count", kind="employees") != imports + 1:
+            print("✗ FAIL: Employee import not timed")
+            return False
+        print("✓ Import duration recorded")
+
+        reports = sample_value("report_build_duration_seconds_count", report="course")
+        response = client.get(f"/api/v1/courses/{course_id}/report", headers=get_auth_headers())
+        if response.status_code != 200 or sample_value("report_build_duration_seconds_count", report="course") != reports + 1:
+            print(f"✗ FAIL: Course report not timed (status {response.status_code})")
+            return False
+        print("✓ Report build duration recorded")
+
+        checks = sample_value("reminder_job_duration_seconds_count", job="check")
+        ReminderService.check_and_send_reminders()
+        if sample_value("reminder_job_duration_seconds_count", job="check") != checks + 1:
+            print("✗ FAIL: Reminder check not timed")
+            return False
+        print("✓ Reminder job duration recorded")
+
+        print("\n✓ PASS: Work timers recorded")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"✗ FAIL: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if course_id:
+            db.query(Course).filter(Course.id == course_id).delete()
+            db.commit()
+        db.close()
+
+def main():
+    """Run all metrics tests."""
+    print("=" * 60)
+    print("METRICS TESTS")
+    print("=" * 60)
+
+    results = []
+
+    # Test 1: Request metrics
+    results.append(test_request_metrics())
+
+    # Test 2: Timers around background work
+    results.append(test_work_timers())
+
+    print("\n" + "=" * 60)
+    if all(results):
+        print("✓ ALL METRICS TESTS PASSED")
+        return True
+    else:
+        print("✗ SOME METRICS TESTS FAILED")
+        return False
+
+if __name__ == "__main__":
+    # One event loop for all requests: pooled async connections belong to it
+    with client:
+        success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Test that the main endpoints stay within their SQL query budgets (X-DB-Queries header)."""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.base import SessionLocal
+from app.models.course import Course
+from app.models.student import Student
+from app.models.mentor import Mentor
+from app.models.course_mentor import CourseMentor
+from app.models.enrollment import Enrollment, ApprovalStatus, CompletionStatus, EligibilityStatus
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.core.query_stats import QUERIES_HEADER, TIME_HEADER
+from datetime import date, timedelta
+import time
+
+client = TestClient(app)
+
+# Students seeded per course; budgets below this would have caught a per-row query
+STUDENT_COUNT = 10
+
+# Maximum statements per request, independent of the number of rows returned
+QUERY_BUDGETS = [
+    ("/api/v1/courses/", 4),
+    ("/api/v1/courses/{course_id}", 4),
+    ("/api/v1/courses/{course_id}/report", 2),
+    ("/api/v1/students/?limit=1000", 1),
+    ("/api/v1/students/{student_id}/enrollments", 3),
+    ("/api/v1/students/all/with-courses?limit=1000", 2),
+    ("/api/v1/enrollments/?limit=1000", 2),
+    ("/api/v1/enrollments/?course_id={course_id}", 2),
+    ("/api/v1/enrollments/eligible?course_id={course_id}", 1),
+    ("/api/v1/mentors/", 1),
+    ("/api/v1/mentors/{mentor_id}/stats", 2),
+]
+
+def get_auth_headers():
+    """Get authentication headers for API requests."""
+    email = getattr(settings, 'ADMIN_EMAIL', 'test@example.com')
+    token = create_access_token(email)
+    return {"Authorization": f"Bearer {token}"}
+
+def assert_query_budget(path, max_queries, headers):
+    """Request path and assert it issued at most max_queries SQL statements."""
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, f"{path}: status {response.status_code}: {response.text[:200]}"
+    assert QUERIES_HEADER in response.headers, f"{path}: no {QUERIES_HEADER} header"
+
+    queries = int(response.headers[QUERIES_HEADER])
+    assert queries <= max_queries, f"{path}: {queries} queries (budget {max_queries})"
+    print(f"✓ {path}: {queries} queries in {response.headers[TIME_HEADER]}ms (budget {max_queries})")
+
+def create_test_data():
+    """Create two courses (the second requires the first), students enrolled in both, an external mentor and an internal one (one of the students)."""
+    db = SessionLocal()
+    timestamp = int(time.time() * 1000)
+    try:
+        prerequisite = Course(
+            name=f"Test Course Budget Prerequisite {timestamp}",
+            batch_code=f"TEST-QB-PRE-{timestamp}",
+            start_date=date.today() - timedelta(days=60),
+            end_date=date.today() - timedelta(days=30),
+            seat_limit=50,
+            current_enrolled=STUDENT_COUNT
+        )
+        db.add(prerequisite)
+        db.flush()
+        course = Course(
+            name=f"Test Course Budget {timestamp}",
+            batch_code=f"TEST-QB-{timestamp}",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            seat_limit=50,
+            current_enrolled=0,
+            prerequisite_course_id=prerequisite.id
+        )
+        mentor = Mentor(is_internal=False, name=f"Test Mentor Budget {timestamp}")
+        students = [
+            Student(
+                employee_id=f"TEST-QB-{timestamp}-{i}",
+                name=f"Test Student Budget {i}",
+                email=f"test.qb.{timestamp}.{i}@example.com",
+                sbu="IT",
+                designation="Developer"
+            )
+            for i in range(STUDENT_COUNT)
+        ]
+        db.add_all([course, mentor] + students)
+        db.flush()
+
+        internal_mentor = Mentor(is_internal=True, student_id=students[0].id, name=students[0].name)
+        db.add(internal_mentor)
+        db.flush()
+
+        db.add(CourseMentor(course_id=course.id, mentor_id=mentor.id, hours_taught=10, amount_paid=100))
+        db.add(CourseMentor(course_id=course.id, mentor_id=internal_mentor.id, hours_taught=5, amount_paid=50))
+        for student in students:
+            db.add(Enrollment(
+                student_id=student.id,
+                course_id=prerequisite.id,
+                approval_status=ApprovalStatus.APPROVED,
+                completion_status=CompletionStatus.COMPLETED,
+                eligibility_status=EligibilityStatus.ELIGIBLE
+            ))
+            db.add(Enrollment(
+                student_id=student.id,
+                course_id=course.id,
+                approval_status=ApprovalStatus.PENDING,
+                eligibility_status=EligibilityStatus.ELIGIBLE
+            ))
+        db.commit()
+        return {
+            "course_id": course.id,
+            "prerequisite_id": prerequisite.id,
+            "student_ids": [s.id for s in students],
+            "mentor_id": mentor.id,
+            "internal_mentor_id": internal_mentor.id,
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def test_query_budgets(data):
+    """Test every endpoint in QUERY_BUDGETS."""
+    print("\n" + "=" * 60)
+    print("TEST: Query Budgets")
+    print("=" * 60)
+
+    headers = get_auth_headers()
+    ids = {"course_id": data["course_id"], "student_id": data["student_ids"][0], "mentor_id": data["mentor_id"]}
+    for path, budget in QUERY_BUDGETS:
+        assert_query_budget(path.format(**ids), budget, headers)
+
+    print("\n✓ PASS: All endpoints within their query budgets")
+
+def test_timing_headers():
+    """Test that the DB timing headers are present and well-formed."""
+    print("\n" + "=" * 60)
+    print("TEST: DB Timing Headers")
+    print("=" * 60)
+
+    response = client.get("/health")
+    assert response.headers.get(QUERIES_HEADER) == "0", \
+        f"Expected 0 queries for /health, got {response.headers.get(QUERIES_HEADER)}"
+
+    response = client.get("/api/v1/courses/", headers=get_auth_headers())
+    db_time = response.headers.get(TIME_HEADER, "")
+    assert db_time.replace(".", "", 1).isdigit(), f"Invalid {TIME_HEADER} header: {db_time}"
+    db_time = float(db_time)
+    assert db_time > 0, f"Expected positive DB time, got {db_time}"
+    print(f"✓ Query count and DB time ({db_time}ms) reported")
+
+    print("\n✓ PASS: DB timing headers work correctly")
+
+def test_internal_mentor_in_course_responses(data):
+    """Test that course list and detail (async endpoints) include internal mentors with their student."""
+    print("\n" + "=" * 60)
+    print("TEST: Internal Mentors in Course Responses")
+    print("=" * 60)
+
+    headers = get_auth_headers()
+    response = client.get("/api/v1/courses/?limit=1000", headers=headers)
+    assert response.status_code == 200, response.text[:200]
+    listed = [c for c in response.json() if c["id"] == data["course_id"]]
+    assert listed, "Seeded course missing from the course list"
+
+    response = client.get(f"/api/v1/courses/{data['course_id']}", headers=headers)
+    assert response.status_code == 200, f"Course detail: status {response.status_code}: {response.text[:200]}"
+
+    for name, course in (("list", listed[0]), ("detail", response.json())):
+        mentors = {m["mentor_id"]: m for m in course["mentors"] or []}
+        assert set(mentors) == {data["mentor_id"], data["internal_mentor_id"]}, f"Course {name}: mentors {sorted(mentors)}"
+        student = mentors[data["internal_mentor_id"]]["mentor"]["student"]
+        assert student and student["id"] == data["student_ids"][0], f"Course {name}: internal mentor without its student"
+        assert float(course["total_training_cost"]) == 150, f"Course {name}: total cost {course['total_training_cost']}"
+        print(f"✓ Course {name} includes the internal mentor and its student")
+
+    print("\n✓ PASS: Internal mentors serialized on the async session")
+
+def cleanup_test_data(data):
+    """Clean up test data."""
+    print("\n" + "=" * 60)
+    print("CLEANUP: Removing test data")
+    print("=" * 60)
+
+    db = SessionLocal()
+    try:
+        course_ids = [data["course_id"], data["prerequisite_id"]]
+        db.query(Enrollment).filter(Enrollment.course_id.in_(course_ids)).delete(synchronize_session=False)
+        mentor_ids = [data["mentor_id"], data["internal_mentor_id"]]
+        db.query(CourseMentor).filter(CourseMentor.mentor_id.in_(mentor_ids)).delete(synchronize_session=False)
+        db.query(Mentor).filter(Mentor.id.in_(mentor_ids)).delete(synchronize_session=False)
+        db.query(Student).filter(Student.id.in_(data["student_ids"])).delete(synchronize_session=False)
+        db.query(Course).filter(Course.id == data["course_id"]).delete()
+        db.query(Course).filter(Course.id == data["prerequisite_id"]).delete()
+        db.commit()
+        print("✓ Test data cleaned up")
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Cleanup error: {e}")
+    finally:
+        db.close()
+
+def run(test, *args):
+    """Run an assert-based test outside pytest; True if it passed."""
+    try:
+        test(*args)
+        return True
+    except AssertionError as e:
+        print(f"✗ FAIL: {e}")
+        return False
+
+def main():
+    """Run all query budget tests (also collected by pytest)."""
+    print("=" * 60)
+    print("QUERY BUDGET TESTS")
+    print("=" * 60)
+
+    results = []
+    data = create_test_data()
+    try:
+        # Test 1: Headers present and well-formed
+        results.append(run(test_timing_headers))
+
+        # Test 2: Main endpoints within their budgets
+        results.append(run(test_query_budgets, data))
+
+        # Test 3: Internal mentors (mentor -> student) on the async course endpoints
+        results.append(run(test_internal_mentor_in_course_responses, data))
+    finally:
+        cleanup_test_data(data)
+
+    print("\n" + "=" * 60)
+    if all(results):
+        print("✓ ALL QUERY BUDGET TESTS PASSED")
+        return True
+    else:
+        print("✗ SOME QUERY BUDGET TESTS FAILED")
+        return False
+
+if __name__ == "__main__":
+    # One event loop for all requests: pooled async connections belong to it
+    with client:
+        success = main()
+    sys.exit(0 if success else 1)
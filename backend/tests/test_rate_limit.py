@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Test rate limiting backends."""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uuid
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.base import SessionLocal
+from app.core.rate_limit import (
+    RateLimitBackend,
+    InMemoryRateLimitBackend,
+    DatabaseRateLimitBackend,
+    set_rate_limit_backend
+)
+from app.models.rate_limit_bucket import RateLimitBucket
+
+def test_in_memory_backend():
+    """Test the sliding window and LRU eviction of the in-memory backend."""
+    print("\n" + "=" * 60)
+    print("TEST: In-Memory Rate Limit Backend")
+    print("=" * 60)
+
+    backend = InMemoryRateLimitBackend(max_keys=3)
+    results = [backend.hit("login:10.0.0.1", 5, 60) for _ in range(6)]
+    if results[:5] != [None] * 5 or results[5] is None:
+        print(f"✗ Expected 5 allowed and 1 rejected, got {results}")
+        return False
+    if not 0 < results[5] <= 60:
+        print(f"✗ Retry-after out of range: {results[5]}")
+        return False
+    print("✓ Sixth request in the window rejected with a retry-after")
+
+    if backend.hit("login:10.0.0.2", 5, 60) is not None:
+        print("✗ Other client was limited")
+        return False
+    print("✓ Clients are limited independently")
+
+    # Memory stays bounded: idle clients are evicted least recently used first
+    for i in range(3, 10):
+        backend.hit(f"login:10.0.0.{i}", 5, 60)
+    if len(backend) != 3:
+        print(f"✗ Backend tracks {len(backend)} keys, expected 3")
+        return False
+    if backend.hit("login:10.0.0.1", 5, 60) is not None:
+        print("✗ Evicted client still limited")
+        return False
+    print("✓ Tracked clients capped with LRU eviction")
+    return True
+
+def test_backend_requires_hit():
+    """Test that a backend without hit() cannot be created."""
+    print("\n" + "=" * 60)
+    print("TEST: Rate Limit Backend Interface")
+    print("=" * 60)
+
+    class IncompleteBackend(RateLimitBackend):
+        pass
+
+    try:
+        IncompleteBackend()
+    except TypeError:
+        print("✓ Backend without hit() rejected when created")
+        return True
+    print("✗ Backend without hit() was created")
+    return False
+
+def test_database_backend_shared():
+    """Test that the database backend shares one limit between workers."""
+    print("\n" + "=" * 60)
+    print("TEST: Shared Database Rate Limit Backend")
+    print("=" * 60)
+
+    key = f"login:test-{uuid.uuid4().hex}"
+    # Two backends stand in for two worker processes
+    first, second = DatabaseRateLimitBackend(), DatabaseRateLimitBackend(cleanup_every=1)
+    try:
+        results = [first.hit(key, 5, 300) for _ in range(3)] + [second.hit(key, 5, 300) for _ in range(2)]
+        if results != [None] * 5:
+            print(f"✗ First five requests were not all allowed: {results}")
+            return False
+        if first.hit(key, 5, 300) is None or second.hit(key, 5, 300) is None:
+            print("✗ Limit was not shared between workers")
+            return False
+        print("✓ Limit shared between workers")
+
+        db = SessionLocal()
+        try:
+            bucket = db.query(RateLimitBucket).filter(RateLimitBucket.key == key).first()
+            if bucket is None or bucket.tokens >= 1:
+                print(f"✗ Unexpected bucket state: {bucket}")
+                return False
+        finally:
+            db.close()
+        print("✓ One row per client holds the bucket state")
+
+        # A full window later the bucket has refilled (simulated by moving its clock back)
+        db = SessionLocal()
+        try:
+            db.query(RateLimitBucket).filter(RateLimitBucket.key == key).update({
+                RateLimitBucket.updated_at: RateLimitBucket.updated_at - 300,
+                RateLimitBucket.expires_at: RateLimitBucket.expires_at - 300
+            })
+            db.commit()
+        finally:
+            db.close()
+        if first.hit(key, 5, 300) is not None:
+            print("✗ Bucket did not refill after the window")
+            return False
+        print("✓ Bucket refills over the window")
+        return True
+    except Exception as e:
+        print(f"✗ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        db = SessionLocal()
+        try:
+            db.query(RateLimitBucket).filter(RateLimitBucket.key == key).delete()
+            db.commit()
+        finally:
+            db.close()
+
+def test_login_rate_limited():
+    """Test that the login endpoint answers 429 after too many attempts."""
+    print("\n" + "=" * 60)
+    print("TEST: Login Rate Limit")
+    print("=" * 60)
+
+    set_rate_limit_backend(InMemoryRateLimitBackend())
+    try:
+        client = TestClient(app)
+        credentials = {"email": "nobody@example.com", "password": "wrong"}
+        statuses = [client.post("/api/v1/auth/login", json=credentials).status_code for _ in range(6)]
+        if statuses != [401] * 5 + [429]:
+            print(f"✗ Unexpected status codes: {statuses}")
+            return False
+        response = client.post("/api/v1/auth/login", json=credentials)
+        if response.status_code != 429 or int(response.headers.get("Retry-After", 0)) < 1:
+            print("✗ 429 response without a Retry-After header")
+            return False
+        print("✓ Sixth login attempt rejected with 429 and Retry-After")
+        return True
+    finally:
+        set_rate_limit_backend(None)
+
+def main():
+    """Run all rate limit tests."""
+    print("=" * 60)
+    print("RATE LIMIT TESTS")
+    print("=" * 60)
+
+    results = []
+
+    # Test 1: In-memory backend
+    results.append(test_in_memory_backend())
+
+    # Test 2: Backend interface
+    results.append(test_backend_requires_hit())
+
+    # Test 3: Shared database backend
+    results.append(test_database_backend_shared())
+
+    # Test 4: Login endpoint
+    results.append(test_login_rate_limited())
+
+    print("\n" + "=" * 60)
+    if all(results):
+        print("✓ ALL RATE LIMIT TESTS PASSED")
+    else:
+        print("✗ SOME RATE LIMIT TESTS FAILED")
+    print("=" * 60)
+
+    return all(results)
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
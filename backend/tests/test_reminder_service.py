@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""Test class reminder scheduling features."""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.base import SessionLocal
+from app.core.config import settings
+from app.models.course import Course, CourseStatus
+from app.models.student import Student
+from app.models.class_reminder import ClassReminder
+from app.services.class_occurrence_index import occurrence_index
+from app.services.reminder_service import ReminderService
+from app.services.enrollment_approval_service import EnrollmentApprovalService
+from app.services.reminder_scheduler import ReminderScheduler, REMINDER_JOB_PREFIX
+from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy import update
+from datetime import datetime, timedelta
+import time
+
+def _occurrences_for(course_id, occurrences):
+    return [o for o in occurrences if o.course_id == course_id]
+
+def test_class_occurrence_index():
+    """Test that the occurrence index finds due classes and follows course changes."""
+    print("\n" + "=" * 60)
+    print("TEST: Class Occurrence Index")
+    print("=" * 60)
+
+    db = SessionLocal()
+    course_id = None
+    try:
+        # A class two hours from now, on today's weekday
+        now = datetime.now()
+        class_datetime = now.replace(second=0, microsecond=0) + timedelta(hours=2)
+        start_time = class_datetime.strftime('%H:%M')
+        day = class_datetime.strftime('%A')
+
+        course = Course(
+            name="Test Reminder Course",
+            batch_code="TEST-REM-001",
+            start_date=(now - timedelta(days=7)).date(),
+            end_date=(now + timedelta(days=30)).date(),
+            seat_limit=10,
+            status=CourseStatus.ONGOING,
+            class_schedule=[
+                {"day": day, "start_time": start_time, "end_time": "23:59"},
+                {"day": "Someday", "start_time": "10:00", "end_time": "11:00"},
+                {"day": day, "start_time": "bad", "end_time": "11:00"}
+            ]
+        )
+        db.add(course)
+        db.commit()
+        db.refresh(course)
+        course_id = course.id
+
+        # The commit invalidated the index; the next lookup rebuilds it
+        if not occurrence_index.is_stale(now):
+            print("✗ Index was not invalidated after creating a course")
+            return False, course_id
+        occurrence_index.ensure_fresh(db, now)
+
+        fire_at = class_datetime - timedelta(minutes=settings.REMINDER_MINUTES_BEFORE)
+        due = _occurrences_for(course_id, occurrence_index.due(fire_at - timedelta(minutes=1), fire_at + timedelta(minutes=1)))
+        if len(due) != 1 or due[0].class_datetime != class_datetime or due[0].start_time != start_time:
+            print(f"✗ Expected one due occurrence at {class_datetime}, got {due}")
+            return False, course_id
+        print("✓ Due occurrence found by fire time (invalid schedule entries skipped)")
+
+        # Only the next occurrence of each schedule entry is upcoming
+        upcoming = [c for c in ReminderService.get_upcoming_classes(hours_ahead=24 * 30) if c['course_id'] == course_id]
+        if len(upcoming) != 1 or upcoming[0]['class_datetime'] != class_datetime or upcoming[0]['day'] != day:
+            print(f"✗ Expected one upcoming class, got {upcoming}")
+            return False, course_id
+        print("✓ Upcoming classes served from the index")
+
+        # Changing a non-scheduling field keeps the index
+        course.description = "Updated description"
+        db.commit()
+        if occurrence_index.is_stale(now):
+            print("✗ Index was invalidated by an unrelated course change")
+            return False, course_id
+        print("✓ Unrelated course changes keep the index")
+
+        # Core statements on other tables (e.g. bulk student upserts) keep the index
+        db.execute(update(Student.__table__).where(Student.__table__.c.id == -1).values(name="Nobody"))
+        db.commit()
+        if occurrence_index.is_stale(now):
+            print("✗ Index was invalidated by a Core statement on another table")
+            return False, course_id
+        db.execute(update(Course.__table__).where(Course.__table__.c.id == course_id).values(class_schedule=course.class_schedule))
+        db.commit()
+        if not occurrence_index.is_stale(now):
+            print("✗ Index was not invalidated by a Core statement on courses")
+            return False, course_id
+        occurrence_index.ensure_fresh(db, now)
+        print("✓ Core statements only invalidate the index when they target courses")
+
+        # Seat counter updates do not touch indexed columns
+        if not EnrollmentApprovalService.reserve_seat(db, course_id) or db.info.get('occurrence_index_stale'):
+            print("✗ Reserving a seat marked the index stale")
+            return False, course_id
+        db.commit()
+        if occurrence_index.is_stale(now):
+            print("✗ Index was invalidated by a seat counter update")
+            return False, course_id
+        print("✓ Seat counter updates keep the index")
+
+        # Moving the course out of ONGOING drops its classes
+        course.status = CourseStatus.DRAFT
+        db.commit()
+        if not occurrence_index.is_stale(now):
+            print("✗ Index was not invalidated after a status change")
+            return False, course_id
+        occurrence_index.ensure_fresh(db, now)
+        if _occurrences_for(course_id, occurrence_index.due(fire_at - timedelta(minutes=1), fire_at + timedelta(minutes=1))):
+            print("✗ Draft course still has indexed classes")
+            return False, course_id
+        print("✓ Status change rebuilds the index")
+
+        # Classes outside the course dates are not indexed
+        course.status = CourseStatus.ONGOING
+        course.start_date = (class_datetime + timedelta(days=1)).date()
+        db.commit()
+        occurrence_index.ensure_fresh(db, now)
+        occurrences = _occurrences_for(course_id, occurrence_index.upcoming(now, now + timedelta(days=7)))
+        if occurrences:
+            print(f"✗ Classes before the course start date were indexed: {occurrences}")
+            return False, course_id
+        print("✓ Course date range respected")
+
+        return True, course_id
+    except Exception as e:
+        print(f"✗ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        db.rollback()
+        return False, course_id
+    finally:
+        db.close()
+
+def test_sent_reminder_lookup(course_id):
+    """Test that already sent reminders are found with one bulk query."""
+    print("\n" + "=" * 60)
+    print("TEST: Sent Reminder Lookup")
+    print("=" * 60)
+
+    db = SessionLocal()
+    try:
+        course = db.query(Course).filter(Course.id == course_id).first()
+        course.start_date = (datetime.now() - timedelta(days=7)).date()
+        db.commit()
+
+        now = datetime.now()
+        occurrence_index.ensure_fresh(db, now)
+        occurrences = _occurrences_for(course_id, occurrence_index.upcoming(now, now + timedelta(days=7)))
+        if len(occurrences) != 1:
+            print(f"✗ Expected one indexed occurrence, got {occurrences}")
+            return False
+        occurrence = occurrences[0]
+
+        if ReminderService._sent_reminder_keys(db, occurrences):
+            print("✗ Reminder reported as sent before it was recorded")
+            return False
+
+        db.add(ClassReminder(
+            course_id=course_id,
+            course_name=occurrence.course_name,
+            batch_code=occurrence.batch_code,
+            class_date=occurrence.class_datetime,
+            start_time=occurrence.start_time,
+            end_time=occurrence.end_time,
+            day=occurrence.day,
+            sent=True
+        ))
+        db.commit()
+
+        sent = ReminderService._sent_reminder_keys(db, occurrences)
+        if sent != {(course_id, occurrence.class_datetime, occurrence.start_time)}:
+            print(f"✗ Unexpected sent reminder keys: {sent}")
+            return False
+        print("✓ Sent reminders found by (course, class date, start time)")
+        return True
+    except Exception as e:
+        print(f"✗ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+def _wait_for(condition, timeout=10):
+    """Poll until condition() is true or the timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return condition()
+
+def _reminder_jobs_for(scheduler, course_id):
+    return [
+        job for job in scheduler.get_jobs()
+        if job.id.startswith(REMINDER_JOB_PREFIX) and any(o.course_id == course_id for o in job.args[0])
+    ]
+
+def test_reminder_scheduler_lease(course_id):
+    """Test that one process holds the reminder lease and re-syncs jobs on course changes."""
+    print("\n" + "=" * 60)
+    print("TEST: Reminder Scheduler Lease")
+    print("=" * 60)
+
+    retry_seconds = settings.REMINDER_LEASE_RETRY_SECONDS
+    settings.REMINDER_LEASE_RETRY_SECONDS = 1
+    first_scheduler, second_scheduler = BackgroundScheduler(), BackgroundScheduler()
+    first, second = ReminderScheduler(first_scheduler), ReminderScheduler(second_scheduler)
+    db = SessionLocal()
+    try:
+        first_scheduler.start()
+        second_scheduler.start()
+        first.start()
+        if not _wait_for(lambda: first.is_leader):
+            print("✗ First scheduler did not acquire the lease")
+            return False
+        second.start()
+        time.sleep(1)
+        if second.is_leader:
+            print("✗ Two schedulers hold the lease at once")
+            return False
+        print("✓ Only one scheduler holds the lease")
+
+        # Each class (this week's and next week's) is a one-shot job at its reminder time
+        if not _wait_for(lambda: len(_reminder_jobs_for(first_scheduler, course_id)) == 2):
+            print("✗ Reminder jobs not scheduled for the course")
+            return False
+        job = min(_reminder_jobs_for(first_scheduler, course_id), key=lambda j: j.next_run_time)
+        occurrence = [o for o in job.args[0] if o.course_id == course_id][0]
+        if job.next_run_time.replace(tzinfo=None) != occurrence.fire_at:
+            print(f"✗ Job runs at {job.next_run_time}, expected {occurrence.fire_at}")
+            return False
+        if _reminder_jobs_for(second_scheduler, course_id):
+            print("✗ Standby scheduler registered reminder jobs")
+            return False
+        print("✓ Reminder jobs scheduled at their fire times on the lease holder only")
+
+        # A committed status change is announced and removes the job
+        course = db.query(Course).filter(Course.id == course_id).first()
+        course.status = CourseStatus.DRAFT
+        db.commit()
+        if not _wait_for(lambda: not _reminder_jobs_for(first_scheduler, course_id)):
+            print("✗ Reminder jobs kept after the course left ONGOING")
+            return False
+
+        course.status = CourseStatus.ONGOING
+        db.commit()
+        if not _wait_for(lambda: len(_reminder_jobs_for(first_scheduler, course_id)) == 2):
+            print("✗ Reminder jobs not restored after the course became ONGOING again")
+            return False
+        print("✓ Reminder jobs follow committed course changes")
+
+        # The standby takes over on its next retry once the lease holder stops
+        first.stop()
+        if not _wait_for(lambda: second.is_leader):
+            print("✗ Standby scheduler did not take over the lease")
+            return False
+        if not _wait_for(lambda: len(_reminder_jobs_for(second_scheduler, course_id)) == 2):
+            print("✗ New lease holder did not schedule the reminder jobs")
+            return False
+        print("✓ Standby scheduler takes over the lease")
+        return True
+    except Exception as e:
+        print(f"✗ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        db.rollback()
+        return False
+    finally:
+        db.close()
+        first.stop()
+        second.stop()
+        first_scheduler.shutdown(wait=False)
+        second_scheduler.shutdown(wait=False)
+        settings.REMINDER_LEASE_RETRY_SECONDS = retry_seconds
+
+def cleanup_test_data(course_id):
+    """Clean up test data."""
+    if not course_id:
+        return
+    db = SessionLocal()
+    try:
+        db.query(ClassReminder).filter(ClassReminder.course_id == course_id).delete()
+        db.query(Course).filter(Course.id == course_id).delete()
+        db.commit()
+        print("\n✓ Test data cleaned up")
+    except Exception as e:
+        print(f"\n✗ Error cleaning up: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+def main():
+    """Run all reminder tests."""
+    print("=" * 60)
+    print("CLASS REMINDER TESTS")
+    print("=" * 60)
+
+    results = []
+
+    # Test 1: Occurrence index
+    success, course_id = test_class_occurrence_index()
+    results.append(success)
+
+    # Test 2: Sent reminder lookup
+    if course_id:
+        results.append(test_sent_reminder_lookup(course_id))
+
+    # Test 3: Scheduling lease
+    if course_id:
+        results.append(test_reminder_scheduler_lease(course_id))
+
+    # Cleanup
+    cleanup_test_data(course_id)
+
+    print("\n" + "=" * 60)
+    if all(results):
+        print("✓ ALL CLASS REMINDER TESTS PASSED")
+    else:
+        print("✗ SOME CLASS REMINDER TESTS FAILED")
+    print("=" * 60)
+
+    return all(results)
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
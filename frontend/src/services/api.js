@@ -47,6 +47,26 @@ api.interceptors.response.use(
 
 export default api;
 
+// Imports run as background jobs: poll the job until it finishes and
+// resolve with the same { message, results } payload the upload used to return
+const IMPORT_JOB_POLL_MS = 1000;
+
+const waitForImportJob = async (response) => {
+  const { job_id: jobId } = response.data;
+  for (;;) {
+    const { data: job } = await api.get(`/imports/jobs/${jobId}`);
+    if (job.status === 'completed') {
+      return { ...response, data: { message: 'File processed successfully', results: job.results } };
+    }
+    if (job.status === 'failed') {
+      const error = new Error(job.error);
+      error.response = { data: { detail: job.error } };
+      throw error;
+    }
+    await new Promise((resolve) => setTimeout(resolve, IMPORT_JOB_POLL_MS));
+  }
+};
+
 // Auth API
 export const authAPI = {
   login: (email, password) => api.post('/auth/login', { email, password }),
@@ -104,14 +124,14 @@ export const studentsAPI = {
     formData.append('file', file);
     return api.post('/students/import/excel', formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
-    });
+    }).then(waitForImportJob);
   },
   importCSV: (file) => {
     const formData = new FormData();
     formData.append('file', file);
     return api.post('/students/import/csv', formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
-    });
+    }).then(waitForImportJob);
   },
 };
 
@@ -131,16 +151,17 @@ export const importsAPI = {
     formData.append('file', file);
     return api.post(`/imports/excel?course_id=${courseId}`, formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
-    });
+    }).then(waitForImportJob);
   },
   uploadCSV: (file, courseId) => {
     const formData = new FormData();
     formData.append('file', file);
     return api.post(`/imports/csv?course_id=${courseId}`, formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
-    });
+    }).then(waitForImportJob);
   },
   getSyncStatus: () => api.get('/imports/sync-status'),
+  getJob: (jobId) => api.get(`/imports/jobs/${jobId}`),
 };
 
 export const completionsAPI = {